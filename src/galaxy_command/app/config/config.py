@@ -35,6 +35,15 @@ def strtoint(value: str, config_name: str = None) -> 'Optional[int]':
     return value
 
 
+def strtofloat(value: str, config_name: str = None) -> 'Optional[float]':
+    try:
+        value = float(value)
+    except ValueError:
+        _output_warn(config_name)
+        value = None
+    return value
+
+
 def reject_none(dict_obj: 'dict') -> 'dict':
     """Remove the item whose value is `None`"""
     return {k: v for k, v in dict_obj.items() if v is not None}
@@ -53,11 +62,46 @@ class Config(object):
                  filters: 'List[str]' = None,
                  log_dir: 'Path' = None,
                  storage: 'str' = None,
+                 crawl_engine: 'str' = None,
+                 concurrency: int = None,
+                 rate: float = None,
+                 burst: int = None,
+                 endpoint_rates: 'List[str]' = None,
+                 resume: bool = None,
+                 incremental: 'Path' = None,
+                 record: 'Path' = None,
+                 replay: 'Path' = None,
+                 api_url: str = None,
+                 queue_size: int = None,
+                 shard_records: int = None,
+                 shard_size: int = None,
+                 compression: str = None,
+                 compression_level: int = None,
+                 commit_records: int = None,
+                 commit_size: int = None,
+                 commit_interval: float = None,
+                 fields: 'List[str]' = None,
                  **kwargs):
         if interval is not None:
             assert interval >= 0, "Interval must be a positive value."
         if retry is not None:
             assert retry >= 0, "Retry must be a positive value."
+        if concurrency is not None:
+            assert concurrency > 0, "Concurrency must be a positive value."
+        if rate is not None:
+            assert rate > 0, "Rate must be a positive value."
+        if burst is not None:
+            assert burst > 0, "Burst must be a positive value."
+        if queue_size is not None:
+            assert queue_size > 0, "Queue size must be a positive value."
+        if shard_records is not None:
+            assert shard_records > 0, "Shard records must be a positive value."
+        if shard_size is not None:
+            assert shard_size > 0, "Shard size must be a positive value."
+        for name, value in [("records", commit_records), ("size", commit_size), ("interval", commit_interval)]:
+            if value is not None:
+                assert value > 0, f"Commit {name} must be a positive value."
+        assert record is None or replay is None, "Cannot record and replay at the same time."
         self.output_dir = output_dir
         self.interval = interval
         self.output_format = output_format
@@ -68,6 +112,25 @@ class Config(object):
         self.inverse = inverse
         self.filters = filters
         self.storage = storage
+        self.crawl_engine = crawl_engine
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_rates = endpoint_rates
+        self.resume = resume
+        self.incremental = incremental
+        self.record = record
+        self.replay = replay
+        self.api_url = api_url
+        self.queue_size = queue_size
+        self.shard_records = shard_records
+        self.shard_size = shard_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.commit_records = commit_records
+        self.commit_size = commit_size
+        self.commit_interval = commit_interval
+        self.fields = fields
         self.kwargs = kwargs
 
         # TODO: To support to select targets by option
@@ -117,12 +180,21 @@ class Config(object):
             if key not in env_vars:
                 continue
             value = os.getenv(env_key)
-            if key.lower() in ["debug", "inverse"]:
+            if key.lower() in ["debug", "inverse", "resume"]:
                 value = strtobool(value, env_key)
-            elif key.lower() in ["interval", "retry"]:
+            elif key.lower() in ["interval", "retry", "concurrency", "burst",
+                                 "queue_size", "shard_records", "shard_size", "compression_level",
+                                 "commit_records", "commit_size"]:
                 value = strtoint(value, env_key)
-            elif key.lower() in ["output_format", "filters"]:
+            elif key.lower() in ["rate", "commit_interval"]:
+                value = strtofloat(value, env_key)
+            elif key.lower() == "compression":
+                value = value.strip().lower()
+            elif key.lower() in ["output_format", "filters", "endpoint_rates"]:
                 value = [v.strip().lower() for v in value.split(",")]
+            elif key.lower() == "fields":
+                # Expressions are separated by semicolons since fields are separated by commas
+                value = [v.strip() for v in value.split(";")]
             config_dict[key] = value
         return reject_none(config_dict)
 
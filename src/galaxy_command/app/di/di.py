@@ -1,18 +1,31 @@
-from queue import Queue
 from typing import TYPE_CHECKING
 
+from galaxy_crawler import constants
+from galaxy_crawler.async_crawl import AsyncCrawler
+from galaxy_crawler.cassette import Cassette, RecordingAdapter, ReplayAdapter
+from galaxy_crawler.checkpoint import Checkpoint
+from galaxy_crawler.compression import get_codec
 from galaxy_crawler.crawl import Crawler
 from galaxy_crawler.filters import DefaultFilter
+from galaxy_crawler.filters.base import fields
 from galaxy_crawler.filters.v1 import V1FilterEnum
 from galaxy_crawler.models.engine import EngineType
 from galaxy_crawler.models.dependeny_resolver import DependencyResolver
 from galaxy_crawler.parser import ResponseParser
+from galaxy_crawler.projection import Projection
 from galaxy_crawler.queries.v1 import V1QueryBuilder, V1QueryOrder
-from galaxy_crawler.store import JsonDataStore, RDBStore
+from galaxy_crawler.ratelimit import RateLimiter
+from galaxy_crawler.response_queue import ResponseQueue
+from galaxy_crawler.scheduler import CrawlScheduler
+from galaxy_crawler.transport import Transport
+from galaxy_crawler.store import JsonDataStore, JsonLinesDataStore, ParquetDataStore, RDBStore, SqliteDataStore
 from galaxy_crawler.utils import mkdir
+from galaxy_crawler.watermark import Watermarks
+from galaxy_crawler.writer import CommitPolicy
 
 if TYPE_CHECKING:
-    from typing import List, Type
+    from typing import List, Type, Dict, Optional, Union
+    from requests.adapters import BaseAdapter
     from galaxy_crawler.repositories import ResponseDataStore, RDBStorage
     from galaxy_crawler.queries import QueryBuilder, QueryOrder
     from galaxy_crawler.filters import Filter
@@ -24,36 +37,184 @@ class AppComponent(object):
 
     def __init__(self, config: 'Config'):
         self.config = config
-        self.json_queue = Queue()
+        self.json_queue = ResponseQueue(config.queue_size or 0)
+        self._rate_limiter = None
+        self._transport = None
+        self._checkpoint = None
+        self._watermarks = None
 
     def get_response_data_stores(self) -> 'List[ResponseDataStore]':
         output_dir = self.config.output_dir
         stores = list()
         mkdir(output_dir)
+        codec = get_codec(self.config.compression, self.config.compression_level)
         for store_format in self.config.output_format:
             if store_format == "json":
-                stores.append(JsonDataStore(output_dir))
+                stores.append(JsonDataStore(output_dir, codec=codec))
+            elif store_format == "jsonl":
+                stores.append(JsonLinesDataStore(
+                    output_dir,
+                    max_records=self.config.shard_records or constants.DEFAULT_SHARD_RECORDS,
+                    max_bytes=(self.config.shard_size or constants.DEFAULT_SHARD_SIZE) * 1024 * 1024,
+                    codec=codec,
+                ))
+            elif store_format == "parquet":
+                stores.append(ParquetDataStore(output_dir, codec=codec))
+            elif store_format == "sqlite":
+                stores.append(SqliteDataStore(output_dir))
         assert len(stores) != 0, "No data format specified"
+        if self.config.resume:
+            self.get_checkpoint().restore_stores(stores)
         return stores
 
+    def get_checkpoint(self) -> 'Checkpoint':
+        if self._checkpoint is not None:
+            return self._checkpoint
+        self._checkpoint = Checkpoint(self.config.output_dir)
+        if self.config.resume:
+            self._checkpoint.load()
+        return self._checkpoint
+
     def get_query_builder(self) -> 'QueryBuilder':
+        if self.config.api_url:
+            return V1QueryBuilder(base_url=self.config.api_url)
         return V1QueryBuilder()
 
-    def get_crawler(self) -> 'Crawler':
+    def get_crawler(self) -> 'Union[Crawler, CrawlScheduler]':
+        crawler = self._create_crawler()
+        if self.config.resume:
+            checkpoint = self.get_checkpoint()
+            crawler.resume(*checkpoint.resume_point(self.get_targets()))
+        return crawler
+
+    def _create_crawler(self) -> 'Union[Crawler, CrawlScheduler]':
+        crawl_engine = self.config.crawl_engine
+        if crawl_engine == "parallel":
+            return CrawlScheduler(
+                targets=self.get_targets(),
+                crawler_factory=lambda targets: self._create_crawler_of("sync", targets),
+            )
+        return self._create_crawler_of(crawl_engine, self.get_targets())
+
+    def _create_crawler_of(self, crawl_engine: str, targets: 'List[Target]') -> 'Crawler':
+        watermarks = self.get_watermarks()
+        if watermarks is not None:
+            # Newer objects come first so that crawling stops at the watermark
+            order, ascending_order = V1QueryOrder.MODIFIED, False
+        else:
+            order, ascending_order = self.get_query_order(), not self.config.inverse
+        if crawl_engine == "async":
+            return AsyncCrawler(
+                targets=targets,
+                query_builder=self.get_query_builder().filter_by(self.get_filters()),
+                order=order,
+                json_queue=self.json_queue,
+                wait_interval=self.config.interval,
+                retry=self.config.retry,
+                concurrency=self.config.concurrency,
+                transport=self.get_transport(),
+                ascending_order=ascending_order,
+                watermarks=watermarks,
+                projection=self.get_projection(),
+                filters=self.get_filters(),
+            )
+        if crawl_engine != "sync":
+            raise ValueError(f"Crawl engine '{crawl_engine}' is not supported.")
         return Crawler(
-            targets=self.get_targets(),
-            query_builder=self.get_query_builder(),
-            order=self.get_query_order(),
+            targets=targets,
+            query_builder=self.get_query_builder().filter_by(self.get_filters()),
+            order=order,
             json_queue=self.json_queue,
             wait_interval=self.config.interval,
             retry=self.config.retry,
+            transport=self.get_transport(),
+            ascending_order=ascending_order,
+            watermarks=watermarks,
+            projection=self.get_projection(),
+            filters=self.get_filters(),
+        )
+
+    def get_projection(self) -> 'Optional[Projection]':
+        """Fields of objects to drop before they are saved. `None` if all fields are saved."""
+        if not self.config.fields:
+            return None
+        # Fields read by the filters are kept so that the parser can evaluate them
+        filters = self.get_filters()
+        return Projection.parse(self.config.fields, {t: fields(filters, t) for t in constants.Target})
+
+    def get_watermarks(self) -> 'Optional[Watermarks]':
+        """Watermarks of the incremental crawl. `None` if the crawl is not incremental."""
+        if self.config.incremental is None:
+            return None
+        if self._watermarks is None:
+            self._watermarks = Watermarks(self.config.incremental).load()
+        return self._watermarks
+
+    def get_endpoint_rates(self) -> 'Dict[str, float]':
+        endpoint_rates = dict()
+        for expr in self.config.endpoint_rates or []:
+            try:
+                endpoint, rate = [e.strip() for e in expr.split("=")]
+                endpoint_rates[endpoint] = float(rate)
+            except ValueError:
+                raise ValueError(f"Invalid endpoint rate `{expr}`.")
+        return endpoint_rates
+
+    def get_rate_limiter(self) -> 'RateLimiter':
+        """Rate limiter shared by all components accessing the same server"""
+        if self._rate_limiter is not None:
+            return self._rate_limiter
+        rate = self.config.rate
+        if rate is None and self.config.interval:
+            # Without explicit rate, each async slot or target worker is allowed a request per interval
+            slots = 1
+            if self.config.crawl_engine == "async":
+                slots = self.config.concurrency
+            elif self.config.crawl_engine == "parallel":
+                slots = len(self.get_targets())
+            rate = (slots or 1) / self.config.interval
+        self._rate_limiter = RateLimiter(rate, self.config.burst or 1, self.get_endpoint_rates())
+        return self._rate_limiter
+
+    def get_transport(self) -> 'Transport':
+        """HTTP transport whose connections are shared by all components"""
+        if self._transport is not None:
+            return self._transport
+        retry = self.config.retry
+        pool_size = max(self.config.concurrency or 1, len(self.get_targets()), 10)
+        self._transport = Transport(
+            retry=retry if retry is not None else 3,
+            rate_limiter=self.get_rate_limiter(),
+            pool_size=pool_size,
+            adapter=self.get_adapter(pool_size),
         )
+        return self._transport
+
+    def get_adapter(self, pool_size: int) -> 'Optional[BaseAdapter]':
+        """Adapter to record or replay the responses. `None` to access the server normally."""
+        if self.config.record is not None:
+            return RecordingAdapter(Cassette(self.config.record), pool_connections=pool_size, pool_maxsize=pool_size)
+        if self.config.replay is not None:
+            return ReplayAdapter(Cassette(self.config.replay))
+        return None
 
     def get_parser(self) -> 'ResponseParser':
         return ResponseParser(
             json_queue=self.json_queue,
             data_stores=self.get_response_data_stores(),
             filters=self.get_filters(),
+            checkpoint=self.get_checkpoint(),
+            policy=self.get_commit_policy(),
+            gap_report=self.config.output_dir / 'gaps.json',
+            watermarks=self.get_watermarks(),
+        )
+
+    def get_commit_policy(self) -> 'CommitPolicy':
+        commit_size = self.config.commit_size
+        return CommitPolicy(
+            records=self.config.commit_records,
+            size=commit_size * 1024 * 1024 if commit_size is not None else None,
+            seconds=self.config.commit_interval,
         )
 
     def get_query_order(self) -> 'QueryOrder':
@@ -67,7 +228,7 @@ class AppComponent(object):
         filters = self.config.filters
         if len(filters) == 0:
             return [DefaultFilter()]
-        return [V1FilterEnum.by_expr(f) for f in filters]
+        return [V1FilterEnum.parse(f) for f in filters]
 
     def get_targets(self) -> 'List[Target]':
         return self.config.targets
@@ -87,4 +248,6 @@ class AppComponent(object):
         return storage_cls(self.get_engine())
 
     def get_dependency_resolver(self) -> 'DependencyResolver':
-        return DependencyResolver(self.get_query_builder(), int(self.config.interval))
+        return DependencyResolver(self.get_query_builder(),
+                                  int(self.config.interval),
+                                  transport=self.get_transport())
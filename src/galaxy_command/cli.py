@@ -1,6 +1,6 @@
 import logging
 
-from .commands import root, crawl, db, load, repo, task
+from .commands import root, crawl, db, fake_api, load, repo, task
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +10,7 @@ def main():
     root_cmd.add_command(
         crawl.command,
         db.command,
+        fake_api.command,
         load.command,
         repo.command,
         task.command,
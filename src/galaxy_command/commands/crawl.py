@@ -1,5 +1,4 @@
 import logging
-import time
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -7,9 +6,10 @@ import uroboros
 from uroboros.constants import ExitStatus
 
 from galaxy_crawler import constants
+from galaxy_crawler.compression import CODECS
 from galaxy_crawler.errors import NotSupportedFilterError, InvalidExpressionError
 from galaxy_crawler.filters.v1 import V1FilterEnum
-from galaxy_crawler.queries.v1 import V1QueryOrder
+from galaxy_crawler.queries.v1 import API_BASE_URL, V1QueryOrder
 
 if TYPE_CHECKING:
     import argparse
@@ -30,16 +30,68 @@ class CrawlCommand(uroboros.Command):
                             help=f"Fetch interval (default={constants.DEFAULT_INTERVAL})")
         parser.add_argument("--retry", type=int,
                             help=f"Number of retrying (default={constants.DEFAULT_RETRY})")
-        parser.add_argument("--format", choices=["json"], nargs="+", dest='output_format',
+        parser.add_argument("--format", choices=["json", "jsonl", "parquet", "sqlite"], nargs="+", dest='output_format',
                             help=f"Output format (default={constants.DEFAULT_OUTPUT_FORMAT})")
+        parser.add_argument("--shard-records", type=int,
+                            help=f"Number of objects in a JSON Lines shard "
+                            f"(default={constants.DEFAULT_SHARD_RECORDS})")
+        parser.add_argument("--shard-size", type=int, metavar="MB",
+                            help=f"Size of a JSON Lines shard (default={constants.DEFAULT_SHARD_SIZE})")
+        parser.add_argument("--compression", choices=list(CODECS),
+                            help="Compress output files. zstd requires `zstandard`, "
+                            "otherwise gzip is used instead (default=none)")
+        parser.add_argument("--compression-level", type=int,
+                            help="Compression level (default=3 for zstd, 6 for gzip)")
         parser.add_argument("--order-by", choices=V1QueryOrder.choices(),
                             help=f"Query order (default={constants.DEFAULT_ORDER_BY})."
-                            f" It is a descending order by default.")
+                            f" It is an ascending order by default.")
         parser.add_argument("--inverse", action="store_true",
-                            help="If this specified, make the order of query inverse")
+                            help="If this specified, make the order of query inverse. "
+                            "Crawling a target stops at the first object failing a filter "
+                            "if the objects are sorted by its value (e.g. --order-by download --inverse)")
         parser.add_argument("--filters", type=str, nargs='*',
                             help=f"Filter expression (e.g. download>500). "
+                            f"Clauses can be combined by '&', '|', '!' and parentheses. "
                             f"Available filter types are {V1FilterEnum.choices()}")
+        parser.add_argument("--fields", type=str, nargs='*',
+                            help="Fields of objects to save for each target. Fields prefixed with '-' are dropped, "
+                            "otherwise only the given fields are kept (e.g. repositories=-readme,-readme_html)")
+        parser.add_argument("--engine", choices=["sync", "async", "parallel"], dest='crawl_engine',
+                            help=f"Crawl engine (default={constants.DEFAULT_CRAWL_ENGINE}). "
+                            f"'parallel' crawls each target on its own worker at the same time")
+        parser.add_argument("--concurrency", type=int,
+                            help=f"Number of requests in flight with async engine "
+                            f"(default={constants.DEFAULT_CONCURRENCY})")
+        parser.add_argument("--rate", type=float,
+                            help="Requests per second shared by all requests. "
+                            "If it is not specified, it is derived from the interval")
+        parser.add_argument("--burst", type=int,
+                            help=f"Number of requests allowed at once (default={constants.DEFAULT_BURST})")
+        parser.add_argument("--endpoint-rate", type=str, nargs='*', dest='endpoint_rates',
+                            help="Requests per second for each endpoint (e.g. roles=0.5)")
+        parser.add_argument("--resume", action="store_true",
+                            help="Continue crawling from the checkpoint in the output directory")
+        parser.add_argument("--queue-size", type=int,
+                            help=f"Number of pages waiting for the parser. "
+                            f"The crawler waits while it is full (default={constants.DEFAULT_QUEUE_SIZE})")
+        parser.add_argument("--commit-records", type=int,
+                            help=f"Commit the obtained objects every N objects "
+                            f"(default={constants.DEFAULT_COMMIT_RECORDS})")
+        parser.add_argument("--commit-size", type=int, metavar="MB",
+                            help="Commit the obtained objects every N MB of responses")
+        parser.add_argument("--commit-interval", type=float, metavar="SECONDS",
+                            help=f"Commit the obtained objects at least every N seconds "
+                            f"(default={constants.DEFAULT_COMMIT_INTERVAL})")
+        parser.add_argument("--api-url", type=str,
+                            help=f"Base URL of the API (default={API_BASE_URL})")
+        cassette = parser.add_mutually_exclusive_group()
+        cassette.add_argument("--record", type=Path, metavar="DIR",
+                              help="Record the responses into the directory")
+        cassette.add_argument("--replay", type=Path, metavar="DIR",
+                              help="Replay the responses recorded by `--record` instead of accessing the API")
+        parser.add_argument("--incremental", type=Path, metavar="WATERMARK_FILE",
+                            help="Obtain only the objects modified after the previous crawl "
+                            "recorded in the given file, and update it")
         return parser
 
     def run(self, args: 'argparse.Namespace') -> 'Union[ExitStatus, int]':
@@ -48,7 +100,7 @@ class CrawlCommand(uroboros.Command):
         try:
             crawler = components.get_crawler()
             parser = components.get_parser()
-        except (NotSupportedFilterError, InvalidExpressionError) as e:
+        except (NotSupportedFilterError, InvalidExpressionError, ValueError, ImportError) as e:
             logger.error(e)
             return ExitStatus.FAILURE
 
@@ -57,14 +109,15 @@ class CrawlCommand(uroboros.Command):
         parser.start()
 
         try:
-            while parser.is_alive():
-                if not crawler.is_alive():
-                    parser.send_stop_signal()
-                    parser.join()
-                    break
-                time.sleep(1)
-            if crawler.is_alive():
+            while crawler.is_alive() and parser.is_alive():
+                crawler.join(0.1)
+            if parser.is_alive():
+                # Let the parser save the remaining responses
+                components.json_queue.close()
+                parser.join()
+            else:
                 crawler.send_stop_signal()
+                components.json_queue.close()
                 crawler.join()
         except KeyboardInterrupt:
             logger.error("SIGTERM received.")
@@ -75,6 +128,13 @@ class CrawlCommand(uroboros.Command):
                 crawler.send_stop_signal()
                 crawler.join()
             return ExitStatus.FAILURE
+        if parser.failed:
+            # Watermarks are kept so that the objects which were not saved are obtained again
+            logger.error("Crawling failed since the obtained objects could not be saved.")
+            return ExitStatus.FAILURE
+        watermarks = components.get_watermarks()
+        if watermarks is not None:
+            watermarks.save()
         return ExitStatus.SUCCESS
 
 
@@ -0,0 +1,72 @@
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import uroboros
+from uroboros.constants import ExitStatus
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.fake_api import FakeGalaxyAPI
+
+if TYPE_CHECKING:
+    import argparse
+    from typing import Union, List
+
+logger = logging.getLogger(__name__)
+
+
+class FakeAPICommand(uroboros.Command):
+    name = 'fake-api'
+    short_description = 'Serve local fake Galaxy API'
+    long_description = 'Serve the objects recorded by `crawl --record` or obtained by `crawl` ' \
+                       'as a local Galaxy API v1 to benchmark or test crawling offline.'
+
+    def build_option(self, parser: 'argparse.ArgumentParser') -> 'argparse.ArgumentParser':
+        parser.add_argument("source", type=Path,
+                            help="Directory recorded by `crawl --record`, or output directory of `crawl`")
+        parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen (default=127.0.0.1)")
+        parser.add_argument("--port", type=int, default=8000, help="Port to listen (default=8000)")
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds to wait before each response (default=0)")
+        parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="Ratio of the responses replaced with 500 (default=0)")
+        parser.add_argument("--broken-ids", type=int, nargs='*', default=[],
+                            help="Pages containing these objects always respond 500")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of injected errors (default=0)")
+        return parser
+
+    def validate(self, args: 'argparse.Namespace') -> 'List[Exception]':
+        if not args.source.exists():
+            return [Exception(f"'{args.source}' does not exists")]
+        if not 0 <= args.error_rate <= 1:
+            return [Exception("Error rate must be between 0 and 1")]
+        return []
+
+    def run(self, args: 'argparse.Namespace') -> 'Union[ExitStatus, int]':
+        options = dict(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            broken_ids=set(args.broken_ids),
+            seed=args.seed,
+            host=args.host,
+            port=args.port,
+        )
+        if any((args.source / t.value).is_dir() for t in Target):
+            api = FakeGalaxyAPI.from_json_dir(args.source, **options)
+        else:
+            api = FakeGalaxyAPI.from_cassette(args.source, **options)
+        for target, objs in api.objects.items():
+            logger.info(f"{target.value}: {len(objs)} objects")
+        api.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info(f"Stop serving. {api.requests} requests were handled.")
+        finally:
+            api.stop()
+        return ExitStatus.SUCCESS
+
+
+command = FakeAPICommand()
@@ -28,10 +28,18 @@ class LoadCommand(uroboros.Command):
     def build_option(self, parser: 'argparse.ArgumentParser') -> 'argparse.ArgumentParser':
         parser.add_argument('json_dir',
                             type=Path,
-                            help='Path to dir containing JSON')
+                            help='Path to dir containing JSON, or the database written by `crawl --format sqlite`')
         parser.add_argument('--interval',
                             type=int,
                             help='Interval time (sec) to access galaxy.ansible.com')
+        parser.add_argument('--delta',
+                            action='store_true',
+                            help='Upsert the modified objects into the existing tables instead of recreating them. '
+                                 'JSON may be obtained by `crawl --incremental`')
+        parser.add_argument('--orm',
+                            action='store_true',
+                            help='Insert objects through the ORM instead of the bulk load '
+                                 '(COPY on PostgreSQL, LOAD DATA on MySQL)')
         return parser
 
     def before_validate(self, unsafe_args: 'argparse.Namespace') -> 'argparse.Namespace':
@@ -53,8 +61,8 @@ class LoadCommand(uroboros.Command):
         except Exception as e:
             logger.error(e)
             return ExitStatus.FAILURE
-        json_loader = JsonLoader(args.json_dir, engine, rdb_store, resolver)
-        if json_loader.to_rdb_store():
+        json_loader = JsonLoader(args.json_dir, engine, rdb_store, resolver, bulk=not args.orm)
+        if json_loader.to_rdb_store(delta=args.delta):
             return ExitStatus.SUCCESS
         return ExitStatus.FAILURE
 
@@ -10,6 +10,7 @@ from uroboros.constants import ExitStatus
 from galaxy_command.commands.database.options import StorageOption
 from galaxy_crawler.ghq import GHQ
 from galaxy_crawler.models import helper
+from galaxy_crawler.ratelimit import RateLimiter
 
 if TYPE_CHECKING:
     import argparse
@@ -86,8 +87,10 @@ class CloneCommand(uroboros.Command):
     def run(self, args: 'argparse.Namespace') -> 'Union[ExitStatus, int]':
         components = args.components  # type: AppComponent
         ghq_bin_path = Path('./bin/ghq').expanduser().resolve()
-        ghq = GHQ(ghq_bin_path, args.output_dir)
-        ghq.INTERVAL = args.interval
+        # Clones are spaced by their own interval apart from the requests to the Galaxy API
+        rate_limiter = RateLimiter.from_interval(args.interval)
+        # The binary is downloaded from GitHub by a plain transport, which is not throttled as the Galaxy API
+        ghq = GHQ(ghq_bin_path, args.output_dir, rate_limiter)
         ghq.N_JOBS = args.n_jobs
         try:
             engine = components.get_engine()
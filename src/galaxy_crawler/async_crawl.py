@@ -0,0 +1,238 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.crawl import Crawler, Response
+from galaxy_crawler.ratelimit import RateLimiter
+from galaxy_crawler.transport import Transport
+
+if TYPE_CHECKING:
+    from queue import Queue
+    from typing import Deque, Dict, Any, List, Optional, Set, Tuple
+    from galaxy_crawler.constants import Target
+    from galaxy_crawler.filters import Filter
+    from galaxy_crawler.projection import Projection
+    from galaxy_crawler.queries import QueryOrder, QueryBuilder
+    from galaxy_crawler.watermark import Watermarks
+
+logger = getLogger(__name__)
+
+
+class TargetPages(object):
+    """Pages of a target which remain to be requested"""
+
+    def __init__(self, page_size: int = 100, start_page: int = 0):
+        self.page_size = page_size
+        self.last_page = None  # type: Optional[int]
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        self._next_page = start_page
+        self._splits = deque()  # type: Deque[Tuple[int, int]]
+        # Base pages whose items have been all handled
+        self._completed = start_page
+        self._done = set()  # type: Set[int]
+        self._pending = dict()  # type: Dict[int, int]
+
+    @classmethod
+    def from_position(cls, position: 'Optional[Dict[str, Any]]', page_size: int = 100) -> 'TargetPages':
+        if position is None:
+            return cls(page_size)
+        if 'last_id' in position:
+            raise ValueError("The checkpoint was written by keyset pagination. Resume it with the sync engine.")
+        # Failed windows of the paginator are retried from their current position
+        while position.get('child') is not None:
+            position = position['child']
+        return cls(page_size, position['current'] // page_size)
+
+    def pop(self) -> 'Optional[Tuple[int, int]]':
+        if len(self._splits) > 0:
+            return self._splits.popleft()
+        if self.last_page is not None and self._next_page >= self.last_page:
+            return None
+        self._next_page += 1
+        self._pending[self._next_page] = 1
+        return self._next_page, self.page_size
+
+    def mark_last(self, page: int):
+        if self.last_page is None or page < self.last_page:
+            self.last_page = page
+
+    def base_page(self, page: int, page_size: int) -> int:
+        return (page - 1) * page_size // self.page_size + 1
+
+    def split(self, page: int, page_size: int) -> 'List[Tuple[int, int]]':
+        """Split a failed page into smaller pages which cover the same items"""
+        assert page_size != 1, "Not supported operation. page size must be greater than 1."
+        new_size = page_size // 10 if page_size >= 10 else 1
+        first = (page - 1) * page_size // new_size + 1
+        pages = [(first + i, new_size) for i in range(page_size // new_size)]
+        self._splits.extend(pages)
+        base = self.base_page(page, page_size)
+        self._pending[base] = self._pending.get(base, 1) + len(pages) - 1
+        return pages
+
+    def complete(self, page: int, page_size: int):
+        base = self.base_page(page, page_size)
+        self._pending[base] = self._pending.get(base, 1) - 1
+        if self._pending[base] > 0:
+            return
+        del self._pending[base]
+        self._done.add(base)
+        while self._completed + 1 in self._done:
+            self._completed += 1
+            self._done.remove(self._completed)
+
+    def position(self) -> 'Dict[str, Any]':
+        """Position compatible with `Paginator.to_dict`"""
+        return {
+            "page_size": self.page_size,
+            "start": 0,
+            "end": None,
+            "current": self._completed * self.page_size,
+            "child": None,
+        }
+
+
+class AsyncCrawler(Crawler):
+    """Obtaining json from API with several requests in flight"""
+
+    def __init__(self,
+                 targets: 'List[Target]',
+                 query_builder: 'QueryBuilder',
+                 order: 'QueryOrder',
+                 json_queue: 'Queue',
+                 wait_interval: int = 10,
+                 retry: int = 3,
+                 concurrency: int = 4,
+                 rate_limiter: 'Optional[RateLimiter]' = None,
+                 transport: 'Optional[Transport]' = None,
+                 ascending_order: bool = True,
+                 watermarks: 'Optional[Watermarks]' = None,
+                 projection: 'Optional[Projection]' = None,
+                 filters: 'Optional[List[Filter]]' = None):
+        assert concurrency > 0, "Concurrency must be a positive value."
+        if transport is None:
+            if rate_limiter is None:
+                rate_limiter = RateLimiter.from_interval(wait_interval)
+            transport = Transport(retry, rate_limiter, pool_size=concurrency)
+        super(AsyncCrawler, self).__init__(
+            targets, query_builder, order, json_queue, wait_interval, retry,
+            rate_limiter, transport, ascending_order, watermarks, projection, filters)
+        self._concurrency = concurrency
+
+    def run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._crawl())
+        finally:
+            loop.close()
+        self.finish()
+
+    async def _crawl(self):
+        loop = asyncio.get_event_loop()
+        # Responses are put to the queue, which blocks while the parser is busy, on a thread of their own.
+        # A single thread keeps them in the order of their positions.
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor, \
+                ThreadPoolExecutor(max_workers=1) as emitter:
+            for target in self.targets:
+                if self._stop_signal:
+                    break
+                self.current_target = target
+                pages = TargetPages.from_position(self._positions.get(target))
+                workers = [self._worker(target, pages, executor, emitter) for _ in range(self._concurrency)]
+                await asyncio.gather(*workers)
+                if not self._stop_signal:
+                    await loop.run_in_executor(emitter, self.finish_target, target)
+                logger.info(f"Done: {target.name}")
+        self.current_target = None
+
+    async def _next_page(self, pages: 'TargetPages') -> 'Optional[Tuple[int, int]]':
+        async with pages.condition:
+            while not self._stop_signal:
+                page = pages.pop()
+                if page is not None:
+                    pages.in_flight += 1
+                    return page
+                if pages.in_flight == 0:
+                    break
+                await pages.condition.wait()
+            return None
+
+    async def _page_done(self, pages: 'TargetPages'):
+        async with pages.condition:
+            pages.in_flight -= 1
+            pages.condition.notify_all()
+
+    async def _worker(self,
+                      target: 'Target',
+                      pages: 'TargetPages',
+                      executor: 'ThreadPoolExecutor',
+                      emitter: 'ThreadPoolExecutor'):
+        loop = asyncio.get_event_loop()
+        while True:
+            page = await self._next_page(pages)
+            if page is None:
+                break
+            self.query_builder \
+                .order_by(self.order, self.ascending_order) \
+                .set_page(page)
+            self.set_watermark_query(target)
+            url = self.query_builder.build(target)
+            try:
+                # The rate limiter of transport blocks the executor thread, not the loop
+                status, data, size = await loop.run_in_executor(executor, self.fetch, target, url)
+            except Exception as e:
+                logger.error(f"Request to '{url}' was failed with {e}.")
+                self.send_stop_signal()
+                await self._page_done(pages)
+                break
+            response = self._handle(target, pages, page, status, data, size)
+            if response is not None:
+                await loop.run_in_executor(emitter, self.emit, response)
+            await self._page_done(pages)
+
+    def _handle(self,
+                target: 'Target',
+                pages: 'TargetPages',
+                page: 'Tuple[int, int]',
+                status: int,
+                data: 'Optional[Dict[str, Any]]',
+                size: int = 0) -> 'Optional[Response]':
+        """Update the pages by the result of a request. Returns the response to be passed to the parser."""
+        page_num, page_size = page
+        is_base_page = page_size == pages.page_size
+        if status not in [200, 404, 500]:
+            # The page is not completed, so that it is requested again when the crawl is resumed
+            logger.error(f"{status}: {target.name} page={page_num}")
+            self.send_stop_signal()
+            return None
+        if status == 500 and page_size != 1:
+            pages.split(page_num, page_size)
+            return None
+        pages.complete(page_num, page_size)
+        if status == 404:
+            if is_base_page:
+                pages.mark_last(page_num - 1)
+            return None
+        if status == 500:
+            logger.warning(f"Skip due to 500: {target.name} page={page_num}")
+            return None
+        if is_base_page and data.get('next') is None:
+            pages.mark_last(page_num)
+        if self.cut_at_watermark(target, data):
+            pages.mark_last(pages.base_page(page_num, page_size))
+        if self.cut_at_filter(target, data):
+            # Pages already in flight are filtered by the parser
+            pages.mark_last(pages.base_page(page_num, page_size))
+        return Response(target, data, pages.position(), size)
+
+    def fetch(self, target: 'Target', url: str) -> 'Tuple[int, Optional[Dict[str, Any]], int]':
+        """Status code, body and its bytes of the response"""
+        resp = self._transport.get(url, headers=self.get_headers(), endpoint=target.value)
+        if resp.status_code != 200:
+            logger.warning(f"{resp.status_code}: '{url}'")
+            return resp.status_code, None, 0
+        logger.info(f"{resp.status_code}: '{url}'")
+        return resp.status_code, resp.json(), len(resp.content)
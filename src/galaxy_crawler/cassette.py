@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
+from urllib import parse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+logger = getLogger(__name__)
+
+
+class CassetteMiss(requests.RequestException):
+    """The request was not recorded in the cassette"""
+    pass
+
+
+def normalize_url(url: str) -> str:
+    """URL whose query parameters are sorted"""
+    parsed = parse.urlparse(url)
+    query = parse.urlencode(sorted(parse.parse_qsl(parsed.query)))
+    return parse.urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', query, ''))
+
+
+class Cassette(object):
+    """Responses of the API stored in a directory, one file per URL"""
+
+    def __init__(self, directory: 'Path'):
+        self.directory = directory
+        self._lock = Lock()
+
+    def path_of(self, url: str) -> 'Path':
+        digest = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def record(self, url: str, status: int, body: 'Any'):
+        entry = {"url": normalize_url(url), "status": status, "body": body}
+        path = self.path_of(url)
+        with self._lock:
+            if not self.directory.exists():
+                self.directory.mkdir(parents=True)
+            tmp = path.with_name(path.name + '.tmp')
+            with tmp.open('w') as fp:
+                json.dump(entry, fp)
+            os.replace(str(tmp), str(path))
+
+    def play(self, url: str) -> 'Optional[Tuple[int, Any]]':
+        path = self.path_of(url)
+        if not path.exists():
+            return None
+        with path.open('r') as fp:
+            entry = json.load(fp)
+        return entry['status'], entry['body']
+
+    def entries(self) -> 'Iterator[Dict[str, Any]]':
+        for path in sorted(self.directory.glob("*.json")):
+            with path.open('r') as fp:
+                yield json.load(fp)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Send requests to the server and record the responses"""
+
+    def __init__(self, cassette: 'Cassette', *args, **kwargs):
+        super(RecordingAdapter, self).__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request: 'requests.PreparedRequest', **kwargs) -> 'requests.Response':
+        resp = super(RecordingAdapter, self).send(request, **kwargs)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        self.cassette.record(request.url, resp.status_code, body)
+        return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    """Return the recorded responses without accessing the server"""
+
+    def __init__(self, cassette: 'Cassette'):
+        super(ReplayAdapter, self).__init__()
+        self.cassette = cassette
+
+    def send(self, request: 'requests.PreparedRequest', **kwargs) -> 'requests.Response':
+        recorded = self.cassette.play(request.url)
+        if recorded is None:
+            raise CassetteMiss(f"'{request.url}' is not recorded in {self.cassette.directory}", request=request)
+        status, body = recorded
+        resp = requests.Response()
+        resp.status_code = status
+        resp.headers = CaseInsensitiveDict({"content-type": "application/json"})
+        resp.encoding = 'utf-8'
+        resp._content = json.dumps(body).encode('utf-8')
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
@@ -0,0 +1,85 @@
+import json
+import os
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Tuple
+    from galaxy_crawler.constants import Target
+    from galaxy_crawler.repositories import ResponseDataStore
+
+logger = getLogger(__name__)
+
+
+class Checkpoint(object):
+    """Position of crawling which was committed by the data stores"""
+
+    file_name = 'checkpoint.json'
+
+    def __init__(self, output_dir: 'Path'):
+        self.path = output_dir / self.file_name
+        self.positions = dict()  # type: Dict[str, Dict[str, Any]]
+        self.stores = dict()  # type: Dict[str, Dict[str, Any]]
+        # Ids of the committed objects encoded by `SeenIds`
+        self.seen = dict()  # type: Dict[str, str]
+        self._lock = Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> 'Checkpoint':
+        if not self.exists():
+            logger.warning(f"{self.path} does not exist. Start from the beginning.")
+            return self
+        with self.path.open('r') as fp:
+            body = json.load(fp)
+        self.positions = body.get('positions', {})
+        self.stores = body.get('stores', {})
+        self.seen = body.get('seen', {})
+        logger.info(f"Load checkpoint from {self.path}")
+        return self
+
+    def save(self):
+        """Write the checkpoint atomically"""
+        with self._lock:
+            body = {"positions": self.positions, "stores": self.stores, "seen": self.seen}
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with tmp.open('w') as fp:
+                json.dump(body, fp)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(str(tmp), str(self.path))
+
+    def commit(self,
+               positions: 'Dict[Target, Dict[str, Any]]',
+               stores: 'List[ResponseDataStore]',
+               seen: 'Optional[Dict[str, str]]' = None):
+        """Record positions whose items were committed by all stores"""
+        for target, position in positions.items():
+            self.positions[target.value] = position
+        for store in stores:
+            self.stores[store.__class__.__name__] = store.get_state()
+        if seen is not None:
+            self.seen = seen
+        self.save()
+
+    def get_position(self, target: 'Target') -> 'Optional[Dict[str, Any]]':
+        return self.positions.get(target.value)
+
+    def is_finished(self, target: 'Target') -> bool:
+        position = self.get_position(target)
+        return position is not None and position.get('finished', False)
+
+    def restore_stores(self, stores: 'List[ResponseDataStore]'):
+        for store in stores:
+            state = self.stores.get(store.__class__.__name__)
+            if state is not None:
+                store.restore_state(state)
+
+    def resume_point(self, targets: 'List[Target]') -> 'Tuple[List[Target], Dict[Target, Dict[str, Any]]]':
+        """Targets which remain to be crawled and their positions"""
+        remaining = [t for t in targets if not self.is_finished(t)]
+        positions = {t: self.positions[t.value] for t in remaining if t.value in self.positions}
+        return remaining, positions
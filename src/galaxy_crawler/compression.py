@@ -0,0 +1,154 @@
+import gzip
+import io
+import os
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, Optional
+    from pathlib import Path
+
+logger = getLogger(__name__)
+
+
+class Codec(object):
+    """Files are written as they are"""
+
+    name = 'none'
+    suffix = ''
+    default_level = None  # type: Optional[int]
+    levels = range(0)
+
+    def __init__(self, level: 'Optional[int]' = None):
+        self.level = level if level is not None else self.default_level
+
+    def writer(self, raw: 'BinaryIO') -> 'BinaryIO':
+        return raw
+
+    def open(self, path: 'Path') -> 'BinaryIO':
+        """Open the file to read decompressed bytes"""
+        return path.open('rb')
+
+    def flush(self, fp: 'BinaryIO'):
+        fp.flush()
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    suffix = '.gz'
+    default_level = 6
+    levels = range(0, 10)
+
+    def writer(self, raw: 'BinaryIO') -> 'BinaryIO':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.level)
+
+    def open(self, path: 'Path') -> 'BinaryIO':
+        return gzip.open(str(path), 'rb')
+
+
+class ZstdCodec(Codec):
+    name = 'zstd'
+    suffix = '.zst'
+    default_level = 3
+    levels = range(-7, 23)
+
+    def writer(self, raw: 'BinaryIO') -> 'BinaryIO':
+        return zstandard.ZstdCompressor(level=self.level).stream_writer(raw, closefd=False)
+
+    def open(self, path: 'Path') -> 'BinaryIO':
+        reader = zstandard.ZstdDecompressor().stream_reader(path.open('rb'), read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader)
+
+    def flush(self, fp: 'BinaryIO'):
+        # End the current block so that the written lines can be decompressed
+        fp.flush(zstandard.FLUSH_BLOCK)
+
+
+CODECS = {c.name: c for c in [Codec, GzipCodec, ZstdCodec]}
+
+
+def get_codec(name: 'Optional[str]' = None, level: 'Optional[int]' = None) -> 'Codec':
+    """Codec to write files. zstd falls back to gzip if `zstandard` is not installed."""
+    if name is None:
+        name = Codec.name
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression '{name}'. Choose from {', '.join(CODECS)}.")
+    if name == ZstdCodec.name and zstandard is None:
+        logger.warning("`zstandard` is not installed. gzip is used instead of zstd.")
+        name, level = GzipCodec.name, None
+    codec = CODECS[name]
+    if level is not None and level not in codec.levels:
+        raise ValueError(f"Compression level of {name} must be in [{codec.levels.start}, {codec.levels.stop - 1}]")
+    return codec(level)
+
+
+def codec_of(path: 'Path') -> 'Codec':
+    """Codec to read the file, which is decided by its suffix"""
+    for codec in [GzipCodec, ZstdCodec]:
+        if path.name.endswith(codec.suffix):
+            if codec is ZstdCodec and zstandard is None:
+                raise ImportError(f"`zstandard` is required to read '{path}'")
+            return codec()
+    return Codec()
+
+
+def strip_codec_suffix(name: str) -> str:
+    for codec in [GzipCodec, ZstdCodec]:
+        if name.endswith(codec.suffix):
+            return name[:-len(codec.suffix)]
+    return name
+
+
+class IOStats(object):
+    """Bytes before and after (de)compression"""
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def add(self, bytes_in: int, bytes_out: int):
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def __str__(self) -> str:
+        ratio = self.bytes_out / self.bytes_in if self.bytes_in > 0 else 1.0
+        return f"{self.bytes_in} bytes in, {self.bytes_out} bytes out ({ratio:.1%})"
+
+
+class CompressedWriter(object):
+    """Binary file written through the codec"""
+
+    def __init__(self, path: 'Path', codec: 'Codec', mode: str = 'wb'):
+        self.path = path
+        self.codec = codec
+        self._raw = path.open(mode)
+        self._start = self._raw.tell()
+        self._fp = codec.writer(self._raw)
+        self.bytes_in = 0
+        # Updated when the written data is flushed
+        self.bytes_out = 0
+
+    def write(self, data: bytes):
+        self._fp.write(data)
+        self.bytes_in += len(data)
+
+    def sync(self):
+        self.codec.flush(self._fp)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self.bytes_out = self._raw.tell() - self._start
+
+    def close(self):
+        if self._fp is not self._raw:
+            # Write the end of the compressed stream
+            self._fp.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self.bytes_out = self._raw.tell() - self._start
+        self._raw.close()
+
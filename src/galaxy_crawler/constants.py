@@ -12,6 +12,16 @@ DEFAULT_DEBUG = False
 DEFAULT_OUTPUT_FORMAT = ['json']
 DEFAULT_ORDER_BY = "id"
 DEFAULT_FILTERS = []
+DEFAULT_CRAWL_ENGINE = "sync"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_BURST = 1
+DEFAULT_ENDPOINT_RATES = []
+DEFAULT_RESUME = False
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_SHARD_RECORDS = 100000
+DEFAULT_SHARD_SIZE = 256
+DEFAULT_COMMIT_RECORDS = 500
+DEFAULT_COMMIT_INTERVAL = 60
 
 DEFAULT_DB_TYPE = 'postgres'
 DEFAULT_DB_HOST = '127.0.0.1'
@@ -1,17 +1,24 @@
 from logging import getLogger
 from queue import Queue
 from threading import Thread
-from time import sleep
 from typing import TYPE_CHECKING
 
 import requests
 
+from galaxy_crawler.filters.base import bound
 from galaxy_crawler.queries import QueryOrder, QueryBuilder
-from galaxy_crawler.queries.v1 import Paginator
+from galaxy_crawler.queries.v1 import AdaptivePaginator, KeysetPaginator, Paginator, \
+    extract_page_size, paginator_from_dict
+from galaxy_crawler.ratelimit import RateLimiter
+from galaxy_crawler.response_queue import QueueClosed
+from galaxy_crawler.transport import Transport
 
 if TYPE_CHECKING:
+    from galaxy_crawler.filters import CompiledFilter, Filter
+    from galaxy_crawler.projection import Projection
+    from galaxy_crawler.watermark import Watermarks
     from galaxy_crawler.constants import Target
-    from typing import Dict, Any, List
+    from typing import Dict, Any, List, Optional, Union
 
 logger = getLogger(__name__)
 
@@ -26,9 +33,13 @@ class RequestFailed(Exception):
 
 class Response(object):
 
-    def __init__(self, target: 'Target', response: dict):
+    def __init__(self, target: 'Target', response: dict, state: 'Optional[Dict[str, Any]]' = None, size: int = 0):
         self.target = target
         self.response = response
+        # Position to continue crawling after this response
+        self.state = state
+        # Bytes of the response body
+        self.size = size
 
 
 class Crawler(Thread):
@@ -43,24 +54,49 @@ class Crawler(Thread):
                  order: 'QueryOrder',
                  json_queue: 'Queue',
                  wait_interval: int = 10,
-                 retry: int = 3):
+                 retry: int = 3,
+                 rate_limiter: 'Optional[RateLimiter]' = None,
+                 transport: 'Optional[Transport]' = None,
+                 ascending_order: bool = True,
+                 watermarks: 'Optional[Watermarks]' = None,
+                 projection: 'Optional[Projection]' = None,
+                 filters: 'Optional[List[Filter]]' = None):
         super(Crawler, self).__init__()
         self.targets = targets
         self.current_target = targets[0]
         self.query_builder = query_builder
         self.order = order
+        self.ascending_order = ascending_order
+        self._watermarks = watermarks
+        self._projection = projection
+        self._filters = filters or []
+        # Filters which stop the pagination of each target, if the order allows
+        self._bounds = dict()  # type: Dict[Target, Optional[CompiledFilter]]
         self._json_queue = json_queue
         self._stop_signal = False
         self._wait_interval = wait_interval
         self._retry = retry
+        if transport is None:
+            if rate_limiter is None:
+                rate_limiter = RateLimiter.from_interval(wait_interval)
+            transport = Transport(retry, rate_limiter)
+        self._transport = transport
         self._custom_headers = dict()
-        self._paginator = Paginator(100)
+        self._positions = dict()  # type: Dict[Target, Dict[str, Any]]
+        self._last_elapsed = None  # type: Optional[float]
+        self._last_size = 0
+        self._paginator = self._get_paginator(self.current_target)
 
     def send_stop_signal(self):
         self._stop_signal = True
 
+    @property
+    def stopped(self) -> bool:
+        """Whether the crawling was stopped before all targets were obtained"""
+        return self._stop_signal
+
     def run(self) -> None:
-        """Access to the API at regular interval"""
+        """Access to the API within the allowed rate"""
         while True:
             if self._stop_signal:
                 break
@@ -75,79 +111,156 @@ class Crawler(Thread):
                 continue
             if data is None:
                 continue
-            res = Response(self.current_target, data)
-            self._json_queue.put(res)
-            self.sleep()
+            exhausted = self._paginator.feed(data, self._last_elapsed)
+            reached = self.cut_at_watermark(self.current_target, data)
+            filtered_out = self.cut_at_filter(self.current_target, data)
+            if not self.emit(Response(self.current_target, data, self._paginator.to_dict(), self._last_size)):
+                break
+            if reached:
+                logger.info(f"Reached the watermark: {self.current_target.name}")
+                self.next_target()
+            elif filtered_out:
+                logger.info(f"No more objects pass the filters: {self.current_target.name}")
+                self.next_target()
+            elif exhausted:
+                logger.info(f"Done: {self.current_target.name}")
+                self.next_target()
         self.finish()
 
-    def sleep(self):
-        logger.info(f"Wait for {self._wait_interval} sec")
-        sleep(self._wait_interval)
+    def emit(self, response: 'Response') -> bool:
+        """Pass the response to the parser. Blocks while the parser is busy."""
+        results = response.response.get('results')
+        if self._projection is not None and results:
+            # Unused fields are dropped before the response is kept in the queue
+            response.response['results'] = self._projection.apply(response.target, results)
+        try:
+            self._json_queue.put(response)
+        except QueueClosed:
+            logger.warning("Parser no longer accepts responses.")
+            self.send_stop_signal()
+            return False
+        return True
 
-    def get_json(self, url) -> 'Dict[str, Any]':
-        done = False
-        data = None
-        failed_count = 0
-        while failed_count < self._retry and not done:
-            try:
-                resp = requests.get(url, headers=self.get_headers(), timeout=(30, 60))
-                if resp.status_code != 200:
-                    logger.warning(f"{resp.status_code}: '{url}'")
-                    if resp.status_code == 404:
-                        logger.info(f"Done: {self.current_target.name}")
-                        self.next_target()
-                        return data
-                    elif resp.status_code == 500:
-                        page_size = self._paginator.extract_page_size(url)
-                        if page_size == 1:
-                            logger.warning(f"Skip due to 500: {url}")
-                            return data
-                        else:
-                            self._paginator.enter_failed_state()
-                            return data
-                    else:
-                        resp.raise_for_status()
-                else:
-                    logger.info(f"{resp.status_code}: '{url}'")
-                done = True
-            except Exception as e:
-                failed_count += 1
-                if failed_count > self._retry:
-                    self.failed(f"Retry count over the threshold.")
-                    done = True
-                else:
-                    logger.error(f"Request to '{url}' was failed with {e}. "
-                                 f"Retrying...{failed_count}/{self._retry}")
-                continue
-            data = resp.json()
-        return data
+    def cut_at_watermark(self, target: 'Target', data: 'Dict[str, Any]') -> bool:
+        """Drop the items obtained by the previous crawls. Returns whether the rest are all obtained."""
+        if self._watermarks is None:
+            return False
+        data['results'], reached = self._watermarks.cut(target, data.get('results', []))
+        return reached
+
+    def filter_bound(self, target: 'Target') -> 'Optional[CompiledFilter]':
+        if target not in self._bounds:
+            self._bounds[target] = bound(self._filters, target, self.order.value, self.ascending_order)
+        return self._bounds[target]
+
+    def cut_at_filter(self, target: 'Target', data: 'Dict[str, Any]') -> bool:
+        """
+        Drop the items after the first one failing the filters sorted in the order.
+        Returns whether the following items fail too. Targets not sorted by the filtered value are never cut.
+        """
+        compiled = self.filter_bound(target)
+        if compiled is None:
+            return False
+        results = data.get('results', [])
+        passed = compiled.count_passed(target, results)
+        if passed == len(results):
+            return False
+        data['results'] = results[:passed]
+        return True
+
+    def get_json(self, url) -> 'Optional[Dict[str, Any]]':
+        try:
+            resp = self._transport.get(url, headers=self.get_headers(), endpoint=self.current_target.value)
+        except requests.RequestException as e:
+            self.failed(f"Request to '{url}' was failed with {e}.")
+        if resp.status_code == 404:
+            logger.warning(f"{resp.status_code}: '{url}'")
+            logger.info(f"Done: {self.current_target.name}")
+            self.next_target()
+            return None
+        if resp.status_code == 500:
+            logger.warning(f"{resp.status_code}: '{url}'")
+            page_size = extract_page_size(url)
+            if page_size == 1:
+                logger.warning(f"Skip due to 500: {url}")
+                self._paginator.skip()
+            else:
+                self._paginator.enter_failed_state()
+            return None
+        if resp.status_code != 200:
+            self.failed(f"{resp.status_code}: '{url}'")
+        self._last_elapsed = resp.elapsed.total_seconds()
+        self._last_size = len(resp.content)
+        logger.info(f"{resp.status_code}: '{url}' ({self._last_elapsed:.2f} sec)")
+        return resp.json()
 
     def get_url(self) -> 'str':
         if self.current_target is None:
             raise NoURLExists()
-        url = self.query_builder \
-            .order_by(self.order) \
-            .set_page(self._paginator.next_page()) \
-            .build(self.current_target)
-        return url
+        self.query_builder.order_by(self.order, self.ascending_order)
+        self._paginator.apply(self.query_builder)
+        self.set_watermark_query(self.current_target)
+        return self.query_builder.build(self.current_target)
+
+    def set_watermark_query(self, target: 'Target'):
+        if self._watermarks is None:
+            return
+        mark = self._watermarks.get(target)
+        if mark is not None:
+            self.query_builder.modified_after(mark)
 
-    def get_headers(self):
-        return self.base_headers.update(self._custom_headers)
+    def get_headers(self) -> 'Dict[str, str]':
+        headers = dict(self.base_headers)
+        headers.update(self._custom_headers)
+        return headers
 
     def set_headers(self, header: 'Dict[str, str]'):
         self._custom_headers.update(header)
 
     def finish(self):
-        logger.info("Crawler finished")
+        logger.info(f"Crawler finished: {self._transport.stats}")
 
     def failed(self, msg: str):
         self.send_stop_signal()
         raise RequestFailed(msg)
 
+    def resume(self, targets: 'List[Target]', positions: 'Dict[Target, Dict[str, Any]]'):
+        """Continue crawling from the positions saved in the checkpoint"""
+        self.targets = targets
+        self.current_target = targets[0] if len(targets) > 0 else None
+        self._positions = positions
+        self._paginator = self._get_paginator(self.current_target)
+
+    def use_keyset(self, target: 'Optional[Target]') -> bool:
+        """Keyset pagination is used unless the order or the watermark requires page numbers"""
+        if target is None or self._watermarks is not None:
+            return False
+        return KeysetPaginator.supports(target, self.order, self.ascending_order)
+
+    def _get_paginator(self, target: 'Optional[Target]') -> 'Union[Paginator, AdaptivePaginator, KeysetPaginator]':
+        position = self._positions.get(target)
+        if position is None:
+            if self.use_keyset(target):
+                return KeysetPaginator(100)
+            return AdaptivePaginator(100)
+        logger.info(f"Resume {target.name} from {position}")
+        return paginator_from_dict(position)
+
+    def finish_target(self, target: 'Target'):
+        """
+        Notify that all objects of the target were obtained.
+        The watermark is advanced by the writer once the notification is committed.
+        """
+        self.emit(Response(target, {"results": []}, {"finished": True}))
+
     def next_target(self):
+        controller = self._paginator.controller
+        if controller is not None:
+            logger.info(f"{self.current_target.name}: {controller.summary()}")
+        self.finish_target(self.current_target)
         idx = self.targets.index(self.current_target)
         try:
             self.current_target = self.targets[idx + 1]
         except IndexError:
             self.current_target = None
-        self._paginator = Paginator(100)
+        self._paginator = self._get_paginator(self.current_target)
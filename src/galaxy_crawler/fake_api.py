@@ -0,0 +1,184 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from logging import getLogger
+from socketserver import ThreadingMixIn
+from threading import Thread
+from typing import TYPE_CHECKING
+from urllib import parse
+
+from galaxy_crawler.cassette import Cassette
+from galaxy_crawler.constants import Target
+from galaxy_crawler.models.utils import iter_json
+from galaxy_crawler.queries.v1 import V1TargetPath
+from galaxy_crawler.utils import to_datetime
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = getLogger(__name__)
+
+API_PATH = '/api/v1'
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _sort_key(item: 'Dict[str, Any]', key: str) -> 'Tuple[bool, Any]':
+    value = item
+    for k in key.split('__'):
+        if not isinstance(value, dict):
+            value = None
+            break
+        # Related objects of roles are summarized in `summary_fields`
+        value = value.get(k, value.get('summary_fields', {}).get(k))
+    return value is not None, value
+
+
+# Lookups of counts such as `download_count__gt` or `repository__stargazers_count__lte`
+_COUNT_LOOKUPS = {
+    '__gt': lambda v, t: v > t,
+    '__gte': lambda v, t: v >= t,
+    '__lt': lambda v, t: v < t,
+    '__lte': lambda v, t: v <= t,
+}
+
+
+def _count_lookup(key: str) -> 'Optional[Tuple[str, Any]]':
+    for suffix, compare in _COUNT_LOOKUPS.items():
+        if key.endswith(suffix) and key not in ['id__gt', 'modified__gt']:
+            return key[:-len(suffix)], compare
+    return None
+
+
+class FakeGalaxyAPI(object):
+    """
+    Local server which imitates Galaxy API v1 with the given objects.
+    `page`, `page_size`, `order_by`, `id__gt`, `modified__gt` and lookups of counts such as
+    `download_count__gt` are supported.
+    """
+
+    def __init__(self,
+                 objects: 'Dict[Target, List[Dict[str, Any]]]',
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 broken_ids: 'Optional[Set[int]]' = None,
+                 seed: int = 0,
+                 host: str = '127.0.0.1',
+                 port: int = 0):
+        self.objects = objects
+        self.latency = latency
+        self.error_rate = error_rate
+        self.broken_ids = broken_ids or set()
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._paths = {API_PATH + V1TargetPath.from_target(t).value: t for t in Target}
+        self._server = None  # type: Optional[_ThreadingHTTPServer]
+
+    @classmethod
+    def from_cassette(cls, directory: 'Path', **kwargs) -> 'FakeGalaxyAPI':
+        """Serve the objects of the pages recorded by `crawl --record`"""
+        paths = {V1TargetPath.from_target(t).value: t for t in Target}
+        objects = {t: dict() for t in Target}  # type: Dict[Target, Dict[int, Dict[str, Any]]]
+        for entry in Cassette(directory).entries():
+            path = parse.urlparse(entry['url']).path
+            target = next((t for p, t in paths.items() if path.endswith(p)), None)
+            body = entry['body']
+            if target is None or entry['status'] != 200 or not isinstance(body, dict):
+                continue
+            for item in body.get('results', []):
+                objects[target][item['id']] = item
+        return cls({t: list(items.values()) for t, items in objects.items()}, **kwargs)
+
+    @classmethod
+    def from_json_dir(cls, json_dir: 'Path', **kwargs) -> 'FakeGalaxyAPI':
+        """Serve the objects obtained by `crawl` command"""
+        objects = dict()
+        for t in Target:
+            if (json_dir / t.value).exists():
+                items = {item['id']: item for item in iter_json(json_dir / t.value)}
+                objects[t] = list(items.values())
+        return cls(objects, **kwargs)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PATH}"
+
+    def respond(self, path: str, query: 'Dict[str, str]') -> 'Tuple[int, Dict[str, Any]]':
+        self.requests += 1
+        target = self._paths.get(path)
+        if target is None:
+            return 404, {"detail": "Not found."}
+        items = self.objects.get(target, [])
+        if 'id__gt' in query:
+            items = [i for i in items if i['id'] > int(query['id__gt'])]
+        if 'modified__gt' in query:
+            since = to_datetime(query['modified__gt'])
+            items = [i for i in items if to_datetime(i['modified']) > since]
+        for key, value in query.items():
+            lookup = _count_lookup(key)
+            if lookup is not None:
+                field, compare = lookup
+                items = [i for i in items if _sort_key(i, field)[0] and compare(_sort_key(i, field)[1], int(value))]
+        order = query.get('order_by', 'id')
+        items = sorted(items, key=lambda i: _sort_key(i, order.lstrip('-')), reverse=order.startswith('-'))
+        page = int(query.get('page', 1))
+        page_size = int(query.get('page_size', 10))
+        start = (page - 1) * page_size
+        if page < 1 or (page > 1 and start >= len(items)):
+            return 404, {"detail": "Invalid page."}
+        results = items[start:start + page_size]
+        if any(i['id'] in self.broken_ids for i in results) or self._random.random() < self.error_rate:
+            return 500, {"detail": "Internal server error."}
+        next_url = None
+        if start + page_size < len(items):
+            next_query = dict(query, page=page + 1)
+            next_url = f"http://{self.host}:{self.port}{path}?{parse.urlencode(next_query)}"
+        return 200, {"count": len(items), "next": next_url, "results": results}
+
+    def _handler(self) -> 'type':
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                parsed = parse.urlparse(self.path)
+                query = {k: v[-1] for k, v in parse.parse_qs(parsed.query).items()}
+                if api.latency > 0:
+                    time.sleep(api.latency)
+                status, body = api.respond(parsed.path, query)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> 'FakeGalaxyAPI':
+        self._server = _ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Fake Galaxy API is serving on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeGalaxyAPI':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -1,6 +1,6 @@
-from .base import Filter, DefaultFilter, FilterEnum
+from .base import Filter, DefaultFilter, FilterEnum, CompiledFilter
 
 
 __all__ = [
-    "Filter", "DefaultFilter", "v1"
+    "Filter", "DefaultFilter", "CompiledFilter", "v1"
 ]
@@ -1,12 +1,22 @@
+import re
 from abc import ABCMeta, abstractmethod
 from typing import TYPE_CHECKING
 from enum import Enum
 from galaxy_crawler.errors import InvalidExpressionError
 
 if TYPE_CHECKING:
-    from typing import Type, Union, Tuple
+    from typing import Any, Callable, Dict, List, Optional, Type, Union, Tuple
     from galaxy_crawler.constants import Target
 
+    # None means the object lacks the value to decide, which does not pass but does not bound the order either
+    Predicate = Callable[[Dict[str, Any]], Optional[bool]]
+
+# Lookups of the API query and their negations
+_NEGATED_LOOKUPS = [('__gt', '__lte'), ('__lte', '__gt'), ('__lt', '__gte'), ('__gte', '__lt')]
+
+# Operators and parentheses, or a clause such as `download>500`
+_TOKEN = re.compile(r'\s*(?:([()&|!])|([^()&|!]+))')
+
 
 class FilterEnum(Enum):
 
@@ -45,6 +55,70 @@ class FilterEnum(Enum):
             raise InvalidExpressionError(expr)
         return cls.by_name(split_expr[0], gt, threshold)
 
+    @classmethod
+    def parse(cls, expr: str) -> 'Filter':
+        """
+        Parse clauses combined by `&` (and), `|` (or), `!` (not) and parentheses,
+        such as `download>500 & (star>10 | !ansible<2.0)`. `&` binds tighter than `|`.
+        """
+        tokens = [op or clause.strip() for op, clause in _TOKEN.findall(expr)]
+        tokens = [t for t in tokens if t != '']
+        parser = _ExprParser(cls, expr, tokens)
+        return parser.parse()
+
+
+class _ExprParser(object):
+    """Recursive descent parser of filter expressions"""
+
+    def __init__(self, enum: 'Type[FilterEnum]', expr: str, tokens: 'List[str]'):
+        self.enum = enum
+        self.expr = expr
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> 'Optional[str]':
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise InvalidExpressionError(self.expr)
+        self.pos += 1
+        return token
+
+    def parse(self) -> 'Filter':
+        f = self._or()
+        if self._peek() is not None:
+            raise InvalidExpressionError(self.expr)
+        return f
+
+    def _or(self) -> 'Filter':
+        f = self._and()
+        while self._peek() == '|':
+            self._next()
+            f = OR(f, self._and())
+        return f
+
+    def _and(self) -> 'Filter':
+        f = self._not()
+        while self._peek() == '&':
+            self._next()
+            f = AND(f, self._not())
+        return f
+
+    def _not(self) -> 'Filter':
+        token = self._next()
+        if token == '!':
+            return NOT(self._not())
+        if token == '(':
+            f = self._or()
+            if self._next() != ')':
+                raise InvalidExpressionError(self.expr)
+            return f
+        if token in ('&', '|', ')'):
+            raise InvalidExpressionError(self.expr)
+        return self.enum.by_expr(token)
+
 
 class HolderMixin:
 
@@ -64,11 +138,60 @@ class HolderMixin:
         return SingleOperandHolder(NOT, self)
 
 
-class SingleOperand(metaclass=ABCMeta):
+class Filter(HolderMixin, metaclass=ABCMeta):
+    """Filter base class"""
+
+    @abstractmethod
+    def passed(self, target: 'Target', role: 'dict') -> bool:
+        raise NotImplementedError
+
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        """
+        Predicate of an object of the target, which is evaluated without the dispatch on the target.
+        None means the filter does not apply to the target, and every object passes even if negated.
+        """
+        return lambda obj: self.passed(target, obj)
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        """
+        Lookups of the API query which the objects passing the filter satisfy,
+        and whether the lookups are equivalent to the filter.
+        Objects are still filtered by the client when the lookups are looser.
+        """
+        return {}, False
+
+    def fields(self, target: 'Target') -> 'List[str]':
+        """Fields of the objects of the target which the filter reads"""
+        return []
+
+    def bound(self, target: 'Target', key: str, ascending: bool) -> 'Optional[Filter]':
+        """
+        Filter implied by this one, whose passing objects come first when the objects are sorted by the key.
+        Objects after the first failed one need not be obtained. The filter itself is returned if it is such one.
+        """
+        return None
+
+
+class DefaultFilter(Filter):
+
+    def passed(self, target: 'Target', role: 'dict') -> bool:
+        return True
+
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        return None
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        return {}, True
+
+
+class SingleOperand(Filter, metaclass=ABCMeta):
 
     def __init__(self, filter1: 'Filter'):
         self.f = filter1
 
+    def fields(self, target: 'Target') -> 'List[str]':
+        return self.f.fields(target)
+
     @abstractmethod
     def passed(self, target: 'Target', role: 'dict') -> bool:
         raise NotImplementedError
@@ -77,15 +200,51 @@ class SingleOperand(metaclass=ABCMeta):
 class NOT(SingleOperand):
 
     def passed(self, target: 'Target', role: 'dict') -> bool:
-        return not self.f.passed(target, role)
-
-
-class Operand(metaclass=ABCMeta):
+        predicate = self.compile(target)
+        return predicate is None or predicate(role) is True
+
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        predicate = self.f.compile(target)
+        if predicate is None:
+            return None
+
+        def negated(obj: 'Dict[str, Any]') -> 'Optional[bool]':
+            result = predicate(obj)
+            # An unknown value stays unknown
+            return None if result is None else not result
+
+        return negated
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        query, exact = self.f.to_query(target)
+        if not exact:
+            return {}, False
+        if len(query) == 0:
+            # Negating the filter which does not apply to the target
+            return {}, True
+        if len(query) == 1:
+            key, value = next(iter(query.items()))
+            for lookup, negated in _NEGATED_LOOKUPS:
+                if key.endswith(lookup):
+                    return {key[:-len(lookup)] + negated: value}, True
+        return {}, False
+
+    def bound(self, target: 'Target', key: str, ascending: bool) -> 'Optional[Filter]':
+        # The objects passing the negated filter come last in the inverse order
+        if self.f.bound(target, key, not ascending) is self.f:
+            return self
+        return None
+
+
+class Operand(Filter, metaclass=ABCMeta):
 
     def __init__(self, filter1: 'Filter', filter2: 'Filter'):
         self.f1 = filter1
         self.f2 = filter2
 
+    def fields(self, target: 'Target') -> 'List[str]':
+        return self.f1.fields(target) + [f for f in self.f2.fields(target) if f not in self.f1.fields(target)]
+
     @abstractmethod
     def passed(self, target: 'Target', role: 'dict') -> bool:
         raise NotImplementedError
@@ -96,12 +255,61 @@ class AND(Operand):
     def passed(self, target: 'Target', role: 'dict') -> bool:
         return self.f1.passed(target, role) and self.f2.passed(target, role)
 
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        p1 = self.f1.compile(target)
+        p2 = self.f2.compile(target)
+        if p1 is None or p2 is None:
+            return p2 if p1 is None else p1
+        return _all([p1, p2])
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        q1, e1 = self.f1.to_query(target)
+        q2, e2 = self.f2.to_query(target)
+        query = dict(q2)
+        query.update(q1)
+        # A conflicting lookup of the second filter is left to the client
+        conflicted = any(k in q1 and q1[k] != v for k, v in q2.items())
+        return query, e1 and e2 and not conflicted
+
+    def bound(self, target: 'Target', key: str, ascending: bool) -> 'Optional[Filter]':
+        b1 = self.f1.bound(target, key, ascending)
+        b2 = self.f2.bound(target, key, ascending)
+        if b1 is self.f1 and b2 is self.f2:
+            return self
+        if b1 is not None and b2 is not None:
+            return AND(b1, b2)
+        return b1 if b1 is not None else b2
+
 
 class OR(Operand):
 
     def passed(self, target: 'Target', role: 'dict') -> bool:
         return self.f1.passed(target, role) or self.f2.passed(target, role)
 
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        p1 = self.f1.compile(target)
+        p2 = self.f2.compile(target)
+        if p1 is None or p2 is None:
+            return None
+        return _any([p1, p2])
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        q1, e1 = self.f1.to_query(target)
+        q2, e2 = self.f2.to_query(target)
+        if (e1 and len(q1) == 0) or (e2 and len(q2) == 0):
+            # Either filter passes all objects of the target
+            return {}, True
+        return {}, False
+
+    def bound(self, target: 'Target', key: str, ascending: bool) -> 'Optional[Filter]':
+        b1 = self.f1.bound(target, key, ascending)
+        b2 = self.f2.bound(target, key, ascending)
+        if b1 is self.f1 and b2 is self.f2:
+            return self
+        if b1 is not None and b2 is not None:
+            return OR(b1, b2)
+        return None
+
 
 class OperandHolder(HolderMixin):
 
@@ -124,15 +332,104 @@ class SingleOperandHolder(HolderMixin):
         return self.op_class(self.f1)
 
 
-class Filter(HolderMixin, metaclass=ABCMeta):
-    """Filter base class"""
-
-    @abstractmethod
-    def passed(self, target: 'Target', role: 'dict') -> bool:
-        raise NotImplementedError
-
 
-class DefaultFilter(Filter):
-
-    def passed(self, target: 'Target', role: 'dict') -> bool:
-        return True
+class CompiledFilter(object):
+    """
+    Filters compiled into a predicate for each target, which is built once and evaluated for a whole page.
+    Objects pass when all the filters pass.
+    """
+
+    def __init__(self, filters: 'List[Filter]'):
+        self.filters = filters
+        self._predicates = dict()  # type: Dict[Target, Optional[Predicate]]
+
+    def predicate(self, target: 'Target') -> 'Optional[Predicate]':
+        if target not in self._predicates:
+            predicates = [f.compile(target) for f in self.filters]
+            predicates = [p for p in predicates if p is not None]
+            if len(predicates) == 0:
+                predicate = None
+            elif len(predicates) == 1:
+                predicate = predicates[0]
+            else:
+                predicate = _all(predicates)
+            self._predicates[target] = predicate
+        return self._predicates[target]
+
+    def filter(self, target: 'Target', objects: 'List[Dict[str, Any]]') -> 'List[Dict[str, Any]]':
+        """Objects which pass. The ones whose values are unknown do not pass."""
+        predicate = self.predicate(target)
+        if predicate is None:
+            return objects
+        return [obj for obj in objects if predicate(obj) is True]
+
+    def count_passed(self, target: 'Target', objects: 'List[Dict[str, Any]]') -> int:
+        """
+        Number of the leading objects which do not fail. The evaluation stops at the first failed one.
+        Objects whose values are unknown are counted, so that they do not end the order.
+        """
+        predicate = self.predicate(target)
+        if predicate is None:
+            return len(objects)
+        return next((i for i, ok in enumerate(map(predicate, objects)) if ok is False), len(objects))
+
+
+def _all(predicates: 'List[Predicate]') -> 'Predicate':
+    """Predicate which fails if any fails, and is unknown if any is unknown otherwise"""
+
+    def passed_all(obj: 'Dict[str, Any]') -> 'Optional[bool]':
+        result = True  # type: Optional[bool]
+        for p in predicates:
+            ok = p(obj)
+            if ok is False:
+                return False
+            if ok is None:
+                result = None
+        return result
+
+    return passed_all
+
+
+def _any(predicates: 'List[Predicate]') -> 'Predicate':
+    """Predicate which passes if any passes, and is unknown if any is unknown otherwise"""
+
+    def passed_any(obj: 'Dict[str, Any]') -> 'Optional[bool]':
+        result = False  # type: Optional[bool]
+        for p in predicates:
+            ok = p(obj)
+            if ok is True:
+                return True
+            if ok is None:
+                result = None
+        return result
+
+    return passed_any
+
+
+def to_query(filters: 'List[Filter]', target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+    """Lookups of the API query which the objects passing all the filters satisfy"""
+    query = dict()  # type: Dict[str, Any]
+    exact = True
+    for f in filters:
+        q, e = f.to_query(target)
+        exact = exact and e and not any(k in query and query[k] != v for k, v in q.items())
+        for k, v in q.items():
+            query.setdefault(k, v)
+    return query, exact
+
+
+def fields(filters: 'List[Filter]', target: 'Target') -> 'List[str]':
+    """Fields of the objects of the target which any of the filters reads"""
+    read = []  # type: List[str]
+    for f in filters:
+        read.extend(field for field in f.fields(target) if field not in read)
+    return read
+
+
+def bound(filters: 'List[Filter]', target: 'Target', key: str, ascending: bool) -> 'Optional[CompiledFilter]':
+    """Filters implied by all the filters, whose passing objects come first in the order"""
+    bounds = [f.bound(target, key, ascending) for f in filters]
+    bounds = [b for b in bounds if b is not None]
+    if len(bounds) == 0:
+        return None
+    return CompiledFilter(bounds)
@@ -1,4 +1,5 @@
-from .base import Filter
+import math
+from .base import Filter, NOT
 from typing import TYPE_CHECKING
 from logging import getLogger
 from .base import FilterEnum
@@ -7,11 +8,21 @@ from galaxy_crawler.constants import Target
 
 
 if TYPE_CHECKING:
-    from typing import Union
+    from typing import Any, Dict, List, Optional, Tuple, Union
+    from .base import Predicate
 
 
 logger = getLogger(__name__)
 
+# Keys which objects were found without, reported once for each
+_missing_keys = set()
+
+
+def _report_missing(key_name: str):
+    if key_name not in _missing_keys:
+        _missing_keys.add(key_name)
+        logger.warning(f"Objects without the attribute '{key_name}' do not pass the filters.")
+
 
 class V1FilterEnum(FilterEnum):
     DOWNLOAD = 'download_count'
@@ -28,7 +39,7 @@ class V1FilterEnum(FilterEnum):
             filter_instance = AnsibleVersionFilter(threshold)
         else:
             filter_instance = CountFilter(cls[name.upper()].value, threshold)
-        return filter_instance if gt else not filter_instance
+        return filter_instance if gt else NOT(filter_instance)
 
 
 class CountFilter(Filter):
@@ -39,14 +50,59 @@ class CountFilter(Filter):
         self.key_name = key_name
 
     def passed(self, target: 'Target', role: 'dict') -> bool:
+        predicate = self.compile(target)
+        return predicate is None or predicate(role) is True
+
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
+        if target not in [Target.ROLES, Target.REPOSITORIES]:
+            return None
+        key_name = self.key_name
+        threshold = self.threshold
+
+        def count_passed(role: 'dict') -> 'Optional[bool]':
+            try:
+                return role[key_name] > threshold
+            except KeyError:
+                _report_missing(key_name)
+                return None
+
+        return count_passed
+
+    def fields(self, target: 'Target') -> 'List[str]':
+        if target not in [Target.ROLES, Target.REPOSITORIES]:
+            return []
+        return [self.key_name]
+
+    def lookup(self, target: 'Target') -> str:
+        """Field of the query for the count"""
+        if target == Target.ROLES and self.key_name != V1FilterEnum.DOWNLOAD.value:
+            # Stars and forks of roles are the ones of their repositories
+            return "repository__" + self.key_name
+        return self.key_name
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
         if target not in [Target.ROLES, Target.REPOSITORIES]:
-            return True
-        try:
-            count = role[self.key_name]
-        except AttributeError:
-            logger.error(f"Failed to parse response. Repository has no attribute '{self.key_name}'.")
-            return False
-        return count > self.threshold
+            return {}, True
+        # Counts are integers, so `count > 500.5` is `count > 500`
+        return {f"{self.lookup(target)}__gt": math.floor(self.threshold)}, True
+
+    def bound(self, target: 'Target', key: str, ascending: bool) -> 'Optional[Filter]':
+        if target in [Target.ROLES, Target.REPOSITORIES] and key == self.key_name and not ascending:
+            return self
+        return None
+
+
+def parse_min_version(min_version_str: 'Any') -> float:
+    try:
+        # Convert 2.0a1 to 2.0
+        return float(min_version_str[:3])
+    except ValueError:
+        # When failed to parse value as float
+        logger.warning(f"Cannot parse min_ansible_version ('{min_version_str}'). Use 0.0 instead.")
+    except TypeError:
+        # The value is None
+        logger.warning(f"Cannot parse min_ansible_version ('{min_version_str}'). Use 0.0 instead.")
+    return 0.0
 
 
 class AnsibleVersionFilter(Filter):
@@ -57,23 +113,32 @@ class AnsibleVersionFilter(Filter):
         self.key_name = 'min_ansible_version'
 
     def passed(self, target: 'Target', role: 'dict') -> bool:
+        predicate = self.compile(target)
+        return predicate is None or predicate(role) is True
+
+    def compile(self, target: 'Target') -> 'Optional[Predicate]':
         if target not in [Target.REPOSITORIES, Target.ROLES]:
-            return True
-        try:
-            min_version_str = role[self.key_name]
-        except AttributeError:
-            logger.error(f"Failed to parse response. Repository has no attribute '{self.key_name}'.")
-            return False
-        try:
-            # Convert 2.0a1 to 2.0
-            min_version = float(min_version_str[:3])
-        except ValueError:
-            # When failed to parse value as float
-            logger.warning(f"Cannot parse min_ansible_version ('{min_version_str}'). Use 0.0 instead.")
-            min_version = 0.0
-        except TypeError:
-            # The value is None
-            logger.warning(f"Cannot parse min_ansible_version ('{min_version_str}'). Use 0.0 instead.")
-            min_version = 0.0
-        return min_version >= self.min_version
+            return None
+        key_name = self.key_name
+        min_version = self.min_version
 
+        def version_passed(role: 'dict') -> 'Optional[bool]':
+            try:
+                min_version_str = role[key_name]
+            except KeyError:
+                _report_missing(key_name)
+                return None
+            return parse_min_version(min_version_str) >= min_version
+
+        return version_passed
+
+    def fields(self, target: 'Target') -> 'List[str]':
+        if target not in [Target.REPOSITORIES, Target.ROLES]:
+            return []
+        return [self.key_name]
+
+    def to_query(self, target: 'Target') -> 'Tuple[Dict[str, Any], bool]':
+        if target not in [Target.REPOSITORIES, Target.ROLES]:
+            return {}, True
+        # Versions are strings such as `2.0a1`, which cannot be compared by the API
+        return {}, False
@@ -1,25 +1,27 @@
 import subprocess
 import platform
 import logging
-import time
 import zipfile
 import shutil
 import os
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import requests
 from tqdm import tqdm
 
+from galaxy_crawler.ratelimit import RateLimiter
+from galaxy_crawler.transport import Transport
+
 if TYPE_CHECKING:
-    from typing import List
+    from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 ghq_revision = "v0.12.6"
 ghq_dl_url_base = "https://github.com/motemen/ghq/releases/download/"
 
 
-def _download_ghq_binary(dest: 'Path'):
+def _download_ghq_binary(dest: 'Path', transport: 'Optional[Transport]' = None):
+    """Download the binary from GitHub. The transport must not be the one limited for the Galaxy API."""
     if not dest.exists():
         dest.mkdir(parents=True)
     machine_arch = "amd64" if platform.machine() == "x86_64" else "386"
@@ -27,7 +29,10 @@ def _download_ghq_binary(dest: 'Path'):
     dl_url_path = "{version}/ghq_{os}_{arch}.zip".format(version=ghq_revision, os=os_type, arch=machine_arch)
     ghq_zip = dest / dl_url_path.split("/")[-1]
     if not ghq_zip.exists():
-        resp = requests.get(ghq_dl_url_base + dl_url_path)
+        if transport is None:
+            transport = Transport()
+        resp = transport.get(ghq_dl_url_base + dl_url_path)
+        resp.raise_for_status()
         with ghq_zip.open('wb') as f:
             f.write(resp.content)
     if not (ghq_zip.parent / ghq_zip.stem).exists():
@@ -48,11 +53,16 @@ class GHQ(object):
     CLONE_CMD = "import"
     LIST_CMD = "list"
 
-    def __init__(self, ghq_binary: 'Path', clone_dest: 'Path'):
+    def __init__(self,
+                 ghq_binary: 'Path',
+                 clone_dest: 'Path',
+                 rate_limiter: 'Optional[RateLimiter]' = None,
+                 transport: 'Optional[Transport]' = None):
         if not ghq_binary.exists():
-            ghq_binary = _download_ghq_binary(ghq_binary.parent)
+            ghq_binary = _download_ghq_binary(ghq_binary.parent, transport)
         self.ghq = ghq_binary
         self.dest = clone_dest
+        self.rate_limiter = rate_limiter
         self._options = {
             self.CLONE_CMD: ["-u", "-P"],
             self.LIST_CMD: ["-p"]
@@ -82,9 +92,13 @@ class GHQ(object):
         steps = range(0, len(repositories), self.N_JOBS)
         logger.info("Start to clone")
         ghq_process = None
+        rate_limiter = self.rate_limiter
+        if rate_limiter is None:
+            rate_limiter = RateLimiter.from_interval(self.INTERVAL)
         try:
             pbar = tqdm(steps, total=len(repositories), desc="Cloned Repos", unit="repo")
             for i in steps:
+                rate_limiter.acquire(self.CLONE_CMD)
                 # Spawn ghq process every time
                 ghq_process = self._get_ghq_process(self.CLONE_CMD)
                 to_dl = repositories[i:i+self.N_JOBS]
@@ -99,7 +113,6 @@ class GHQ(object):
                         break
                 ghq_process.terminate()
                 pbar.update(len(to_dl))
-                time.sleep(self.INTERVAL)
         except Exception as e:
             logger.exception(str(e))
             logger.error("KILL ghq process")
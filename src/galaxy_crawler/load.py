@@ -1,21 +1,55 @@
+import itertools
 import logging
 from typing import TYPE_CHECKING
 
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 from tqdm import tqdm
 
-from galaxy_crawler.models.utils import concat_json
+from galaxy_crawler.models.base import LicenseType, RoleTypeEnum
+from galaxy_crawler.models.bulk import get_bulk_writer, select_in
+from galaxy_crawler.models.errors import JSONParseFailed
+from galaxy_crawler.models.utils import JsonStream, replace_params
 from galaxy_crawler.models import v1 as models
+from galaxy_crawler.store.sqlite_store import SqliteDataStore, SqliteStream
+from galaxy_crawler.errors import DateParseFailed
+from galaxy_crawler.utils import as_utc, to_datetime
 
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from sqlalchemy.engine import Engine
+    from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Connection, Engine
+    from galaxy_crawler.models.bulk import BulkWriter
     from galaxy_crawler.models.utils import DependencyResolver
     from galaxy_crawler.repositories.base import RDBStorage
 
 logger = logging.getLogger(__name__)
 
+# Objects converted to rows and written at once by the bulk load
+BULK_CHUNK_SIZE = 10000
+# Objects inserted in a transaction by `from_json_many` when they are inserted through the ORM
+ORM_CHUNK_SIZE = 1000
+
+TARGET_MODELS = {
+    'providers': models.Provider,
+    'platforms': models.Platform,
+    'tags': models.Tag,
+    'namespaces': models.Namespace,
+    'provider_namespaces': models.ProviderNamespace,
+    'repositories': models.Repository,
+    'roles': models.Role,
+}
+
+# Association tables of roles, whose rows are synchronized with the upserted roles
+ROLE_ASSOCIATIONS = [
+    models.TagAssociation.__table__,
+    models.LicenseStatus.__table__,
+    models.PlatformStatus.__table__,
+    models.RoleVersion.__table__,
+]
+
 
 def insert(json_obj: dict, model: 'models.BaseModel', session: 'models.Session'):
     try:
@@ -26,14 +60,253 @@ def insert(json_obj: dict, model: 'models.BaseModel', session: 'models.Session')
         return None
 
 
+def rollback(session: 'models.Session'):
+    session.rollback()
+    cache = models.LookupCache.of(session)
+    if cache is not None:
+        cache.discard_unsaved()
+
+
+def insert_page(json_objs: 'List[dict]', model: 'models.BaseModel', session: 'models.Session') -> 'List[Any]':
+    """
+    Insert the objects of a page created by `from_json_many` in a transaction.
+    If it failed, they are inserted one by one and the failed ones are skipped.
+    """
+    try:
+        objs = model.from_json_many(json_objs, session)
+        session.add_all(objs)
+        session.commit()
+        return objs
+    except Exception as e:
+        rollback(session)
+        logger.warning(f"Failed to insert {len(json_objs)} objects at once due to {e.__class__.__name__}. "
+                       f"Insert them one by one.")
+    objs = []
+    for j in json_objs:
+        obj = insert(j, model, session)
+        if obj is None:
+            # Discard the related objects which were added to the session
+            rollback(session)
+            continue
+        session.add(obj)
+        session.commit()
+        objs.append(obj)
+    return objs
+
+
+def apply_delta(json_obj: dict, model: 'models.BaseModel', session: 'models.Session'):
+    """Insert the object, or overwrite the existing one if it was modified"""
+    try:
+        exists = model.get_by_pk(json_obj['id'], session)
+        if exists is None:
+            return model.from_json(json_obj, session)
+        if exists.modified is not None and as_utc(exists.modified) == to_datetime(json_obj['modified']):
+            return None
+        # Avoid flushing the new object which has the same primary key
+        with session.no_autoflush:
+            new = model.from_json(json_obj, session)
+            obj = replace_params(exists, new, session)
+        session.flush()
+        return obj
+    except Exception as e:
+        logger.warning(f"Update obj (id={json_obj['id']}) failed due to {e.__class__.__name__}.")
+        logger.exception(str(e))
+        return None
+
+
+def modified_objects(conn: 'Connection', model: 'Any', json_objs: 'List[dict]') -> 'List[dict]':
+    """Objects which are not stored, or whose `modified` differs from the stored one"""
+    pk = model._pk
+    ids = {j['id'] for j in json_objs if 'id' in j}
+    stored = {r[pk]: r['modified'] for r in select_in(conn, model.__table__, pk, ids, [pk, 'modified'])}
+    objs = []
+    for j in json_objs:
+        modified = stored.get(j.get('id'))
+        try:
+            if modified is not None and as_utc(modified) == to_datetime(j.get('modified')):
+                continue
+        except DateParseFailed:
+            pass
+        objs.append(j)
+    return objs
+
+
+def chunks(iterable: 'Iterable[Any]', size: int) -> 'Iterator[List[Any]]':
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+class RowBuilder(object):
+    """
+    Rows of the tables built from JSON objects without the ORM, as `from_json` would create.
+    Objects already built are skipped, and the related rows refer to the objects built before.
+    """
+
+    def __init__(self):
+        # Primary keys of the rows built for each table
+        self.keys = dict()  # type: Dict[str, Set[Any]]
+        # Primary keys of the rows stored before the load, which are referred to
+        self.stored = dict()  # type: Dict[str, Set[Any]]
+        self.tag_ids = dict()  # type: Dict[str, int]
+        self.platform_ids = dict()  # type: Dict[Tuple[str, str], int]
+        self.license_ids = dict()  # type: Dict[str, int]
+        self.role_type_ids = dict()  # type: Dict[str, int]
+
+    def _keys(self, table: str) -> 'Set[Any]':
+        return self.keys.setdefault(table, set())
+
+    def _exists(self, table: str, pk: 'Any') -> bool:
+        return pk in self._keys(table) or pk in self.stored.get(table, set())
+
+    def preload(self, conn: 'Connection'):
+        """Read the rows stored before, to which the new rows refer"""
+        for tag_id, name in conn.execute(select([models.Tag.tag_id, models.Tag.name]).order_by(models.Tag.tag_id)):
+            self.tag_ids.setdefault(name, tag_id)
+        platforms = select([models.Platform.platform_id, models.Platform.name, models.Platform.release]) \
+            .order_by(models.Platform.platform_id)
+        for platform_id, name, release in conn.execute(platforms):
+            self.platform_ids.setdefault((name, release), platform_id)
+        self.license_ids.update((name, i) for i, name in conn.execute(
+            select([models.License.license_id, models.License.name])))
+        self.role_type_ids.update((name, i) for i, name in conn.execute(
+            select([models.RoleType.role_type_id, models.RoleType.name])))
+        for model in [models.ProviderNamespace, models.Role]:
+            column = getattr(model, model._pk)
+            self.stored[model.__tablename__] = {pk for pk, in conn.execute(select([column]))}
+
+    def rows(self, model: 'Any', json_objs: 'List[dict]') -> 'List[Dict[str, Any]]':
+        """Rows of the models which have no related rows"""
+        keys = self._keys(model.__tablename__)
+        rows = []
+        for j in json_objs:
+            try:
+                row = model.to_row(j)
+            except (JSONParseFailed, KeyError, TypeError) as e:
+                logger.warning(f"Insert obj (id={j.get('id')}) failed due to {e.__class__.__name__}.")
+                continue
+            pk = row[model._pk]
+            if pk in keys:
+                continue
+            keys.add(pk)
+            if model is models.Tag:
+                self.tag_ids.setdefault(row['name'], pk)
+            elif model is models.Platform:
+                # The first one is found by `Platform.get_by_name`
+                self.platform_ids.setdefault((row['name'], row['release']), pk)
+            elif model is models.Repository:
+                if not self._exists(models.ProviderNamespace.__tablename__, row['provider_namespace_id']):
+                    row['provider_namespace_id'] = None
+            rows.append(row)
+        return rows
+
+    def _license_id(self, name: str, description: str, new_rows: 'List[Dict[str, Any]]') -> int:
+        if name not in self.license_ids:
+            self.license_ids[name] = max(self.license_ids.values(), default=0) + 1
+            new_rows.append({'license_id': self.license_ids[name], 'name': name, 'description': description})
+        return self.license_ids[name]
+
+    def _role_type_id(self, role_type: 'RoleTypeEnum', new_rows: 'List[Dict[str, Any]]') -> int:
+        if role_type.name not in self.role_type_ids:
+            self.role_type_ids[role_type.name] = max(self.role_type_ids.values(), default=0) + 1
+            new_rows.append({'role_type_id': self.role_type_ids[role_type.name], 'name': role_type.name,
+                             'description': role_type.description()})
+        return self.role_type_ids[role_type.name]
+
+    def role_rows(self, json_objs: 'List[dict]') -> 'List[Tuple[Table, List[Dict[str, Any]]]]':
+        """Rows of roles and their related tables, in the order to be written"""
+        tables = [models.RoleType, models.License, models.Role, models.RepositoryVersion,
+                  models.TagAssociation, models.LicenseStatus, models.PlatformStatus, models.RoleVersion]
+        rows = {t.__table__: [] for t in tables}  # type: Dict[Table, List[Dict[str, Any]]]
+        role_keys = self._keys(models.Role.__tablename__)
+        version_keys = self._keys(models.RepositoryVersion.__tablename__)
+        for j in json_objs:
+            try:
+                row = models.parse_json(models.Role._json_fields, j, 'Role')
+                summary = j['summary_fields']
+                if row['role_id'] in role_keys:
+                    continue
+                role_id = row['role_id']
+                repository_id = summary['repository']['id']
+                role_type = RoleTypeEnum.ANS if row['role_type'] is None else RoleTypeEnum[row['role_type'].upper()]
+                licenses = LicenseType.normalize(j['license'])
+                platform_ids = [self.platform_ids[(p['name'], p['release'])] for p in summary['platforms']]
+                tag_ids = {self.tag_ids[t] for t in summary['tags'] if t in self.tag_ids}
+                versions = [{'version_id': v['id'], 'name': v['name'], 'repository_id': repository_id,
+                             'release_date': to_datetime(v['release_date'])} for v in summary['versions']]
+                namespace_id = summary['namespace']['id']
+            except (JSONParseFailed, KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"Insert obj (id={j.get('id')}) failed due to {e.__class__.__name__}.")
+                continue
+            role_keys.add(role_id)
+            del row['role_type']
+            row['role_type_id'] = self._role_type_id(role_type, rows[models.RoleType.__table__])
+            row['namespace_id'] = namespace_id
+            row['repository_id'] = repository_id
+            rows[models.Role.__table__].append(row)
+            if len(licenses) == 0:
+                license_ids = {self._license_id(j['license'], 'Other type license (could not categorize)',
+                                                rows[models.License.__table__])}
+            else:
+                license_ids = {self._license_id(l.name, l.description, rows[models.License.__table__])
+                               for l in licenses}
+            rows[models.TagAssociation.__table__].extend({'tag_id': t, 'role_id': role_id} for t in tag_ids)
+            rows[models.LicenseStatus.__table__].extend({'role_id': role_id, 'license_id': l} for l in license_ids)
+            rows[models.PlatformStatus.__table__].extend(
+                {'platform_id': p, 'role_id': role_id} for p in set(platform_ids))
+            for v in versions:
+                if v['version_id'] not in version_keys:
+                    version_keys.add(v['version_id'])
+                    rows[models.RepositoryVersion.__table__].append(v)
+            rows[models.RoleVersion.__table__].extend(
+                {'role_id': role_id, 'version_id': v} for v in {v['version_id'] for v in versions})
+        return list(rows.items())
+
+    def dependency_rows(self, depends: 'List[models.RoleDependency]') -> 'List[Dict[str, Any]]':
+        """Rows of the dependencies from the roles built"""
+        role_keys = self._keys(models.Role.__tablename__)
+        pairs = {(d.from_id, d.to_id) for d in depends if d.from_id in role_keys}
+        rows = [{'from_id': f, 'to_id': t} for f, t in sorted(pairs)
+                if self._exists(models.Role.__tablename__, t)]
+        if len(rows) < len(pairs):
+            logger.warning(f"{len(pairs) - len(rows)} dependencies refer to the roles which were not loaded")
+        return rows
+
+
+def get_object_stream(source: 'Path', name: str) -> 'Optional[Union[JsonStream, SqliteStream]]':
+    """
+    Objects of the target obtained by `crawl`, or None if none were obtained.
+    :param source: Output directory of `crawl`, or the database written by `--format sqlite`
+    :param name: Name of the target
+    """
+    db = source if source.is_file() else source / SqliteDataStore.file_name
+    if db.exists():
+        stream = SqliteStream(db, name)
+        return stream if stream.exists() else None
+    if not (source / name).exists():
+        return None
+    # Objects are read from the files as needed instead of being kept in memory
+    return JsonStream(source / name)
+
+
 class JsonLoader(object):
     """Load JSON and insert them to RDB"""
 
-    def __init__(self, json_dir: 'Path', engine: 'Engine', rdb_store: 'RDBStorage', resolver: 'DependencyResolver'):
+    def __init__(self,
+                 json_dir: 'Path',
+                 engine: 'Engine',
+                 rdb_store: 'RDBStorage',
+                 resolver: 'DependencyResolver',
+                 bulk: bool = True):
         self.json_dir = json_dir
         self.engine = engine
         self.rdb_store = rdb_store
         self.resolver = resolver
+        # Write rows by the native bulk path of the database instead of the ORM
+        self.bulk = bulk
 
     def _initialize(self) -> bool:
         """Delete existing tables"""
@@ -48,35 +321,56 @@ class JsonLoader(object):
         return True
 
     def get_session(self) -> 'models.Session':
-        return sessionmaker(bind=self.engine, autocommit=False)()
+        # Objects in the lookup cache are not read again after each commit
+        return sessionmaker(bind=self.engine, autocommit=False, expire_on_commit=False)()
 
-    def to_rdb_store(self) -> bool:
-        if not self._initialize():
+    def to_rdb_store(self, delta: bool = False) -> bool:
+        """
+        Insert JSON objects into RDB
+        :param delta: If true, existing tables are kept and only the modified objects are overwritten.
+            JSON may be a delta obtained by the incremental crawl or the whole objects.
+        :return: Whether succeeded or not
+        """
+        if delta:
+            self.rdb_store.create_tables()
+        elif not self._initialize():
             return False
-        targets = {
-            'providers': models.Provider,
-            'platforms': models.Platform,
-            'tags': models.Tag,
-            'namespaces': models.Namespace,
-            'provider_namespaces': models.ProviderNamespace,
-            'repositories': models.Repository,
-            'roles': models.Role,
-        }
+        if self.bulk:
+            return self.bulk_load(delta)
         session = self.get_session()
-        for name, model in targets.items():
-            json_objs = concat_json(self.json_dir / name)
-            logger.info(f"{name}: {len(json_objs)} objects were found")
+        # Tags, platforms, licenses, role types and versions referred to by roles are found in memory
+        cache = models.LookupCache.preload(session)
+        for name, model in TARGET_MODELS.items():
+            json_objs = get_object_stream(self.json_dir, name)
+            if json_objs is None:
+                if delta:
+                    logger.info(f"{name}: No objects were modified")
+                    continue
+                logger.error(f"{name}: No objects were found in {self.json_dir}")
+                session.rollback()
+                return False
             try:
-                objs = []
-                for j in tqdm(json_objs, leave=False, unit="obj"):
-                    obj = insert(j, model, session)
-                    if obj is not None:
-                        objs.append(obj)
-                session.add_all(objs)
+                loaded = 0
+                for chunk in chunks(tqdm(json_objs, leave=False, unit="obj"), ORM_CHUNK_SIZE):
+                    if delta:
+                        objs = [apply_delta(j, model, session) for j in chunk]
+                        objs = [o for o in objs if o is not None]
+                        session.add_all(objs)
+                    else:
+                        objs = insert_page(chunk, model, session)
+                    for obj in objs:
+                        cache.add(obj)
+                    loaded += len(objs)
+                logger.info(f"{name}: {loaded} objects were loaded ({json_objs.stats})")
                 if name == 'roles':
                     logger.info("Try to resolve role dependencies.")
-                    self.resolver.load_mapping(self.json_dir)
+                    self.resolver.load_mapping(self.json_dir if self.json_dir.is_dir() else self.json_dir.parent)
                     depends = self.resolver.resolve(json_objs)
+                    if delta:
+                        role_ids = [j['id'] for j in json_objs]
+                        session.query(models.RoleDependency) \
+                            .filter(models.RoleDependency.from_id.in_(role_ids)) \
+                            .delete(synchronize_session=False)
                     session.add_all(depends)
                 logger.info("Try to insert...")
                 session.commit()
@@ -87,3 +381,73 @@ class JsonLoader(object):
                 return False
         logger.info("Done")
         return True
+
+    def bulk_load(self, delta: bool = False) -> bool:
+        """
+        Insert the rows of all tables in a transaction.
+        Rows are copied by `COPY` on PostgreSQL, `LOAD DATA` on MySQL, and inserted by executemany otherwise.
+        :param delta: If true, the objects whose `modified` differs from the stored one are upserted,
+            and the associations of the upserted roles are synchronized. The other rows are kept.
+        """
+        conn = self.engine.connect()
+        trans = conn.begin()
+        try:
+            writer = get_bulk_writer(conn)
+            logger.info(f"Bulk load by {writer.__class__.__name__}")
+            builder = RowBuilder()
+            if delta:
+                builder.preload(conn)
+            for name, model in TARGET_MODELS.items():
+                json_objs = get_object_stream(self.json_dir, name)
+                if json_objs is None:
+                    if delta:
+                        logger.info(f"{name}: No objects were modified")
+                        continue
+                    logger.error(f"{name}: No objects were found in {self.json_dir}")
+                    trans.rollback()
+                    return False
+                for chunk in chunks(tqdm(json_objs, leave=False, unit="obj"), BULK_CHUNK_SIZE):
+                    if delta:
+                        chunk = modified_objects(conn, model, chunk)
+                    if model is models.Role:
+                        self._write_roles(writer, builder.role_rows(chunk), delta)
+                    elif delta:
+                        writer.upsert(model.__table__, builder.rows(model, chunk))
+                    else:
+                        writer.write(model.__table__, builder.rows(model, chunk))
+                logger.info(f"{name}: {len(builder.keys.get(model.__tablename__, []))} objects were loaded "
+                            f"({json_objs.stats})")
+                if model is models.Role:
+                    logger.info("Try to resolve role dependencies.")
+                    self.resolver.load_mapping(self.json_dir if self.json_dir.is_dir() else self.json_dir.parent)
+                    depends = self.resolver.resolve(json_objs)
+                    rows = builder.dependency_rows(depends)
+                    if delta:
+                        role_ids = sorted(builder.keys.get(models.Role.__tablename__, []))
+                        writer.sync(models.RoleDependency.__table__, 'from_id', role_ids, rows)
+                    else:
+                        writer.write(models.RoleDependency.__table__, rows)
+            writer.finish(models.BaseModel.metadata.sorted_tables)
+            trans.commit()
+            logger.info(f"Rows: {writer.stats()}")
+        except Exception as e:
+            logger.exception(str(e))
+            trans.rollback()
+            logger.error("Rollback.")
+            return False
+        finally:
+            conn.close()
+        logger.info("Done")
+        return True
+
+    def _write_roles(self, writer: 'BulkWriter', tables: 'List[Tuple[Table, List[Dict[str, Any]]]]', delta: bool):
+        if not delta:
+            for table, rows in tables:
+                writer.write(table, rows)
+            return
+        role_ids = [r['role_id'] for r in dict(tables)[models.Role.__table__]]
+        for table, rows in tables:
+            if table in ROLE_ASSOCIATIONS:
+                writer.sync(table, 'role_id', role_ids, rows)
+            else:
+                writer.upsert(table, rows)
@@ -16,6 +16,22 @@ class ModelInterfaceMixin(object):
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'ModelInterfaceMixin':
         raise NotImplementedError
 
+    @classmethod
+    def from_json_many(cls, json_objs: 'List[dict]', session: 'Session') -> 'List[ModelInterfaceMixin]':
+        """
+        Objects of a page. The objects referred to by them are found at once,
+        and an error of any object fails the whole page.
+        """
+        return [cls.from_json(j, session) for j in json_objs]
+
+    @classmethod
+    def to_row(cls, json_obj: 'dict') -> 'Optional[dict]':
+        """
+        Column values of the object, which are inserted without the ORM.
+        None means the object has related rows, and it must be created by `from_json`.
+        """
+        return None
+
     def exists(self, session: 'Session') -> 'bool':
         pk = getattr(self, self._pk, None)
         if pk is None:
@@ -27,11 +43,9 @@ class ModelInterfaceMixin(object):
         return session.query(cls).filter_by(**{cls._pk: primary_key}).one_or_none()
 
     def update_or_create(self, session: 'Session') -> 'ModelInterfaceMixin':
-        if self.exists(session):
-            pk = getattr(self, self._pk, None)
-            if pk is None:
-                raise NotImplementedError('_pk is not imeplemented yet.')
-            exists_obj = self.get_by_pk(pk, session)
+        # `exists` returns the stored object, which is looked up in the identity map first
+        exists_obj = self.exists(session)
+        if exists_obj is not None:
             return utils.update_params(exists_obj, self)
         return self
 
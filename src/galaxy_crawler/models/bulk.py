@@ -0,0 +1,201 @@
+import io
+import os
+import tempfile
+from datetime import datetime, timezone
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Integer, and_, bindparam, select
+from sqlalchemy.dialects import mysql, postgresql
+
+from .engine import EngineType
+from .errors import BulkLoadFailed
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Connection
+
+logger = getLogger(__name__)
+
+# Values bound to an `IN` clause at once, which is below the limit of variables of SQLite
+IN_CHUNK_SIZE = 500
+
+# Escapes of the text format shared by `COPY` and `LOAD DATA`
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def encode(value: 'Any', true: str = 't', false: str = 'f') -> str:
+    """A field of the tab separated text. NULL is `\\N`."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return true if value else false
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            # Columns have no time zone, and the ORM stores the time in UTC
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(' ')
+    return str(value).translate(_ESCAPES)
+
+
+def serial_columns(table: 'Table') -> 'List[str]':
+    """Primary keys numbered by the database, which are given explicitly by the bulk load"""
+    return [c.name for c in table.primary_key.columns
+            if isinstance(c.type, Integer) and c.autoincrement is not False and len(table.primary_key.columns) == 1]
+
+
+def upsert_statement(table: 'Table', dialect: str, columns: 'List[str]') -> 'Any':
+    """
+    Insert statement overwriting the row which has the same primary key.
+    `ON CONFLICT` on PostgreSQL, `ON DUPLICATE KEY` on MySQL and `INSERT OR REPLACE` otherwise.
+    """
+    keys = [c.name for c in table.primary_key.columns]
+    updated = [c for c in columns if c not in keys]
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table)
+        if len(updated) == 0:
+            return stmt.on_conflict_do_nothing(index_elements=keys)
+        return stmt.on_conflict_do_update(index_elements=keys, set_={c: stmt.excluded[c] for c in updated})
+    if dialect == 'mysql':
+        stmt = mysql.insert(table)
+        # Assigning the key to itself leaves the row as it is
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in updated or keys[:1]})
+    return table.insert().prefix_with('OR REPLACE')
+
+
+def select_in(conn: 'Connection',
+              table: 'Table',
+              column: str,
+              values: 'Iterable[Any]',
+              columns: 'Optional[List[str]]' = None) -> 'List[Any]':
+    """Rows of the table whose column is one of the values. All columns are read unless `columns` is given."""
+    values = list(values)
+    selected = [table] if columns is None else [table.c[c] for c in columns]
+    rows = []
+    for i in range(0, len(values), IN_CHUNK_SIZE):
+        query = select(selected).where(table.c[column].in_(values[i:i + IN_CHUNK_SIZE]))
+        rows.extend(conn.execute(query).fetchall())
+    return rows
+
+
+class BulkWriter(object):
+    """Insert rows by executemany, which every dialect supports"""
+
+    def __init__(self, conn: 'Connection'):
+        self.conn = conn
+        self.rows = dict()  # type: Dict[str, int]
+        self.deleted = dict()  # type: Dict[str, int]
+
+    def write(self, table: 'Table', rows: 'List[Dict[str, Any]]'):
+        """Insert the rows, all of which have the same columns"""
+        if len(rows) == 0:
+            return
+        self._write(table, rows)
+        self.rows[table.name] = self.rows.get(table.name, 0) + len(rows)
+
+    def _write(self, table: 'Table', rows: 'List[Dict[str, Any]]'):
+        self.conn.execute(table.insert(), rows)
+
+    def upsert(self, table: 'Table', rows: 'List[Dict[str, Any]]'):
+        """Insert the rows, or overwrite the existing ones which have the same primary keys"""
+        if len(rows) == 0:
+            return
+        columns = list(rows[0].keys())
+        self.conn.execute(upsert_statement(table, self.conn.dialect.name, columns), rows)
+        self.rows[table.name] = self.rows.get(table.name, 0) + len(rows)
+
+    def sync(self, table: 'Table', key: str, ids: 'Iterable[Any]', rows: 'List[Dict[str, Any]]'):
+        """
+        Make the rows of the association table whose `key` is one of the ids equal to the given rows.
+        Only the difference is deleted and inserted.
+        """
+        columns = [c.name for c in table.primary_key.columns]
+        stored = {tuple(r[c] for c in columns) for r in select_in(self.conn, table, key, ids)}  # type: Set[Tuple]
+        expected = {tuple(r[c] for c in columns) for r in rows}
+        stale = sorted(stored - expected)
+        if len(stale) > 0:
+            cond = and_(*[table.c[c] == bindparam(f"_{c}") for c in columns])
+            self.conn.execute(table.delete().where(cond), [{f"_{c}": v for c, v in zip(columns, s)} for s in stale])
+            self.deleted[table.name] = self.deleted.get(table.name, 0) + len(stale)
+        new = sorted(expected - stored)
+        if len(new) > 0:
+            self._write(table, [dict(zip(columns, n)) for n in new])
+            self.rows[table.name] = self.rows.get(table.name, 0) + len(new)
+
+    def finish(self, tables: 'List[Table]'):
+        """Called after all rows are written"""
+        pass
+
+    def _quote(self, name: str) -> str:
+        return self.conn.dialect.identifier_preparer.quote(name)
+
+    def _lines(self, rows: 'List[Dict[str, Any]]', **kwargs) -> 'List[str]':
+        columns = list(rows[0].keys())
+        return ['\t'.join(encode(row[c], **kwargs) for c in columns) + '\n' for row in rows]
+
+    def stats(self) -> str:
+        written = ", ".join(f"{name}: {n}" for name, n in self.rows.items())
+        if len(self.deleted) == 0:
+            return written
+        return written + " (deleted " + ", ".join(f"{name}: {n}" for name, n in self.deleted.items()) + ")"
+
+
+class PostgresCopyWriter(BulkWriter):
+    """Stream rows by `COPY ... FROM STDIN`"""
+
+    def _write(self, table: 'Table', rows: 'List[Dict[str, Any]]'):
+        columns = ", ".join(self._quote(c) for c in rows[0].keys())
+        buf = io.StringIO()
+        buf.writelines(self._lines(rows))
+        buf.seek(0)
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {self._quote(table.name)} ({columns}) FROM STDIN", buf)
+        finally:
+            cursor.close()
+
+    def finish(self, tables: 'List[Table]'):
+        # Sequences are not advanced by the given keys
+        for table in tables:
+            for column in serial_columns(table):
+                name = self._quote(table.name)
+                col = self._quote(column)
+                self.conn.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', '{column}'), "
+                    f"COALESCE(MAX({col}), 1), MAX({col}) IS NOT NULL) FROM {name}")
+
+
+class MySQLLoadDataWriter(BulkWriter):
+    """
+    Load rows by `LOAD DATA LOCAL INFILE`, which requires `local_infile` of the connection.
+    Duplicated keys and invalid values are only warnings of `LOAD DATA`, so they are raised as `BulkLoadFailed`.
+    """
+
+    def _write(self, table: 'Table', rows: 'List[Dict[str, Any]]'):
+        columns = ", ".join(self._quote(c) for c in rows[0].keys())
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='\n', delete=False) as f:
+            f.writelines(self._lines(rows, true='1', false='0'))
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {self._quote(table.name)} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})",
+                (f.name,))
+            loaded = cursor.rowcount
+            cursor.execute("SHOW WARNINGS")
+            warnings = list(cursor.fetchall())
+            if loaded != len(rows) or len(warnings) > 0:
+                raise BulkLoadFailed(table.name, len(rows), loaded, warnings)
+        finally:
+            cursor.close()
+            os.unlink(f.name)
+
+
+def get_bulk_writer(conn: 'Connection') -> 'BulkWriter':
+    engine_type = EngineType.from_engine(conn.engine)
+    if engine_type == EngineType.POSTGRES:
+        return PostgresCopyWriter(conn)
+    if engine_type == EngineType.MYSQL:
+        return MySQLLoadDataWriter(conn)
+    return BulkWriter(conn)
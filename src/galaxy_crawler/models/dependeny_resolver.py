@@ -1,15 +1,14 @@
 import json
-import time
 from logging import getLogger
 from pathlib import Path
 from typing import TYPE_CHECKING
 from urllib import parse
 
-import requests
-
 from galaxy_crawler.constants import Target
 from galaxy_crawler.models import v1 as models
 from galaxy_crawler.models.utils import get_role_name_from_json
+from galaxy_crawler.ratelimit import RateLimiter
+from galaxy_crawler.transport import Transport
 
 if TYPE_CHECKING:
     from typing import List, Dict, Any, Optional
@@ -38,11 +37,20 @@ class DependencyResolver(object):
     base_headers = {"content-type": "application/json"}
     map_file_name = 'role_id_mapping.json'
 
-    def __init__(self, query_builder: 'QueryBuilder', interval: int = 5):
+    def __init__(self,
+                 query_builder: 'QueryBuilder',
+                 interval: int = 5,
+                 rate_limiter: 'Optional[RateLimiter]' = None,
+                 transport: 'Optional[Transport]' = None):
         self.query_builder = query_builder
         self.query_builder.clear_query()
         self.base_url = self.query_builder.build(Target.ROLES)
         self.interval = interval
+        if transport is None:
+            if rate_limiter is None:
+                rate_limiter = RateLimiter.from_interval(interval)
+            transport = Transport(rate_limiter=rate_limiter)
+        self.transport = transport
         self.mapped_file = None  # type: Optional[Path]
         self.id_mappings = dict()  # type: Dict[str, int]
         self.dependency_mappings = dict()  # type: Dict[int, List[int]]
@@ -126,14 +134,9 @@ class DependencyResolver(object):
 
     def _get_depends(self, role_id: int) -> 'List[Dict[str, Any]]':
         to_access = parse.urljoin(self.base_url, str(role_id))
-        resp = requests.get(to_access, headers=self.base_headers)
+        resp = self.transport.get(to_access, headers=self.base_headers, endpoint=Target.ROLES.value)
         logger.debug(f"Get {resp.status_code}: {to_access}")
         if resp.status_code > 200:
             raise Exception(f"'{to_access}' return {resp.status_code}")
         data = resp.json()
-        self._sleep()
         return data['summary_fields']['dependencies']
-
-    def _sleep(self):
-        logger.debug(f"Wait for {self.interval} sec...")
-        time.sleep(self.interval)
@@ -84,11 +84,11 @@ def get_sqlite_url(path: 'Optional[str]' = None, **kwargs) -> str:
     """
     Get SQLite3 url for creating connection
     :param path: Path to sqlite3 database file
-    :return: sqlite3:///{path}
+    :return: sqlite:///{path}
     """
     _check_params(['path'], locals())
     path = Path(path).expanduser().resolve()
-    return f"sqlite3:///{path}"
+    return f"sqlite:///{path}"
 
 
 def get_in_memory_url(**kwargs) -> str:
@@ -108,7 +108,7 @@ class InvalidUrlError(Exception):
 class EngineType(Enum):
     IN_MEMORY = r'^sqlite://$'
     POSTGRES = r'^postgresql\:\/\/([^\/]+(\:[^\/]+)?@)?[^\/]+\:[0-9]+\/.+$'
-    MYSQL = r'^mysql+pymysql\:\/\/([^\/]+(\:[^\/]+)?@)?[^\/]+\:[0-9]+\/.+$'
+    MYSQL = r'^mysql\+pymysql\:\/\/([^\/]+(\:[^\/]+)?@)?[^\/]+\:[0-9]+\/.+$'
     SQLITE = r'^sqlite\:\/\/\/\/?.+$'
 
     @classmethod
@@ -127,6 +127,20 @@ class EngineType(Enum):
                 return cls[c.name]
         raise InvalidUrlError(url, "not specified")
 
+    @classmethod
+    def from_engine(cls, engine: 'Engine') -> 'EngineType':
+        """Type of the database which the engine connects to"""
+        name = engine.dialect.name
+        if name == 'postgresql':
+            return cls.POSTGRES
+        if name == 'mysql':
+            return cls.MYSQL
+        if name == 'sqlite':
+            if engine.url.database in [None, '', ':memory:']:
+                return cls.IN_MEMORY
+            return cls.SQLITE
+        raise InvalidUrlError(str(engine.url), name)
+
     @classmethod
     def from_env_var(cls, envs: 'Optional[dict]' = None):
         if envs is None:
@@ -157,11 +171,12 @@ class EngineType(Enum):
         reg = re.compile(self.value)
         if url is None:
             return self.get_engine_from_env()
-        if reg.match(url):
-            engine = create_engine(url)
-        else:
+        if not reg.match(url):
             raise InvalidUrlError(url, self.name)
-        return engine
+        if self == EngineType.MYSQL:
+            # Required to load rows by `LOAD DATA LOCAL INFILE`
+            return create_engine(url, connect_args={"local_infile": True})
+        return create_engine(url)
 
     @classmethod
     def choices(cls):
@@ -31,3 +31,17 @@ class JSONParseFailed(Exception):
     def __str__(self) -> str:
         return f"Could not parse json for model '{self.model}'." \
             f"json: {json.dumps(self.json_obj, ensure_ascii=False)}"
+
+
+class BulkLoadFailed(Exception):
+
+    def __init__(self, table: str, expected: int, loaded: int, warnings: 'list' = None):
+        self.table = table
+        self.expected = expected
+        self.loaded = loaded
+        self.warnings = warnings if warnings else []
+
+    def __str__(self) -> str:
+        messages = "; ".join(str(w[-1]) for w in self.warnings)
+        return f"Loaded {self.loaded} of {self.expected} rows into '{self.table}'." \
+            f" warnings: {messages}"
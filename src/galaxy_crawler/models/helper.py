@@ -7,8 +7,10 @@ from galaxy_crawler.models import v1 as models
 
 if TYPE_CHECKING:
     from datetime import datetime
+    from pathlib import Path
     from typing import List, Optional
     from sqlalchemy.engine import Engine
+    from galaxy_crawler.constants import Target
 
 
 def get_roles_df(engine: 'Engine', except_role_types: 'Optional[List[int]]' = None):
@@ -30,6 +32,22 @@ def get_roles_df(engine: 'Engine', except_role_types: 'Optional[List[int]]' = No
     return role_df
 
 
+def get_df_from_parquet(output_dir: 'Path', target: 'Target', columns: 'Optional[List[str]]' = None):
+    """
+    Obtain objects written by `crawl --format parquet` as pandas.DataFrame without loading them into database
+    :param output_dir: Output directory of `crawl`
+    :param target: Target to read
+    :param columns: Columns to read. Other columns are not read from the files.
+    :return: pandas.DataFrame
+    """
+    import pyarrow.parquet as pq
+    parts = sorted((output_dir / target.value).glob('*.parquet'), key=lambda f: int(f.stem.split('_')[-1]))
+    if len(parts) == 0:
+        raise FileNotFoundError(f"{output_dir / target.value}: No parquet files.")
+    dataset = pq.ParquetDataset([str(f) for f in parts])
+    return dataset.read(columns=columns).to_pandas()
+
+
 def filter_roles_df_by_modified_date(roles: 'pd.DataFrame',
                                      from_date: 'datetime',
                                      to_date: 'datetime') -> 'pd.DataFrame':
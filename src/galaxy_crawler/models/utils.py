@@ -3,10 +3,14 @@ from logging import getLogger
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from sqlalchemy import inspect
 from sqlalchemy.orm import sessionmaker, scoped_session
 
+from galaxy_crawler.compression import IOStats, codec_of, strip_codec_suffix
+from galaxy_crawler.utils import shard_index
+
 if TYPE_CHECKING:
-    from typing import List
+    from typing import Iterator, List, Optional
     from sqlalchemy.orm.session import Session
     from .base import ModelInterfaceMixin
 
@@ -22,27 +26,99 @@ def update_params(old, new) -> 'ModelInterfaceMixin':
     return old
 
 
-def concat_json(json_dir: 'Path') -> 'List[dict]':
+def replace_params(old, new, session: 'Session') -> 'ModelInterfaceMixin':
+    """
+    Overwrite columns and relationships of the existing object by the new one.
+    The new object is detached from the related objects and the session.
+    """
+    mapper = inspect(old.__class__)
+    for column in mapper.column_attrs:
+        if column.key in new.__dict__:
+            setattr(old, column.key, new.__dict__[column.key])
+    for rel in mapper.relationships:
+        if rel.key not in new.__dict__:
+            continue
+        value = new.__dict__[rel.key]
+        if rel.uselist:
+            value = list(value)
+            setattr(new, rel.key, [])
+        else:
+            setattr(new, rel.key, None)
+        setattr(old, rel.key, value)
+    if new in session:
+        session.expunge(new)
+    return old
+
+
+def _iter_json_lines(path: 'Path', stats: 'IOStats') -> 'Iterator[dict]':
+    read = 0
+    with codec_of(path).open(path) as fp:
+        try:
+            for i, line in enumerate(fp):
+                read += len(line)
+                try:
+                    yield json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # The last line may be broken if the crawler was killed while writing
+                    logger.warning(f"{path}:{i + 1}: Skip broken line.")
+        except EOFError:
+            logger.warning(f"{path}: Compressed stream is truncated.")
+    stats.add(path.stat().st_size, read)
+
+
+def _iter_json_file(path: 'Path', stats: 'IOStats') -> 'Iterator[dict]':
+    with codec_of(path).open(path) as fp:
+        data = fp.read()
+    stats.add(path.stat().st_size, len(data))
+    body = json.loads(data.decode('utf-8'))['json']
+    for j in body:
+        # Flatten nested lists
+        if isinstance(j, list):
+            yield from j
+        else:
+            yield j
+
+
+def _list_files(json_dir: 'Path', suffix: str) -> 'List[Path]':
+    files = [f for f in json_dir.glob('*') if strip_codec_suffix(f.name).endswith(suffix)]
+    # Sort files by its index
+    return sorted(files, key=shard_index)
+
+
+def iter_json(json_dir: 'Path', stats: 'Optional[IOStats]' = None) -> 'Iterator[dict]':
+    """
+    Read objects from the files in the directory one by one.
+    JSON Lines shards are read if exist, otherwise JSON files are read.
+    Compressed files are decompressed, and the bytes read and decompressed are added to `stats`.
+    """
     if not json_dir.exists():
         raise FileNotFoundError(f"{json_dir}: No such directory.")
-    json_set = []
-    for j in json_dir.glob('*.json'):
-        with j.open('r') as fp:
-            body = json.load(fp)['json']
-        idx = int(j.stem.split('_')[-1])
-        tmp = []
-        for j in body:
-            if isinstance(j, list):
-                for _j in j:
-                    tmp.append(_j)
-            else:
-                tmp.append(j)
-        json_set.append((idx, tmp))
-    # Sort json by its file name
-    json_set.sort(key=lambda x: x[0])
-    json_set = [j[1] for j in json_set]
-    # Flatten nested lists
-    return sum(json_set, [])
+    if stats is None:
+        stats = IOStats()
+    shards = _list_files(json_dir, '.jsonl')
+    if len(shards) > 0:
+        for shard in shards:
+            yield from _iter_json_lines(shard, stats)
+        return
+    for f in _list_files(json_dir, '.json'):
+        yield from _iter_json_file(f, stats)
+
+
+class JsonStream(object):
+    """Objects in a directory which are read again on each iteration"""
+
+    def __init__(self, json_dir: 'Path'):
+        self.json_dir = json_dir
+        # Bytes read by the last iteration
+        self.stats = IOStats()
+
+    def __iter__(self) -> 'Iterator[dict]':
+        self.stats = IOStats()
+        return iter_json(self.json_dir, self.stats)
+
+
+def concat_json(json_dir: 'Path') -> 'List[dict]':
+    return list(iter_json(json_dir))
 
 
 def get_role_name_from_json(j: 'dict') -> str:
@@ -5,20 +5,23 @@ from typing import TYPE_CHECKING
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DateTime
+from sqlalchemy import Float
 from sqlalchemy import ForeignKey
 from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy import UniqueConstraint
+from sqlalchemy import inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
+from galaxy_crawler.models import utils
 from galaxy_crawler.models.base import LicenseType, ModelInterfaceMixin, RoleTypeEnum
 from galaxy_crawler.models.errors import JSONParseFailed
 from galaxy_crawler.utils import to_datetime
 
 if TYPE_CHECKING:
-    from typing import List, Dict, Any, Union
+    from typing import List, Dict, Any, Optional, Tuple, Union
     from sqlalchemy.orm.session import Session
 
 logger = getLogger(__name__)
@@ -47,6 +50,90 @@ def parse_json(keys: 'List[str]', json_obj: 'dict', model_name: 'str') -> 'dict'
     return parsed
 
 
+class LookupCache(object):
+    """
+    Objects referred to by `from_json` during a load, which are found in memory instead of by queries.
+    It is attached to the session, and `from_json` queries the database if no cache is attached.
+    """
+
+    _key = 'lookup_cache'
+
+    def __init__(self):
+        self.tags = dict()  # type: Dict[str, Tag]
+        self.platforms = dict()  # type: Dict[Tuple[str, str], Platform]
+        self.licenses = dict()  # type: Dict[str, License]
+        self.role_types = dict()  # type: Dict[str, RoleType]
+        self.versions = dict()  # type: Dict[int, RepositoryVersion]
+
+    @classmethod
+    def preload(cls, session: 'Session') -> 'LookupCache':
+        """Read the stored objects by a query for each kind, and attach the cache to the session"""
+        cache = cls()
+        for model, pk in [(Tag, Tag.tag_id), (Platform, Platform.platform_id), (License, License.license_id),
+                          (RoleType, RoleType.role_type_id), (RepositoryVersion, RepositoryVersion.version_id)]:
+            # Ordered by the key so that the first one is found as `Platform.get_by_name` does
+            for obj in session.query(model).order_by(pk):
+                cache.add(obj)
+        cache.attach(session)
+        return cache
+
+    @classmethod
+    def preload_for_roles(cls, json_objs: 'List[dict]', session: 'Session') -> 'LookupCache':
+        """Read the objects referred to by the roles by an `IN` query for each kind, and attach the cache"""
+        cache = cls()
+        summaries = [j['summary_fields'] for j in json_objs]
+        license_names = set()
+        for j in json_objs:
+            licenses = LicenseType.normalize(j['license'])
+            license_names.update([l.name for l in licenses] if len(licenses) > 0 else [j['license']])
+        queries = [
+            session.query(Tag).filter(Tag.name.in_({t for s in summaries for t in s['tags']})),
+            session.query(Platform)
+                .filter(Platform.name.in_({p['name'] for s in summaries for p in s['platforms']}))
+                .order_by(Platform.platform_id),
+            session.query(License).filter(License.name.in_(license_names)),
+            # A few types at most
+            session.query(RoleType),
+            session.query(RepositoryVersion)
+                .filter(RepositoryVersion.version_id.in_({v['id'] for s in summaries for v in s['versions']})),
+        ]
+        for query in queries:
+            for obj in query:
+                cache.add(obj)
+        cache.attach(session)
+        return cache
+
+    def attach(self, session: 'Session'):
+        session.info[self._key] = self
+
+    @classmethod
+    def of(cls, session: 'Session') -> 'Optional[LookupCache]':
+        return session.info.get(cls._key)
+
+    @classmethod
+    def detach(cls, session: 'Session'):
+        session.info.pop(cls._key, None)
+
+    def discard_unsaved(self):
+        """Forget the objects which were not saved, after the session was rolled back"""
+        for objs in [self.tags, self.platforms, self.licenses, self.role_types, self.versions]:
+            for key in [k for k, o in objs.items() if not inspect(o).persistent]:
+                del objs[key]
+
+    def add(self, obj: 'Any'):
+        """Make the object found by the later lookups. The first one is kept for each key."""
+        if isinstance(obj, Tag):
+            self.tags.setdefault(obj.name, obj)
+        elif isinstance(obj, Platform):
+            self.platforms.setdefault((obj.name, obj.release), obj)
+        elif isinstance(obj, License):
+            self.licenses.setdefault(obj.name, obj)
+        elif isinstance(obj, RoleType):
+            self.role_types.setdefault(obj.name, obj)
+        elif isinstance(obj, RepositoryVersion):
+            self.versions.setdefault(obj.version_id, obj)
+
+
 class TagAssociation(BaseModel):
     __tablename__ = "tags_association"
     tag_id = Column(Integer,
@@ -72,23 +159,31 @@ class Tag(BaseModel, ModelInterfaceMixin):
     modified = Column(DateTime)  # type: datetime
 
     _pk = 'tag_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'active',
+        'created',
+        'modified'
+    ]
+
+    @classmethod
+    def to_row(cls, json_obj: 'Dict[Any, Any]') -> 'dict':
+        return parse_json(cls._json_fields, json_obj, 'Tag')
 
     @classmethod
     def from_json(cls, json_obj: 'Dict[Any, Any]', session: 'Session') -> 'Tag':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'active',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Tag')
-        tag = Tag(**parsed)
+        tag = Tag(**cls.to_row(json_obj))
         return tag
 
     @classmethod
     def find_by_name(cls, name: 'Union[str, List[str]]', session: 'Session'):
+        cache = LookupCache.of(session)
+        if cache is not None:
+            if isinstance(name, list):
+                return [cache.tags[n] for n in name if n in cache.tags]
+            return cache.tags.get(name)
         if isinstance(name, list):
             results = session.query(cls) \
                 .filter(cls.name.in_(name)).all()
@@ -125,25 +220,20 @@ class License(BaseModel, ModelInterfaceMixin):
         license_str = json_obj['license']
         licenses = LicenseType.normalize(license_str)
         if len(licenses) == 0:
-            exists = session.query(cls).filter_by(name=license_str).one_or_none()
-            if exists is None:
-                other_license = License(
-                    name=license_str,
-                    description='Other type license (could not categorize)'
-                )
-                records = [other_license]
-            else:
-                records = [exists]
-        else:
-            records = []
-            for l in licenses:
-                exists = session.query(cls).filter_by(name=l.name).one_or_none()
-                if exists is None:
-                    new_license = License(name=l.name, description=l.description)
-                    records.append(new_license)
-                else:
-                    records.append(exists)
-        return records
+            return [cls.get_or_create(license_str, 'Other type license (could not categorize)', session)]
+        return [cls.get_or_create(l.name, l.description, session) for l in licenses]
+
+    @classmethod
+    def get_or_create(cls, name: str, description: str, session: 'Session') -> 'License':
+        cache = LookupCache.of(session)
+        if cache is not None:
+            if name not in cache.licenses:
+                cache.add(License(name=name, description=description))
+            return cache.licenses[name]
+        exists = session.query(cls).filter_by(name=name).one_or_none()
+        if exists is None:
+            return License(name=name, description=description)
+        return exists
 
 
 class PlatformStatus(BaseModel):
@@ -167,25 +257,30 @@ class Platform(BaseModel, ModelInterfaceMixin):
                          back_populates="platforms")
 
     _pk = 'platform_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'release',
+        'active',
+        'created',
+        'modified'
+    ]
+
+    @classmethod
+    def to_row(cls, json_obj: 'dict') -> 'dict':
+        return parse_json(cls._json_fields, json_obj, 'Platform')
 
     @classmethod
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'Platform':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'release',
-                'active',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Platform'
-        )
-        platform = Platform(**parsed)
+        platform = Platform(**cls.to_row(json_obj))
         return platform
 
     @classmethod
     def get_by_name(cls, name: str, release: str, session: 'Session') -> 'Platform':
+        cache = LookupCache.of(session)
+        if cache is not None:
+            return cache.platforms.get((name, release))
         return session.query(cls) \
             .filter(cls.name == name) \
             .filter(cls.release == release) \
@@ -206,21 +301,23 @@ class Provider(BaseModel, ModelInterfaceMixin):
                                        cascade="all, delete-orphan")
 
     _pk = 'provider_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'description',
+        'active',
+        'created',
+        'modified'
+    ]
+
+    @classmethod
+    def to_row(cls, json_obj: 'dict') -> 'dict':
+        return parse_json(cls._json_fields, json_obj, 'Provider')
 
     @classmethod
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'Provider':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'description',
-                'active',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Provider'
-        )
-        provider = Provider(**parsed)
+        provider = Provider(**cls.to_row(json_obj))
         return provider
 
 
@@ -247,25 +344,27 @@ class Namespace(BaseModel, ModelInterfaceMixin):
                          cascade="all, delete-orphan")
 
     _pk = 'namespace_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'company',
+        'email',
+        'location',
+        'avatar_url',
+        'html_url',
+        'is_vendor',
+        'created',
+        'modified'
+    ]
+
+    @classmethod
+    def to_row(cls, json_obj: 'dict') -> 'dict':
+        return parse_json(cls._json_fields, json_obj, 'Namespace')
 
     @classmethod
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'Namespace':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'company',
-                'email',
-                'location',
-                'avatar_url',
-                'html_url',
-                'is_vendor',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Namespace'
-        )
-        ns = Namespace(**parsed)
+        ns = Namespace(**cls.to_row(json_obj))
         return ns
 
 
@@ -301,35 +400,38 @@ class ProviderNamespace(BaseModel, ModelInterfaceMixin):
 
     is_active = Column(Boolean, nullable=True)
     _pk = 'provider_namespace_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'email',
+        'display_name',
+        'company',
+        'location',
+        'avatar_url',
+        'html_url',
+        'created',
+        {'key': 'followers_count', 'target': 'followers'},
+        {'key': 'is_active', 'target': 'active'},
+        'modified'
+    ]
 
     @classmethod
-    def from_json(cls, json_obj: 'dict', session: 'Session') -> 'ProviderNamespace':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'email',
-                'display_name',
-                'company',
-                'location',
-                'avatar_url',
-                'html_url',
-                'created',
-                {'key': 'followers_count', 'target': 'followers'},
-                {'key': 'is_active', 'target': 'active'},
-                'modified'
-            ],
-            json_obj, 'ProviderNamespace'
-        )
+    def to_row(cls, json_obj: 'dict') -> 'dict':
+        parsed = parse_json(cls._json_fields, json_obj, 'ProviderNamespace')
         try:
-            provider_id = json_obj['summary_fields']['provider']['id']
+            parsed['provider_id'] = json_obj['summary_fields']['provider']['id']
         except KeyError:
-            provider_id = None
+            parsed['provider_id'] = None
         try:
-            namespace_id = json_obj['summary_fields']['namespace']['id']
+            parsed['namespace_id'] = json_obj['summary_fields']['namespace']['id']
         except KeyError:
-            namespace_id = None
-        provider_ns = ProviderNamespace(**parsed, provider_id=provider_id, namespace_id=namespace_id)
+            parsed['namespace_id'] = None
+        return parsed
+
+    @classmethod
+    def from_json(cls, json_obj: 'dict', session: 'Session') -> 'ProviderNamespace':
+        provider_ns = ProviderNamespace(**cls.to_row(json_obj))
         return provider_ns
 
 
@@ -360,9 +462,10 @@ class Repository(BaseModel, ModelInterfaceMixin):
     watchers_count = Column(Integer)
     forks_count = Column(Integer)
     open_issues_count = Column(Integer)
-    community_score = Column(Integer, nullable=True)
+    # Averages of the surveys and the lint results, which are fractional
+    community_score = Column(Float, nullable=True)
     community_survey_count = Column(Integer, nullable=True)
-    quality_score = Column(Integer, nullable=True)
+    quality_score = Column(Float, nullable=True)
     quality_score_date = Column(DateTime, nullable=True)
 
     deprecated = Column(Boolean)
@@ -379,45 +482,61 @@ class Repository(BaseModel, ModelInterfaceMixin):
                             back_populates="repository")  # type: RepositoryVersion
 
     _pk = 'repository_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'readme',
+        'readme_html',
+        'clone_url',
+        'issue_tracker_url',
+        'external_url',
+        'commit',
+        'commit_url',
+        'commit_message',
+        'commit_created',
+        'travis_build_url',
+        'travis_status_url',
+        'stargazers_count',
+        'watchers_count',
+        'forks_count',
+        'open_issues_count',
+        'community_score',
+        'community_survey_count',
+        'quality_score',
+        'quality_score_date',
+        'deprecated',
+        'created',
+        'modified'
+    ]
 
     @classmethod
-    def from_json(cls, json_obj: 'dict', session: 'Session') -> 'Repository':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'readme',
-                'readme_html',
-                'clone_url',
-                'issue_tracker_url',
-                'external_url',
-                'commit',
-                'commit_url',
-                'commit_message',
-                'commit_created',
-                'travis_build_url',
-                'travis_status_url',
-                'stargazers_count',
-                'watchers_count',
-                'forks_count',
-                'open_issues_count',
-                'community_score',
-                'community_survey_count',
-                'quality_score',
-                'quality_score_date',
-                'deprecated',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Repository'
-        )
+    def to_row(cls, json_obj: 'dict') -> 'dict':
+        parsed = parse_json(cls._json_fields, json_obj, 'Repository')
         parsed['commit_created'] = to_datetime(parsed['commit_created'])
         parsed['quality_score_date'] = to_datetime(parsed['quality_score_date'])
-        provider_namespace_id = json_obj['summary_fields']['provider_namespace']['id']
-        pn = ProviderNamespace.get_by_pk(provider_namespace_id, session)
+        parsed['provider_namespace_id'] = json_obj['summary_fields']['provider_namespace']['id']
+        return parsed
+
+    @classmethod
+    def from_json(cls, json_obj: 'dict', session: 'Session') -> 'Repository':
+        parsed = cls.to_row(json_obj)
+        pn = ProviderNamespace.get_by_pk(parsed.pop('provider_namespace_id'), session)
         repo = Repository(**parsed, provider_namespace=pn)
         return repo
 
+    @classmethod
+    def from_json_many(cls, json_objs: 'List[dict]', session: 'Session') -> 'List[Repository]':
+        rows = [cls.to_row(j) for j in json_objs]
+        pn_ids = {r['provider_namespace_id'] for r in rows}
+        pns = {pn.provider_namespace_id: pn for pn in
+               session.query(ProviderNamespace).filter(ProviderNamespace.provider_namespace_id.in_(pn_ids))}
+        repos = []
+        for parsed in rows:
+            pn = pns.get(parsed.pop('provider_namespace_id'))
+            repos.append(Repository(**parsed, provider_namespace=pn))
+        return repos
+
 
 class RoleType(BaseModel):
     __tablename__ = 'role_types'
@@ -432,12 +551,18 @@ class RoleType(BaseModel):
             role_type_enum = RoleTypeEnum.ANS
         else:
             role_type_enum = RoleTypeEnum[name.upper()]
-        exists = session.query(cls) \
-            .filter(cls.name == role_type_enum.name) \
-            .one_or_none()
+        cache = LookupCache.of(session)
+        if cache is not None:
+            exists = cache.role_types.get(role_type_enum.name)
+        else:
+            exists = session.query(cls) \
+                .filter(cls.name == role_type_enum.name) \
+                .one_or_none()
         if exists is None:
             role_type = RoleType(name=role_type_enum.name,
                                  description=role_type_enum.description())
+            if cache is not None:
+                cache.add(role_type)
             return role_type
         return exists
 
@@ -470,6 +595,16 @@ class RepositoryVersion(BaseModel, ModelInterfaceMixin):
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'ModelInterfaceMixin':
         pass
 
+    def update_or_create(self, session: 'Session') -> 'RepositoryVersion':
+        cache = LookupCache.of(session)
+        if cache is None:
+            return super(RepositoryVersion, self).update_or_create(session)
+        exists = cache.versions.get(self.version_id)
+        if exists is None:
+            cache.add(self)
+            return self
+        return utils.update_params(exists, self)
+
 
 class RoleDependency(BaseModel):
     __tablename__ = "role_dependencies"
@@ -532,22 +667,21 @@ class Role(BaseModel, ModelInterfaceMixin):
                             cascade='all')
 
     _pk = 'role_id'
+    # Fields of the JSON object stored in the columns
+    _json_fields = [
+        {'key': _pk, 'target': 'id'},
+        'name',
+        'description',
+        'role_type',
+        'min_ansible_version',
+        'download_count',
+        'created',
+        'modified'
+    ]
 
     @classmethod
     def from_json(cls, json_obj: 'dict', session: 'Session') -> 'ModelInterfaceMixin':
-        parsed = parse_json(
-            [
-                {'key': cls._pk, 'target': 'id'},
-                'name',
-                'description',
-                'role_type',
-                'min_ansible_version',
-                'download_count',
-                'created',
-                'modified'
-            ],
-            json_obj, 'Role'
-        )
+        parsed = parse_json(cls._json_fields, json_obj, 'Role')
         summary = json_obj['summary_fields']
         namespace_id = summary['namespace']['id']
         repository_id = summary['repository']['id']
@@ -576,6 +710,17 @@ class Role(BaseModel, ModelInterfaceMixin):
             role.versions.append(version)
         return role
 
+    @classmethod
+    def from_json_many(cls, json_objs: 'List[dict]', session: 'Session') -> 'List[Role]':
+        if LookupCache.of(session) is not None:
+            return super(Role, cls).from_json_many(json_objs, session)
+        # Cache of the page, which is consulted by `from_json` instead of the queries for each role
+        LookupCache.preload_for_roles(json_objs, session)
+        try:
+            return super(Role, cls).from_json_many(json_objs, session)
+        finally:
+            LookupCache.detach(session)
+
     @classmethod
     def resolve_dependencies(cls, json_obj: 'dict', session: 'Session') -> 'bool':
         from_id = json_obj['id']
@@ -1,73 +1,116 @@
+from queue import Empty
 from threading import Thread
-from queue import Queue, Empty
 from logging import getLogger
 from typing import TYPE_CHECKING
 
 from galaxy_crawler.constants import Target
+from galaxy_crawler.filters import CompiledFilter
+from galaxy_crawler.response_queue import QueueClosed
+from galaxy_crawler.seen import SeenIds
+from galaxy_crawler.writer import Batch, CommitPolicy, CommitWorker
 
 if TYPE_CHECKING:
     from typing import List, Optional
+    from pathlib import Path
+    from galaxy_crawler.checkpoint import Checkpoint
     from galaxy_crawler.crawl import Response
     from galaxy_crawler.filters import Filter
     from galaxy_crawler.repositories import ResponseDataStore
+    from galaxy_crawler.response_queue import ResponseQueue
+    from galaxy_crawler.watermark import Watermarks
 
 logger = getLogger(__name__)
 
 
 class ResponseParser(Thread):
 
-    def __init__(self, json_queue: 'Queue', data_stores: 'List[ResponseDataStore]', filters: 'List[Filter]'):
+    def __init__(self,
+                 json_queue: 'ResponseQueue',
+                 data_stores: 'List[ResponseDataStore]',
+                 filters: 'List[Filter]',
+                 checkpoint: 'Optional[Checkpoint]' = None,
+                 policy: 'Optional[CommitPolicy]' = None,
+                 gap_report: 'Optional[Path]' = None,
+                 watermarks: 'Optional[Watermarks]' = None):
         super(ResponseParser, self).__init__()
         self.json_q = json_queue
         self.data_stores = data_stores
         self.filters = filters
+        # Compiled once for each target and evaluated for each page.
+        # The crawler stops the pagination when the rest of the target cannot pass.
+        self.filter = CompiledFilter(filters)
+        self.checkpoint = checkpoint
+        self.policy = policy or CommitPolicy(records=500)
+        self.gap_report = gap_report
+        # Objects obtained again due to the items shifted between pages are dropped
+        seen = checkpoint.seen if checkpoint is not None else None
+        self.seen = SeenIds.from_dict(seen)
+        self.duplicates = 0
+        self.writer = CommitWorker(data_stores, checkpoint, SeenIds.from_dict(seen), watermarks)
+        # Whether any response could not be parsed or saved
+        self.failed = False
         self._stop_signal = False
-        self._save_trial = 0
+        # Items and positions of the responses which are not handed to the writer yet
+        self._batch = Batch()
 
     def run(self) -> None:
+        self.writer.start()
         while not self._stop_signal:
             try:
-                response = self.json_q.get(timeout=3)  # type: Optional[Response]
+                # Waits no longer than the batch is due so that it is committed while the crawler is stalled
+                response = self.json_q.get(timeout=self.policy.remaining(self._batch))  # type: Response
             except Empty:
-                logger.debug("Wait for next response...")
+                self.save()
                 continue
-            json_obj = response.response
-            if json_obj is None:
+            except QueueClosed:
                 logger.info("Scraping finished")
-                self.json_q.task_done()
-                self.send_stop_signal()
                 break
+            json_obj = response.response
             results = json_obj.get('results')
             if results is None:
                 logger.critical("Failed to parse response. Returned json has no results.")
+                self.failed = True
                 self.send_stop_signal()
                 break
-            self.add_items(response.target, results)
+            self.add_items(response.target, results, response.size)
+            if response.state is not None:
+                self._batch.set_position(response.target, response.state)
             self.save()
             self.json_q.task_done()
-        self.save()
-        logger.info("Parser finished")
+        self.save(force=True)
+        # Barrier to wait until all items are written
+        if not self.writer.close():
+            logger.critical("Some items could not be saved.")
+            self.failed = True
+        logger.info(f"Parser finished: {self.json_q.stats()}, {self.writer.stats()}, "
+                    f"{self.duplicates} duplicates were dropped")
+        if self.gap_report is not None:
+            self.seen.write_report(self.gap_report)
 
-    def add_items(self, target: 'Target', items: 'dict'):
+    def add_items(self, target: 'Target', items: 'dict', size: int = 0):
         logger.info(f"{len(items)} items were found.")
-        to_save = []
-        for item in items:
-            # Filtering objects
-            if len(self.filters) > 0:
-                if not all([f.passed(target, item) for f in self.filters]):
-                    self.send_stop_signal()
-                    break
-            to_save.append(item)
-        for store in self.data_stores:
-            store.save(target, to_save)
+        to_save = self.filter.filter(target, items)
+        if len(to_save) < len(items):
+            logger.info(f"{len(items) - len(to_save)} items did not pass the filters.")
+        unique = self.seen.filter(target, to_save)
+        if len(unique) < len(to_save):
+            logger.info(f"{len(to_save) - len(unique)} items were already obtained.")
+            self.duplicates += len(to_save) - len(unique)
+        self._batch.add(target, unique, size)
 
-    def save(self):
-        self._save_trial += 1
-        if self._save_trial % 5 == 0:
-            logger.info("Saving obtained items information...")
-            for store in self.data_stores:
-                store.commit()
+    def save(self, force: bool = False):
+        """Hand the batch to the writer if the policy requires, and start the next one"""
+        if len(self._batch) == 0 or not (force or self.policy.is_due(self._batch)):
+            return
+        logger.info(f"Saving {self._batch.records} obtained items...")
+        if not self.writer.submit(self._batch):
+            logger.critical("Failed to save items. Stop parsing.")
+            self.failed = True
+            self.send_stop_signal()
+        self._batch = Batch()
 
     def send_stop_signal(self):
         self._stop_signal = True
+        # Wake up the parser waiting for responses and the crawler waiting for space
+        self.json_q.close()
 
@@ -0,0 +1,109 @@
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.constants import Target
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List
+
+# Fields which are always kept since the crawler and the parser rely on them
+REQUIRED_FIELDS = ['id', 'modified']
+
+
+def _tree(paths: 'List[str]') -> 'Dict[str, Any]':
+    """Nested dict of the dotted paths. An empty dict means the whole value."""
+    tree = dict()  # type: Dict[str, Any]
+    # Shorter paths come first so that the whole value takes precedence over its fields
+    for path in sorted(paths, key=lambda p: p.count('.')):
+        node = tree
+        keys = path.split('.')
+        for key in keys[:-1]:
+            if key in node and len(node[key]) == 0:
+                break
+            node = node.setdefault(key, dict())
+        else:
+            node[keys[-1]] = dict()
+    return tree
+
+
+def _exclude(obj: 'Any', tree: 'Dict[str, Any]'):
+    if isinstance(obj, list):
+        for o in obj:
+            _exclude(o, tree)
+        return
+    if not isinstance(obj, dict):
+        return
+    for key, sub in tree.items():
+        if key not in obj:
+            continue
+        if len(sub) > 0:
+            _exclude(obj[key], sub)
+        else:
+            # Keep the key so that the object has the same fields
+            obj[key] = None
+
+
+def _include(obj: 'Any', tree: 'Dict[str, Any]') -> 'Any':
+    if isinstance(obj, list):
+        return [_include(o, tree) for o in obj]
+    if not isinstance(obj, dict):
+        return obj
+    return {key: _include(obj[key], sub) if len(sub) > 0 else obj[key] for key, sub in tree.items() if key in obj}
+
+
+class Projection(object):
+    """
+    Fields of the objects to keep or to drop for each target.
+    Dropped fields are set to null, and the others are removed if fields to keep are specified.
+    `required` fields of each target, such as the ones read by the filters, are kept as `REQUIRED_FIELDS` are.
+    """
+
+    def __init__(self,
+                 includes: 'Dict[Target, List[str]]' = None,
+                 excludes: 'Dict[Target, List[str]]' = None,
+                 required: 'Dict[Target, List[str]]' = None):
+        required = required or {}
+        self.includes = {t: _tree(REQUIRED_FIELDS + required.get(t, []) + paths)
+                         for t, paths in (includes or {}).items()}
+        self.excludes = {t: _tree(paths) for t, paths in (excludes or {}).items()}
+        for target, tree in self.excludes.items():
+            for field in REQUIRED_FIELDS + required.get(target, []):
+                if field in tree and len(tree[field]) == 0:
+                    raise ValueError(f"'{field}' of {target.value} cannot be dropped")
+
+    @classmethod
+    def parse(cls, expressions: 'List[str]', required: 'Dict[Target, List[str]]' = None) -> 'Projection':
+        """
+        Parse expressions such as `repositories=-readme,-readme_html` or `tags=name,active`.
+        Fields prefixed with `-` are dropped, and otherwise only the given fields are kept.
+        Nested fields are specified by dotted paths such as `roles=-summary_fields.versions`.
+        """
+        includes = dict()  # type: Dict[Target, List[str]]
+        excludes = dict()  # type: Dict[Target, List[str]]
+        for expr in expressions:
+            name, sep, fields_str = expr.partition('=')
+            try:
+                target = Target(name.strip())
+            except ValueError:
+                raise ValueError(f"Unknown target '{name}' in '{expr}'")
+            fields = [f.strip() for f in fields_str.split(',') if f.strip() != '']
+            if sep == '' or len(fields) == 0:
+                raise ValueError(f"No fields are specified in '{expr}'")
+            dropped = [f[1:] for f in fields if f.startswith('-')]
+            kept = [f for f in fields if not f.startswith('-')]
+            if len(dropped) > 0:
+                excludes.setdefault(target, []).extend(dropped)
+            if len(kept) > 0:
+                includes.setdefault(target, []).extend(kept)
+            if target in includes and target in excludes:
+                raise ValueError(f"Fields of {target.value} cannot be both kept and dropped")
+        return cls(includes, excludes, required)
+
+    def __bool__(self) -> bool:
+        return len(self.includes) + len(self.excludes) > 0
+
+    def apply(self, target: 'Target', items: 'List[Dict[str, Any]]') -> 'List[Dict[str, Any]]':
+        if target in self.includes:
+            return _include(items, self.includes[target])
+        if target in self.excludes:
+            _exclude(items, self.excludes[target])
+        return items
@@ -3,7 +3,8 @@ from enum import Enum
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Any, List, Tuple
+    from galaxy_crawler.filters import Filter
     from galaxy_crawler.constants import Target
 
 
@@ -29,6 +30,14 @@ class QueryBuilder(metaclass=ABCMeta):
     def set_page(self, page: 'Tuple[int, int]') -> 'QueryBuilder':
         raise NotImplementedError
 
+    @abstractmethod
+    def add_query(self, key: str, value: 'Any') -> 'QueryBuilder':
+        raise NotImplementedError
+
+    @abstractmethod
+    def filter_by(self, filters: 'List[Filter]') -> 'QueryBuilder':
+        raise NotImplementedError
+
     @abstractmethod
     def build(self, target: 'Target') -> str:
         raise NotImplementedError
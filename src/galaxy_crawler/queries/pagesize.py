@@ -0,0 +1,121 @@
+from collections import deque
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = getLogger(__name__)
+
+
+def aligned_size(position: int, size: int) -> int:
+    """
+    The largest page size whose page starts at `position` and does not go past the next multiple of `size`.
+    Pages off the alignment fill the gap, and the pages of `size` follow once the position reaches it.
+    """
+    gap = -position % size
+    if gap == 0:
+        return size
+    for s in range(gap, 1, -1):
+        if position % s == 0:
+            return s
+    return 1
+
+
+class PageSizeController(object):
+    """
+    Adjust the page size by additive increase and multiplicative decrease.
+    After an error, the failed range is bisected until the broken object is isolated.
+    """
+
+    def __init__(self,
+                 max_size: int = 100,
+                 min_size: int = 1,
+                 step: int = 10,
+                 target_latency: float = 10.0,
+                 history_size: int = 100):
+        assert 0 < min_size <= max_size, "Page size must satisfy 0 < min_size <= max_size."
+        self.max_size = max_size
+        self.min_size = min_size
+        self.step = step
+        self.target_latency = target_latency
+        self.size = max_size
+        # Sizes below the threshold are doubled to recover quickly
+        self.threshold = max_size
+        # Number of objects which may contain the broken one
+        self.suspect = 0
+        self.requests = 0
+        self.errors = 0
+        # Changes of the page size and their reasons
+        self.history = deque(maxlen=history_size)  # type: Deque[Tuple[int, str]]
+
+    def _resize(self, size: int, reason: str):
+        size = max(self.min_size, min(self.max_size, size))
+        if size == self.size:
+            return
+        logger.info(f"Page size {self.size} -> {size}: {reason}")
+        self.size = size
+        self.history.append((size, reason))
+
+    def succeeded(self, n_items: int, elapsed: 'Optional[float]' = None):
+        self.requests += 1
+        if self.suspect > 0:
+            self.suspect -= n_items
+            if self.suspect > 0:
+                # The rest of the failed range has not been examined yet
+                return
+        if elapsed is not None and elapsed > self.target_latency:
+            self._resize(self.size // 2, f"slow response ({elapsed:.2f} sec)")
+            self.threshold = self.size
+            return
+        if self.size < self.threshold:
+            self._resize(min(self.size * 2, self.threshold), "recover")
+        else:
+            self._resize(self.size + self.step, "increase")
+
+    def failed(self) -> bool:
+        """
+        Shrink the page size to bisect the failed range
+        :return: False if the page size cannot be shrunk anymore
+        """
+        self.requests += 1
+        self.errors += 1
+        if self.size <= self.min_size:
+            return False
+        if self.suspect <= 0:
+            self.suspect = self.size
+        self._resize(self.size // 2, "error")
+        return True
+
+    def skipped(self):
+        """The broken object was isolated and skipped. The following objects are obtained by full pages again."""
+        self.suspect = 0
+        self.history.append((self.size, "skip"))
+        self._resize(self.threshold, "recover after skip")
+
+    @property
+    def error_rate(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.errors / self.requests
+
+    def summary(self) -> str:
+        trajectory = " -> ".join(str(size) for size, _ in self.history)
+        return f"{self.requests} requests, error rate {self.error_rate:.2%}, " \
+            f"page size {self.max_size}{' -> ' + trajectory if trajectory else ''}"
+
+    def to_dict(self) -> 'Dict[str, Any]':
+        return {
+            "max_size": self.max_size,
+            "size": self.size,
+            "threshold": self.threshold,
+            "suspect": self.suspect,
+        }
+
+    @classmethod
+    def from_dict(cls, state: 'Dict[str, Any]') -> 'PageSizeController':
+        controller = cls(state['max_size'])
+        controller.size = state['size']
+        controller.threshold = state['threshold']
+        controller.suspect = state['suspect']
+        return controller
@@ -1,16 +1,32 @@
 import copy
+from logging import getLogger
 from typing import TYPE_CHECKING
 from urllib import parse
 
 from galaxy_crawler.constants import Target
+from galaxy_crawler.filters.base import to_query
 from .base import QueryBuilder, QueryOrder
+from .pagesize import PageSizeController, aligned_size
 
 if TYPE_CHECKING:
-    from typing import Dict, Any, Optional, Tuple
+    from datetime import datetime
+    from typing import Dict, Any, List, Optional, Tuple, Union
+    from galaxy_crawler.filters import Filter
+
+logger = getLogger(__name__)
 
 API_BASE_URL = 'https://galaxy.ansible.com/api/v1'
 
 
+def extract_page_size(url_str: str) -> int:
+    parsed_url = parse.urlparse(url_str)
+    parsed_query = parse.parse_qs(parsed_url.query)
+    page_sizes = parsed_query.get('page_size')
+    if page_sizes is None:
+        raise AttributeError("page_size is not in the query.")
+    return int(page_sizes[0])
+
+
 class V1QueryOrder(QueryOrder):
     DOWNLOAD = "download_count"
     STAR = "stargazers_count"
@@ -19,10 +35,11 @@ class V1QueryOrder(QueryOrder):
     CONTRIBUTOR_NAME = "namespace__name"
     FORK = "forks_count"
     WATCHER = "watchers_count"
+    MODIFIED = "modified"
 
     def by_target(self, target) -> str:
         if target == Target.ROLES:
-            if self.value in [self.NAME, self.CONTRIBUTOR_NAME, self.ID]:
+            if self in [self.NAME, self.CONTRIBUTOR_NAME, self.ID, self.MODIFIED]:
                 return self.value
             return "repository__" + self.value
         return self.value
@@ -50,13 +67,16 @@ class V1QueryBuilder(QueryBuilder):
         "page_size": 100
     }
 
-    def __init__(self, page_size: int = None):
-        self._queries = self.default_queries  # type: Dict[Any]
+    def __init__(self, page_size: int = None, base_url: str = API_BASE_URL):
+        self.base_url = base_url
+        self._queries = copy.deepcopy(self.default_queries)  # type: Dict[Any]
         if page_size is not None:
             self._queries['page_size'] = page_size
         self._default_queries = copy.deepcopy(self._queries)
         self._path = '/'
         self.ascending_order = False
+        self._filters = []  # type: List[Filter]
+        self._filter_queries = dict()  # type: Dict[Target, Dict[str, Any]]
 
     def order_by(self, kind: 'QueryOrder', ascending_order: bool = True) -> 'QueryBuilder':
         self.ascending_order = ascending_order
@@ -68,7 +88,32 @@ class V1QueryBuilder(QueryBuilder):
         self._queries['page_size'] = page[1]
         return self
 
+    def add_query(self, key: str, value: 'Any') -> 'QueryBuilder':
+        self._queries[key] = value
+        return self
+
+    def modified_after(self, since: 'datetime') -> 'QueryBuilder':
+        """Request only the objects modified after the given datetime"""
+        return self.add_query('modified__gt', since.isoformat())
+
+    def filter_by(self, filters: 'List[Filter]') -> 'QueryBuilder':
+        """Request only the objects which may pass the filters. The rest of the filters are left to the client."""
+        self._filters = filters
+        self._filter_queries = dict()
+        return self
+
+    def filter_query(self, target: 'Target') -> 'Dict[str, Any]':
+        if target not in self._filter_queries:
+            query, exact = to_query(self._filters, target)
+            if len(query) > 0:
+                logger.info(f"Filters of {target.value} are passed to the API as {query}"
+                            f"{'' if exact else ', and the rest are applied by the client'}")
+            self._filter_queries[target] = query
+        return self._filter_queries[target]
+
     def build(self, target: 'Target') -> str:
+        for key, value in self.filter_query(target).items():
+            self._queries.setdefault(key, value)
         order = self._queries.get('order_by')
         if order is not None:
             order_str = order.by_target(target)
@@ -76,7 +121,7 @@ class V1QueryBuilder(QueryBuilder):
                 order_str = order.inverse(order_str)
             self._queries['order_by'] = order_str
         query_str = parse.urlencode(self._queries)
-        parsed = parse.urlparse(API_BASE_URL)
+        parsed = parse.urlparse(self.base_url)
         path = parsed.path + V1TargetPath.from_target(target).value
         # Initialize
         self.ascending_order = False
@@ -86,7 +131,7 @@ class V1QueryBuilder(QueryBuilder):
         )
 
     def join(self, path: str):
-        return parse.urljoin(API_BASE_URL, path)
+        return parse.urljoin(self.base_url, path)
 
     def clear_query(self):
         self._queries = {}
@@ -94,6 +139,9 @@ class V1QueryBuilder(QueryBuilder):
 
 class Paginator(object):
 
+    # The page size is only shrunk by the failed state
+    controller = None
+
     def __init__(self,
                  page_size: int,
                  start: int = 0,
@@ -106,6 +154,17 @@ class Paginator(object):
         self._child = None  # type: Optional[Paginator]
         self._parent = parent  # type: Optional[Paginator]
 
+    def apply(self, query_builder: 'QueryBuilder') -> 'QueryBuilder':
+        return query_builder.set_page(self.next_page())
+
+    def feed(self, data: 'Dict[str, Any]', elapsed: 'Optional[float]' = None) -> bool:
+        """The end of the target is notified by 404, so the response is never regarded as the last"""
+        return False
+
+    def skip(self):
+        """The failed page has already been passed"""
+        pass
+
     def next_page(self) -> 'Tuple[int, int]':
         if self._has_child():
             return self._child.next_page()
@@ -148,10 +207,153 @@ class Paginator(object):
     def exit_failed_state(self) -> 'Tuple[int, int]':
         return self._parent.remove_child(self.current_position)
 
+    def to_dict(self) -> 'Dict[str, Any]':
+        """Serialize the position including the child paginators"""
+        return {
+            "page_size": self.page_size,
+            "start": self.start_position,
+            "end": self.end_position,
+            "current": self.current_position,
+            "child": self._child.to_dict() if self._has_child() else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: 'Dict[str, Any]', parent: 'Optional[Paginator]' = None) -> 'Paginator':
+        paginator = cls(state['page_size'], state['start'], state['end'], parent)
+        paginator.current_position = state['current']
+        if state.get('child') is not None:
+            paginator._child = cls.from_dict(state['child'], paginator)
+        return paginator
+
     def extract_page_size(self, url_str: str) -> int:
-        parsed_url = parse.urlparse(url_str)
-        parsed_query = parse.parse_qs(parsed_url.query)
-        page_sizes = parsed_query.get('page_size')
-        if page_sizes is None:
-            raise AttributeError("page_size is not in the query.")
-        return int(page_sizes[0])
+        return extract_page_size(url_str)
+
+
+class AdaptivePaginator(object):
+    """
+    Paginate by the page number whose size is adjusted by the controller.
+    The page size is aligned so that the page starts at the current position.
+    """
+
+    def __init__(self, page_size: int = 100, current: int = 0,
+                 controller: 'Optional[PageSizeController]' = None):
+        self.current_position = current
+        self.controller = controller or PageSizeController(page_size)
+        self._requested = self.controller.size
+
+    @property
+    def page_size(self) -> int:
+        return aligned_size(self.current_position, self.controller.size)
+
+    def apply(self, query_builder: 'QueryBuilder') -> 'QueryBuilder':
+        self._requested = self.page_size
+        return query_builder.set_page((self.current_position // self._requested + 1, self._requested))
+
+    def feed(self, data: 'Dict[str, Any]', elapsed: 'Optional[float]' = None) -> bool:
+        """
+        Advance the position by the obtained page
+        :return: Whether the target has no more objects
+        """
+        results = data.get('results', [])
+        self.current_position += self._requested
+        self.controller.succeeded(len(results), elapsed)
+        return data.get('next') is None
+
+    def enter_failed_state(self):
+        shrunk = self.controller.failed()
+        assert shrunk, "Not supported operation. page size must be greater than 1."
+
+    def skip(self):
+        """Skip an object which cannot be obtained"""
+        self.current_position += 1
+        self.controller.skipped()
+
+    def to_dict(self) -> 'Dict[str, Any]':
+        return {
+            "current": self.current_position,
+            "controller": self.controller.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: 'Dict[str, Any]') -> 'AdaptivePaginator':
+        controller = PageSizeController.from_dict(state['controller'])
+        return cls(controller.max_size, state['current'], controller)
+
+
+class KeysetPaginator(object):
+    """
+    Paginate by the id of the last obtained object instead of the page number.
+    The cost of a request does not depend on the depth, and objects inserted
+    during the crawl never shift the following pages.
+    """
+
+    unsupported_targets = [Target.PROVIDERS]
+
+    def __init__(self, page_size: int = 100, last_id: int = 0,
+                 controller: 'Optional[PageSizeController]' = None):
+        self.last_id = last_id
+        # Number of objects skipped due to the errors just after the last id
+        self.skipped = 0
+        self.controller = controller or PageSizeController(page_size)
+
+    @classmethod
+    def supports(cls, target: 'Target', order: 'QueryOrder', ascending_order: bool = True) -> bool:
+        return target not in cls.unsupported_targets \
+               and order == V1QueryOrder.ID \
+               and ascending_order
+
+    @property
+    def page_size(self) -> int:
+        if self.skipped > 0:
+            return 1
+        return self.controller.size
+
+    def apply(self, query_builder: 'QueryBuilder') -> 'QueryBuilder':
+        return query_builder \
+            .order_by(V1QueryOrder.ID) \
+            .add_query('id__gt', self.last_id) \
+            .set_page((self.skipped + 1, self.page_size))
+
+    def feed(self, data: 'Dict[str, Any]', elapsed: 'Optional[float]' = None) -> bool:
+        """
+        Advance the position by the obtained objects
+        :return: Whether the target has no more objects
+        """
+        results = data.get('results', [])
+        if len(results) > 0:
+            self.last_id = max(r['id'] for r in results)
+        self.skipped = 0
+        self.controller.succeeded(len(results), elapsed)
+        return len(results) == 0 or data.get('next') is None
+
+    def enter_failed_state(self):
+        shrunk = self.controller.failed()
+        assert shrunk, "Not supported operation. page size must be greater than 1."
+
+    def skip(self):
+        """Skip an object which cannot be obtained"""
+        self.skipped += 1
+        self.controller.skipped()
+
+    def to_dict(self) -> 'Dict[str, Any]':
+        return {
+            "last_id": self.last_id,
+            "skipped": self.skipped,
+            "controller": self.controller.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: 'Dict[str, Any]') -> 'KeysetPaginator':
+        controller = PageSizeController.from_dict(state['controller'])
+        paginator = cls(controller.max_size, state['last_id'], controller)
+        paginator.skipped = state.get('skipped', 0)
+        return paginator
+
+
+def paginator_from_dict(state: 'Dict[str, Any]') -> 'Union[Paginator, AdaptivePaginator, KeysetPaginator]':
+    """Restore the paginator which saved the position"""
+    if 'last_id' in state:
+        return KeysetPaginator.from_dict(state)
+    if 'controller' in state:
+        return AdaptivePaginator.from_dict(state)
+    return Paginator.from_dict(state)
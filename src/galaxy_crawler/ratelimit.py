@@ -0,0 +1,124 @@
+import time
+from collections import deque
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Deque, Dict, Optional
+
+logger = getLogger(__name__)
+
+
+class TokenBucket(object):
+    """Token bucket which allows `burst` requests at once and `rate` requests per second"""
+
+    def __init__(self,
+                 rate: float,
+                 burst: int = 1,
+                 clock: 'Callable[[], float]' = time.monotonic,
+                 window: int = 20):
+        assert rate > 0, "Rate must be a positive value."
+        assert burst > 0, "Burst must be a positive value."
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = Lock()
+        self._history = deque(maxlen=window)  # type: Deque[float]
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self._history.append(now + wait)
+            return wait
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds to wait until the next token is available"""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= 1:
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    @property
+    def current_rate(self) -> float:
+        """Observed requests per second over the recent reservations"""
+        with self._lock:
+            if len(self._history) < 2:
+                return 0.0
+            span = self._history[-1] - self._history[0]
+            if span <= 0:
+                return float(len(self._history))
+            return (len(self._history) - 1) / span
+
+
+class RateLimiter(object):
+    """
+    Rate limiter shared among the components which access the same server.
+    A global bucket limits the total rate and optional buckets limit each endpoint.
+    """
+
+    def __init__(self,
+                 rate: 'Optional[float]' = None,
+                 burst: int = 1,
+                 endpoint_rates: 'Optional[Dict[str, float]]' = None,
+                 clock: 'Callable[[], float]' = time.monotonic,
+                 sleep: 'Callable[[float], None]' = time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._global = TokenBucket(rate, burst, clock) if rate else None  # type: Optional[TokenBucket]
+        self._endpoints = dict()  # type: Dict[str, TokenBucket]
+        for endpoint, endpoint_rate in (endpoint_rates or {}).items():
+            self._endpoints[endpoint] = TokenBucket(endpoint_rate, burst, clock)
+        self.last_wait = 0.0
+
+    @classmethod
+    def from_interval(cls, interval: 'Optional[float]', burst: int = 1) -> 'RateLimiter':
+        """Rate limiter which allows a request per `interval` seconds"""
+        if not interval:
+            return cls(None, burst)
+        return cls(1 / interval, burst)
+
+    def _buckets(self, endpoint: 'Optional[str]'):
+        buckets = []
+        if self._global is not None:
+            buckets.append(self._global)
+        if endpoint in self._endpoints:
+            buckets.append(self._endpoints[endpoint])
+        return buckets
+
+    def reserve(self, endpoint: 'Optional[str]' = None) -> float:
+        waits = [b.reserve() for b in self._buckets(endpoint)]
+        self.last_wait = max(waits, default=0.0)
+        return self.last_wait
+
+    def acquire(self, endpoint: 'Optional[str]' = None) -> float:
+        """Block until a request to the endpoint is allowed. Returns the waited seconds."""
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            logger.debug(f"Wait for {wait:.2f} sec (rate={self.current_rate(endpoint):.2f} req/s)")
+            self._sleep(wait)
+        return wait
+
+    def wait_time(self, endpoint: 'Optional[str]' = None) -> float:
+        return max([b.wait_time for b in self._buckets(endpoint)], default=0.0)
+
+    def current_rate(self, endpoint: 'Optional[str]' = None) -> float:
+        if endpoint in self._endpoints:
+            return self._endpoints[endpoint].current_rate
+        if self._global is not None:
+            return self._global.current_rate
+        return 0.0
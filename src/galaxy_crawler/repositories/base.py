@@ -3,9 +3,8 @@ from abc import ABCMeta, abstractmethod
 
 
 if TYPE_CHECKING:
-    from typing import Any, List
+    from typing import Any, Dict, List
     from galaxy_crawler.constants import Target
-    from galaxy_crawler.models.v1 import BaseModel
 
 
 class ResponseDataStore(metaclass=ABCMeta):
@@ -18,11 +17,23 @@ class ResponseDataStore(metaclass=ABCMeta):
     def commit(self) -> 'Any':
         raise NotImplementedError
 
+    def close(self) -> 'None':
+        """Release the resources after the final commit"""
+        pass
+
+    def get_state(self) -> 'Dict[str, Any]':
+        """State to be saved in the checkpoint to resume crawling"""
+        return {}
+
+    def restore_state(self, state: 'Dict[str, Any]') -> 'None':
+        pass
+
 
 class RDBStorage(metaclass=ABCMeta):
 
     @abstractmethod
-    def save(self, target: 'Target', obj: 'Any') -> 'List[BaseModel]':
+    def save(self, target: 'Target', obj: 'Any') -> int:
+        """Save the objects, and return the number of the saved ones"""
         raise NotImplementedError
 
     @abstractmethod
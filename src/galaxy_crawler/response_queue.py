@@ -0,0 +1,74 @@
+import time
+from logging import getLogger
+from queue import Queue, Empty, Full
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Optional
+
+logger = getLogger(__name__)
+
+
+class QueueClosed(Exception):
+    """The queue no longer accepts or provides items"""
+    pass
+
+
+class ResponseQueue(Queue):
+    """
+    Bounded queue between the crawler and the parser.
+    Producers block while the queue is full, and closing the queue wakes up all waiters.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        super(ResponseQueue, self).__init__(maxsize)
+        self.closed = False
+        self.max_depth = 0
+        self.blocked = 0
+        self.blocked_time = 0.0
+
+    def put(self, item: 'Any', block: bool = True, timeout: 'Optional[float]' = None):
+        with self.not_full:
+            if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                if not block:
+                    raise Full
+                self.blocked += 1
+                start = time.monotonic()
+                deadline = None if timeout is None else start + timeout
+                while self._qsize() >= self.maxsize and not self.closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Full
+                    self.not_full.wait(remaining)
+                self.blocked_time += time.monotonic() - start
+            if self.closed:
+                raise QueueClosed()
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.max_depth = max(self.max_depth, self._qsize())
+            self.not_empty.notify()
+
+    def get(self, block: bool = True, timeout: 'Optional[float]' = None) -> 'Any':
+        """Items put before closing are still provided"""
+        with self.not_empty:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._qsize():
+                if self.closed:
+                    raise QueueClosed()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    raise Empty
+                self.not_empty.wait(remaining)
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+    def close(self):
+        with self.mutex:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def stats(self) -> str:
+        return f"max depth {self.max_depth}/{self.maxsize}, " \
+            f"producers blocked {self.blocked} times for {self.blocked_time:.2f} sec"
@@ -0,0 +1,70 @@
+from logging import getLogger
+from threading import Thread
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional, Set
+    from galaxy_crawler.constants import Target
+    from galaxy_crawler.crawl import Crawler
+
+logger = getLogger(__name__)
+
+
+class CrawlScheduler(Thread):
+    """
+    Crawl each target on its own crawler at the same time.
+    A target waits only for the targets it depends on.
+    """
+
+    def __init__(self,
+                 targets: 'List[Target]',
+                 crawler_factory: 'Callable[[List[Target]], Crawler]',
+                 dependencies: 'Optional[Dict[Target, List[Target]]]' = None,
+                 poll_interval: float = 0.5):
+        super(CrawlScheduler, self).__init__()
+        self.targets = targets
+        self.dependencies = dependencies or dict()
+        self.poll_interval = poll_interval
+        self._crawlers = {t: crawler_factory([t]) for t in targets}  # type: Dict[Target, Crawler]
+        self._stop_signal = False
+
+    def send_stop_signal(self):
+        self._stop_signal = True
+        for crawler in self._crawlers.values():
+            crawler.send_stop_signal()
+
+    def resume(self, targets: 'List[Target]', positions: 'Dict[Target, Dict[str, Any]]'):
+        """Crawl only the unfinished targets from the positions saved in the checkpoint"""
+        self.targets = targets
+        for t in targets:
+            position = {t: positions[t]} if t in positions else dict()
+            self._crawlers[t].resume([t], position)
+
+    def is_ready(self, target: 'Target', finished: 'Set[Target]') -> bool:
+        # Dependencies which are not crawled this time are regarded as finished
+        return all(d in finished or d not in self.targets for d in self.dependencies.get(target, []))
+
+    def run(self) -> None:
+        waiting = list(self.targets)
+        running = []  # type: List[Target]
+        finished = set()  # type: Set[Target]
+        while not self._stop_signal and len(waiting) + len(running) > 0:
+            for target in [t for t in waiting if self.is_ready(t, finished)]:
+                logger.info(f"Start crawling {target.name}")
+                waiting.remove(target)
+                running.append(target)
+                self._crawlers[target].start()
+            if len(running) == 0:
+                logger.error(f"Dependencies cannot be resolved: {[t.name for t in waiting]}")
+                break
+            self._crawlers[running[0]].join(self.poll_interval)
+            for target in [t for t in running if not self._crawlers[t].is_alive()]:
+                running.remove(target)
+                if self._crawlers[target].stopped:
+                    logger.error(f"Crawling {target.name} was stopped.")
+                    self.send_stop_signal()
+                else:
+                    finished.add(target)
+        for target in running:
+            self._crawlers[target].join()
+        logger.info("Scheduler finished")
@@ -0,0 +1,120 @@
+import base64
+import json
+import zlib
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.constants import Target
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+    from pathlib import Path
+
+logger = getLogger(__name__)
+
+
+class IdSet(object):
+    """Set of non-negative integer ids kept as a bitmap, which is compact since ids are dense"""
+
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, i: int) -> bool:
+        byte = i >> 3
+        return 0 <= byte < len(self._bits) and bool(self._bits[byte] & (1 << (i & 7)))
+
+    def add(self, i: int) -> bool:
+        """Returns whether the id was not contained"""
+        if i < 0:
+            raise ValueError(f"Id must not be negative: {i}")
+        byte = i >> 3
+        if byte >= len(self._bits):
+            # Grow geometrically to avoid copying on every new id
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << (i & 7)
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        self._count += 1
+        return True
+
+    def ids(self) -> 'List[int]':
+        return [b * 8 + j for b, v in enumerate(self._bits) if v for j in range(8) if v & (1 << j)]
+
+    def gaps(self) -> 'List[Tuple[int, int]]':
+        """Missing ranges of ids between the smallest and the largest one, both ends inclusive"""
+        gaps = []
+        previous = None
+        for i in self.ids():
+            if previous is not None and i > previous + 1:
+                gaps.append((previous + 1, i - 1))
+            previous = i
+        return gaps
+
+    def to_str(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self._bits.rstrip(b'\x00')))).decode('ascii')
+
+    @classmethod
+    def from_str(cls, encoded: str) -> 'IdSet':
+        id_set = cls()
+        id_set._bits = bytearray(zlib.decompress(base64.b64decode(encoded)))
+        id_set._count = sum(bin(b).count('1') for b in id_set._bits)
+        return id_set
+
+
+class SeenIds(object):
+    """Ids of the objects obtained for each target"""
+
+    def __init__(self):
+        self._sets = dict()  # type: Dict[Target, IdSet]
+
+    def get(self, target: 'Target') -> 'IdSet':
+        if target not in self._sets:
+            self._sets[target] = IdSet()
+        return self._sets[target]
+
+    def filter(self, target: 'Target', items: 'List[Dict[str, Any]]') -> 'List[Dict[str, Any]]':
+        """Drop the items obtained before, and mark the rest as obtained"""
+        id_set = self.get(target)
+        return [item for item in items if id_set.add(item['id'])]
+
+    def add(self, target: 'Target', items: 'List[Dict[str, Any]]'):
+        id_set = self.get(target)
+        for item in items:
+            id_set.add(item['id'])
+
+    def to_dict(self) -> 'Dict[str, str]':
+        return {t.value: s.to_str() for t, s in self._sets.items()}
+
+    @classmethod
+    def from_dict(cls, state: 'Optional[Dict[str, str]]') -> 'SeenIds':
+        seen = cls()
+        for name, encoded in (state or {}).items():
+            seen._sets[Target(name)] = IdSet.from_str(encoded)
+        return seen
+
+    def gap_report(self) -> 'Dict[str, Dict[str, Any]]':
+        """Ranges of ids which were not obtained, to be fetched again"""
+        report = dict()
+        for target, id_set in self._sets.items():
+            gaps = id_set.gaps()
+            ids = id_set.ids()
+            report[target.value] = {
+                "count": len(id_set),
+                "min": ids[0] if len(ids) > 0 else None,
+                "max": ids[-1] if len(ids) > 0 else None,
+                "missing": sum(end - start + 1 for start, end in gaps),
+                "gaps": [list(g) for g in gaps],
+            }
+        return report
+
+    def write_report(self, path: 'Path'):
+        report = self.gap_report()
+        for name, r in report.items():
+            logger.info(f"{name}: {r['count']} objects, {r['missing']} ids are missing in {len(r['gaps'])} ranges")
+        with path.open('w') as fp:
+            json.dump(report, fp, indent=2)
@@ -1,2 +1,5 @@
 from .json_store import JsonDataStore
+from .jsonl_store import JsonLinesDataStore
+from .parquet_store import ParquetDataStore
 from .rdb_store import RDBStore
+from .sqlite_store import SqliteDataStore
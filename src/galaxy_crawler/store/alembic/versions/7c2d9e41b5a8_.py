@@ -0,0 +1,29 @@
+"""Store the scores of repositories as float
+
+Revision ID: 7c2d9e41b5a8
+Revises: 54efd4b7e4e4
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e41b5a8'
+down_revision = '54efd4b7e4e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite cannot alter the type of a column, so the table is copied in the batch mode
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.alter_column('community_score', existing_type=sa.Integer(), type_=sa.Float(), existing_nullable=True)
+        batch_op.alter_column('quality_score', existing_type=sa.Integer(), type_=sa.Float(), existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.alter_column('quality_score', existing_type=sa.Float(), type_=sa.Integer(), existing_nullable=True)
+        batch_op.alter_column('community_score', existing_type=sa.Float(), type_=sa.Integer(), existing_nullable=True)
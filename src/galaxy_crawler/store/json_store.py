@@ -1,4 +1,3 @@
-import codecs
 import json
 import copy
 from collections import OrderedDict
@@ -7,10 +6,12 @@ from logging import getLogger
 from typing import TYPE_CHECKING
 from pytz import timezone
 
+from galaxy_crawler.compression import Codec, CompressedWriter, IOStats, strip_codec_suffix
 from galaxy_crawler.repositories import ResponseDataStore
+from galaxy_crawler.utils import shard_index
 
 if TYPE_CHECKING:
-    from typing import Any, Union, List
+    from typing import Any, Union, List, Dict, Optional
     from pathlib import Path
     from galaxy_crawler.constants import Target
 
@@ -42,12 +43,33 @@ class Counter(object):
         self._memory[key] = 0
         return 0
 
+    def set_count(self, key: 'str', count: int):
+        self._memory[key] = count
+
+    def to_dict(self) -> 'Dict[str, int]':
+        return dict(self._memory)
+
+
+def skip_existing_shards(output_dir: 'Path', counter: 'Counter', suffix: str):
+    """Advance the counters beyond the existing shards so that they are never overwritten"""
+    if not output_dir.exists():
+        return
+    for d in output_dir.iterdir():
+        if not d.is_dir():
+            continue
+        indexes = [shard_index(f) for f in d.glob(f"{d.name}_*")
+                   if strip_codec_suffix(f.name).endswith(suffix)]
+        if len(indexes) > 0 and counter.get_count(d.name) <= max(indexes):
+            counter.set_count(d.name, max(indexes) + 1)
+
 
 class JsonDataStore(ResponseDataStore):
 
-    def __init__(self, output_dir: 'Path'):
+    def __init__(self, output_dir: 'Path', codec: 'Optional[Codec]' = None):
         self.output_dir = output_dir
+        self.codec = codec or Codec()
         self.counter = Counter()
+        self.stats = IOStats()
         now = self._get_current_time()
         self.template = {
             "start_at": now,
@@ -74,13 +96,27 @@ class JsonDataStore(ResponseDataStore):
     def initialize(self):
         self.responses = dict()
 
+    def get_state(self) -> 'Dict[str, Any]':
+        return {"counter": self.counter.to_dict()}
+
+    def restore_state(self, state: 'Dict[str, Any]'):
+        """Restore the file indexes so that existing files are never overwritten"""
+        for name, count in state.get("counter", {}).items():
+            self.counter.set_count(name, count)
+        skip_existing_shards(self.output_dir, self.counter, '.json')
+
     def commit(self):
         for name, value in self.responses.items():
             count = self.counter.get_count(name)
-            f = self.output_dir / name / f"{name}_{count}.json"
+            f = self.output_dir / name / f"{name}_{count}.json{self.codec.suffix}"
             if not f.parent.exists():
                 f.parent.mkdir(parents=True)
-            with codecs.open(str(f), 'w', 'utf-8') as fp:
-                json.dump(value, fp, default=_serialize)
+            fp = CompressedWriter(f, self.codec)
+            fp.write(json.dumps(value, default=_serialize).encode('utf-8'))
+            fp.close()
+            self.stats.add(fp.bytes_in, fp.bytes_out)
             self.counter.increment(key=name)
         self.responses = dict()
+
+    def close(self):
+        logger.info(f"JSON ({self.codec.name}): {self.stats}")
@@ -0,0 +1,95 @@
+import json
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.compression import Codec, CompressedWriter, IOStats
+from galaxy_crawler.repositories import ResponseDataStore
+from .json_store import Counter, skip_existing_shards, _serialize
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional
+    from pathlib import Path
+    from galaxy_crawler.constants import Target
+
+logger = getLogger(__name__)
+
+
+class Shard(CompressedWriter):
+    """A JSON Lines file which objects are appended to"""
+
+    def __init__(self, path: 'Path', codec: 'Codec'):
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True)
+        super(Shard, self).__init__(path, codec, 'ab')
+        self.records = 0
+
+    def write(self, line: bytes):
+        super(Shard, self).write(line)
+        self.records += 1
+
+
+class JsonLinesDataStore(ResponseDataStore):
+    """
+    Append objects to `{name}/{name}_{index}.jsonl` as soon as they are saved.
+    Shards are rotated by the number of records or bytes before compression, and synced on commit.
+    """
+
+    suffix = '.jsonl'
+
+    def __init__(self,
+                 output_dir: 'Path',
+                 max_records: int = 100000,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 codec: 'Optional[Codec]' = None):
+        self.output_dir = output_dir
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.codec = codec or Codec()
+        self.counter = Counter()
+        self.stats = IOStats()
+        self._shards = dict()  # type: Dict[str, Shard]
+
+    def _open(self, name: str) -> 'Shard':
+        count = self.counter.get_count(name)
+        shard = Shard(self.output_dir / name / f"{name}_{count}{self.suffix}{self.codec.suffix}", self.codec)
+        self._shards[name] = shard
+        return shard
+
+    def _close(self, shard: 'Shard'):
+        shard.close()
+        self.stats.add(shard.bytes_in, shard.bytes_out)
+
+    def _rotate(self, name: str) -> 'Shard':
+        self._close(self._shards.pop(name))
+        self.counter.increment(name)
+        return self._open(name)
+
+    def save(self, target: 'Target', obj: 'List[dict]', commit: bool = False) -> 'Any':
+        name = target.value
+        shard = self._shards.get(name) or self._open(name)
+        for o in obj:
+            if shard.records >= self.max_records or shard.bytes_in >= self.max_bytes:
+                shard = self._rotate(name)
+            line = json.dumps(o, default=_serialize, ensure_ascii=False) + "\n"
+            shard.write(line.encode('utf-8'))
+        if commit:
+            self.commit()
+
+    def commit(self):
+        for shard in self._shards.values():
+            shard.sync()
+
+    def close(self):
+        for shard in self._shards.values():
+            self._close(shard)
+        self._shards = dict()
+        logger.info(f"JSON Lines ({self.codec.name}): {self.stats}")
+
+    def get_state(self) -> 'Dict[str, Any]':
+        return {"counter": self.counter.to_dict()}
+
+    def restore_state(self, state: 'Dict[str, Any]'):
+        """Start new shards so that the existing ones, which may end with a broken line, are kept as they are"""
+        for name, count in state.get("counter", {}).items():
+            self.counter.set_count(name, count)
+        skip_existing_shards(self.output_dir, self.counter, self.suffix)
@@ -0,0 +1,168 @@
+import os
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Boolean, DateTime, Integer, Numeric
+
+from galaxy_crawler.compression import Codec
+from galaxy_crawler.constants import Target
+from galaxy_crawler.models import v1 as models
+from galaxy_crawler.repositories import ResponseDataStore
+from galaxy_crawler.utils import to_datetime
+from .json_store import Counter, skip_existing_shards
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+    from pathlib import Path
+
+logger = getLogger(__name__)
+
+TARGET_MODELS = {
+    Target.PROVIDERS: models.Provider,
+    Target.PLATFORMS: models.Platform,
+    Target.TAGS: models.Tag,
+    Target.NAMESPACES: models.Namespace,
+    Target.PROVIDER_NAMESPACES: models.ProviderNamespace,
+    Target.REPOSITORIES: models.Repository,
+    Target.ROLES: models.Role,
+}
+
+# Columns taken from `summary_fields`, which are the related objects used by `from_json`
+SUMMARY_COLUMNS = {
+    Target.PROVIDER_NAMESPACES: [('provider_id', ('provider', 'id')), ('namespace_id', ('namespace', 'id'))],
+    Target.REPOSITORIES: [('provider_namespace_id', ('provider_namespace', 'id'))],
+    Target.ROLES: [('namespace_id', ('namespace', 'id')), ('repository_id', ('repository', 'id')),
+                   ('tags', ('tags',)), ('dependencies', ('dependencies',)), ('platforms', ('platforms',))],
+}  # type: Dict[Target, List[Tuple[str, Tuple[str, ...]]]]
+
+
+def _arrow_type(column_type: 'Any') -> 'pa.DataType':
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Numeric):
+        # Including `Float`
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+def _summary_type(name: str) -> 'pa.DataType':
+    if name == 'tags':
+        return pa.list_(pa.string())
+    if name == 'dependencies':
+        return pa.list_(pa.int64())
+    if name == 'platforms':
+        return pa.list_(pa.struct([('name', pa.string()), ('release', pa.string())]))
+    return pa.int64()
+
+
+def schema_of(target: 'Target') -> 'pa.Schema':
+    """Arrow schema of the fields which `from_json` of the model reads"""
+    model = TARGET_MODELS[target]
+    columns = model.__table__.columns
+    fields = []
+    for key in model._json_fields:
+        name = key['key'] if isinstance(key, dict) else key
+        column_type = columns[name].type if name in columns else None
+        fields.append(pa.field(name, _arrow_type(column_type)))
+    if target == Target.ROLES:
+        fields.append(pa.field('license', pa.string()))
+    for name, _ in SUMMARY_COLUMNS.get(target, []):
+        fields.append(pa.field(name, _summary_type(name)))
+    return pa.schema(fields)
+
+
+def flatten(target: 'Target', obj: 'Dict[str, Any]', schema: 'pa.Schema') -> 'Dict[str, Any]':
+    """Pick the fields of the schema from the JSON object. Missing fields are null."""
+    row = dict()
+    for key in TARGET_MODELS[target]._json_fields:
+        if isinstance(key, dict):
+            row[key['key']] = obj.get(key['target'])
+        else:
+            row[key] = obj.get(key)
+    if target == Target.ROLES:
+        row['license'] = obj.get('license')
+    summary = obj.get('summary_fields', {})
+    for name, path in SUMMARY_COLUMNS.get(target, []):
+        value = summary
+        for p in path:
+            value = value.get(p) if isinstance(value, dict) else None
+        row[name] = value
+    for field in schema:
+        if pa.types.is_timestamp(field.type):
+            row[field.name] = to_datetime(row[field.name])
+    return row
+
+
+class ParquetDataStore(ResponseDataStore):
+    """
+    Write the known fields of objects as typed columns.
+    Each commit writes a part `{name}/{name}_{index}.parquet` of the dataset of the target.
+    """
+
+    suffix = '.parquet'
+
+    def __init__(self, output_dir: 'Path', codec: 'Optional[Codec]' = None):
+        if pa is None:
+            raise ImportError("`pyarrow` is required to write Parquet files")
+        self.output_dir = output_dir
+        self.codec = codec or Codec()
+        self.counter = Counter()
+        self.rows = 0
+        self.bytes = 0
+        self._schemas = dict()  # type: Dict[Target, pa.Schema]
+        self._buffers = dict()  # type: Dict[Target, List[Dict[str, Any]]]
+
+    def _schema(self, target: 'Target') -> 'pa.Schema':
+        if target not in self._schemas:
+            self._schemas[target] = schema_of(target)
+        return self._schemas[target]
+
+    def save(self, target: 'Target', obj: 'List[dict]', commit: bool = False) -> 'Any':
+        schema = self._schema(target)
+        rows = self._buffers.setdefault(target, [])
+        rows.extend(flatten(target, o, schema) for o in obj)
+        if commit:
+            self.commit()
+
+    def _write(self, target: 'Target', rows: 'List[Dict[str, Any]]'):
+        schema = self._schema(target)
+        name = target.value
+        table = pa.Table.from_pydict({f.name: [r[f.name] for r in rows] for f in schema}, schema=schema)
+        f = self.output_dir / name / f"{name}_{self.counter.get_count(name)}{self.suffix}"
+        if not f.parent.exists():
+            f.parent.mkdir(parents=True)
+        # A part is never left half-written
+        tmp = f.with_name(f".{f.name}.tmp")
+        pq.write_table(table, str(tmp), compression=self.codec.name, compression_level=self.codec.level)
+        os.replace(str(tmp), str(f))
+        self.counter.increment(name)
+        self.rows += len(rows)
+        self.bytes += f.stat().st_size
+
+    def commit(self):
+        for target, rows in self._buffers.items():
+            if len(rows) > 0:
+                self._write(target, rows)
+        self._buffers = dict()
+
+    def close(self):
+        logger.info(f"Parquet ({self.codec.name}): {self.rows} rows, {self.bytes} bytes")
+
+    def get_state(self) -> 'Dict[str, Any]':
+        return {"counter": self.counter.to_dict()}
+
+    def restore_state(self, state: 'Dict[str, Any]'):
+        for name, count in state.get("counter", {}).items():
+            self.counter.set_count(name, count)
+        skip_existing_shards(self.output_dir, self.counter, self.suffix)
@@ -8,14 +8,17 @@ import alembic.config
 import alembic.command
 from sqlalchemy.orm.session import sessionmaker
 from sqlalchemy.orm import scoped_session
-from sqlalchemy.exc import IntegrityError, NoForeignKeysError
+from sqlalchemy.exc import IntegrityError, NoForeignKeysError, SQLAlchemyError
 
 from galaxy_crawler.repositories import RDBStorage
 from galaxy_crawler.models import v1 as model
+from galaxy_crawler.models.bulk import select_in
+from galaxy_crawler.models.errors import JSONParseFailed
 from galaxy_crawler.constants import Target
 
 if TYPE_CHECKING:
-    from typing import Any, List, Dict
+    from typing import Any, List, Dict, Optional, Set
+    from sqlalchemy import Table
     from alembic.config import Config as AlembicConfig
     from alembic.script import ScriptDirectory as AlembicScriptDir
 
@@ -34,11 +37,17 @@ model_target_pair = {
 
 
 class RDBStore(RDBStorage):
+    """
+    Save objects to the database.
+    In the batch mode, the objects of a page are inserted in a transaction,
+    and they are saved one by one only if the batch failed.
+    """
 
-    def __init__(self, engine):
+    def __init__(self, engine, batch: bool = True):
         self.engine = engine
         self.session = scoped_session(sessionmaker(bind=engine))
         self.retry_queue = {}  # type: Dict[Target, List[dict]]
+        self.batch = batch
         self.create_tables()
 
     def _commit(self, target: 'Target', o: 'Any', session):
@@ -54,7 +63,7 @@ class RDBStore(RDBStorage):
             return False
         return True
 
-    def save(self, target: 'Target', obj: 'Any') -> 'Any':
+    def save(self, target: 'Target', obj: 'Any') -> int:
         session = self.session()
         model_class = model_target_pair.get(target)
         if model_class is None:
@@ -62,13 +71,58 @@ class RDBStore(RDBStorage):
         if target in self.retry_queue:
             retry_objs = self.retry_queue.pop(target)
             obj = obj + retry_objs
-        records = []
+        saved = 0
+        if self.batch and len(obj) > 1:
+            rest = self._save_batch(target, model_class, obj, session)
+            if rest is not None:
+                saved = len(obj) - len(rest)
+                obj = rest
         for o in obj:
             record = model_class.from_json(o, session)
-            session.flush()
+            session.add(record)
             if self._commit(target, o, session):
-                records.append(record)
-        return records
+                saved += 1
+        return saved
+
+    def _save_batch(self, target: 'Target', model_class: 'Any', obj: 'List[dict]', session) -> 'Optional[List[dict]]':
+        """
+        Save the objects in a transaction. The objects left to be saved one by one are returned,
+        or None if the batch failed.
+        """
+        rest = []
+        try:
+            rows = [model_class.to_row(o) for o in obj]
+            if all(r is not None for r in rows):
+                missing = self._missing_references(model_class.__table__, rows, session)
+                # Rows referring to unsaved rows are resolved by `from_json` as the one by one save does
+                rest = [o for i, o in enumerate(obj) if i in missing]
+                rows = [r for i, r in enumerate(rows) if i not in missing]
+                if len(rows) > 0:
+                    # A single INSERT with the parameters of all rows
+                    session.execute(model_class.__table__.insert(), rows)
+            else:
+                session.add_all(model_class.from_json_many(obj, session))
+            session.commit()
+        except (SQLAlchemyError, JSONParseFailed, KeyError) as e:
+            session.rollback()
+            logger.warning(f"Failed to save {len(obj)} {target.value} at once due to {e.__class__.__name__}. "
+                           f"Save them one by one.")
+            return None
+        return rest
+
+    @staticmethod
+    def _missing_references(table: 'Table', rows: 'List[dict]', session) -> 'Set[int]':
+        """Indices of the rows whose foreign keys refer to the rows which are not stored"""
+        missing = set()
+        for fk in table.foreign_keys:
+            column = fk.parent.name
+            ids = {r[column] for r in rows if r.get(column) is not None}
+            if len(ids) == 0:
+                continue
+            referred = fk.column
+            stored = {row[0] for row in select_in(session, referred.table, referred.name, ids, [referred.name])}
+            missing.update(i for i, r in enumerate(rows) if r.get(column) is not None and r[column] not in stored)
+        return missing
 
     def is_migration_required(self) -> 'bool':
         script_dir = self._get_alembic_script_dir()
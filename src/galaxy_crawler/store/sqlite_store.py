@@ -0,0 +1,98 @@
+import json
+import sqlite3
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.compression import IOStats
+from galaxy_crawler.repositories import ResponseDataStore
+from .json_store import _serialize
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional
+    from pathlib import Path
+    from galaxy_crawler.constants import Target
+
+logger = getLogger(__name__)
+
+
+def connect(path: 'Path') -> 'sqlite3.Connection':
+    conn = sqlite3.connect(str(path))
+    # Readers such as `load` are not blocked while crawling
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SqliteDataStore(ResponseDataStore):
+    """
+    Store raw objects in a table of each target keyed by id.
+    Objects obtained again overwrite the old ones.
+    """
+
+    file_name = 'crawl.sqlite3'
+
+    def __init__(self, output_dir: 'Path'):
+        self.path = output_dir / self.file_name
+        self.rows = 0
+        self._tables = set()
+        # Connected on the thread which saves objects
+        self._conn = None  # type: Optional[sqlite3.Connection]
+
+    def _connection(self) -> 'sqlite3.Connection':
+        if self._conn is None:
+            self._conn = connect(self.path)
+        return self._conn
+
+    def _table(self, name: str) -> str:
+        if name not in self._tables:
+            self._connection().execute(
+                f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, modified TEXT, json TEXT NOT NULL)")
+            self._tables.add(name)
+        return name
+
+    def save(self, target: 'Target', obj: 'List[dict]', commit: bool = False) -> 'Any':
+        table = self._table(target.value)
+        rows = [(o['id'], o.get('modified'), json.dumps(o, default=_serialize, ensure_ascii=False)) for o in obj]
+        self._connection().executemany(f"INSERT OR REPLACE INTO {table} (id, modified, json) VALUES (?, ?, ?)", rows)
+        self.rows += len(rows)
+        if commit:
+            self.commit()
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+        logger.info(f"SQLite: {self.rows} rows were upserted into {self.path}")
+
+
+class SqliteStream(object):
+    """Objects of a target in the database written by `SqliteDataStore`, which are read in order of id"""
+
+    def __init__(self, path: 'Path', name: str):
+        self.path = path
+        self.name = name
+        # Bytes read by the last iteration
+        self.stats = IOStats()
+
+    def exists(self) -> bool:
+        conn = sqlite3.connect(str(self.path))
+        try:
+            found = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,))
+            return found.fetchone() is not None
+        finally:
+            conn.close()
+
+    def __iter__(self) -> 'Iterator[Dict[str, Any]]':
+        self.stats = IOStats()
+        conn = sqlite3.connect(str(self.path))
+        try:
+            for (body,) in conn.execute(f"SELECT json FROM {self.name} ORDER BY id"):
+                self.stats.add(len(body), len(body))
+                yield json.loads(body)
+        finally:
+            conn.close()
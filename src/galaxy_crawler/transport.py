@@ -0,0 +1,146 @@
+import random
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from galaxy_crawler.utils import UTC
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Optional, Tuple
+    from galaxy_crawler.ratelimit import RateLimiter
+
+logger = getLogger(__name__)
+
+
+class TransportStats(object):
+    """Timing of the requests sent by a transport"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.total_elapsed = 0.0
+        self.last_elapsed = 0.0
+        self._lock = Lock()
+
+    def record(self, elapsed: float, retried: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.total_elapsed += elapsed
+            self.last_elapsed = elapsed
+            if retried:
+                self.retries += 1
+
+    @property
+    def mean_elapsed(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.total_elapsed / self.requests
+
+    def __str__(self):
+        return f"{self.requests} requests ({self.retries} retries), " \
+            f"mean {self.mean_elapsed:.2f} sec, last {self.last_elapsed:.2f} sec"
+
+
+class Transport(object):
+    """HTTP transport which reuses keep-alive connections and retries with backoff"""
+
+    base_headers = {
+        "content-type": "application/json",
+        "accept-encoding": "gzip, deflate",
+        "connection": "keep-alive",
+    }
+    retry_statuses = (429, 502, 503, 504)
+
+    def __init__(self,
+                 retry: int = 3,
+                 rate_limiter: 'Optional[RateLimiter]' = None,
+                 pool_size: int = 10,
+                 timeout: 'Tuple[int, int]' = (30, 60),
+                 backoff: float = 1.0,
+                 max_backoff: float = 60.0,
+                 sleep: 'Callable[[float], None]' = time.sleep,
+                 adapter: 'Optional[BaseAdapter]' = None):
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = TransportStats()
+        self._sleep = sleep
+        self._random = random.Random()
+        self.session = requests.Session()
+        self.session.headers.update(self.base_headers)
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def backoff_time(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        upper = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return self._random.uniform(0, upper)
+
+    def retry_after(self, resp: 'requests.Response') -> 'Optional[float]':
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            wait = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            if retry_at.tzinfo is None:
+                retry_at = UTC.localize(retry_at)
+            wait = (retry_at - datetime.now(UTC)).total_seconds()
+        return min(self.max_backoff, max(0.0, wait))
+
+    def get(self,
+            url: str,
+            headers: 'Optional[Dict[str, str]]' = None,
+            endpoint: 'Optional[str]' = None,
+            **kwargs) -> 'requests.Response':
+        """
+        Send GET request. Connection errors and the responses with `retry_statuses`
+        are retried, and other responses are returned as they are.
+        :param url: URL to access
+        :param headers: Additional headers
+        :param endpoint: Name of endpoint to share the rate limit
+        :return: requests.Response
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(endpoint)
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                attempt += 1
+                if attempt > self.retry:
+                    raise
+                wait = self.backoff_time(attempt)
+                logger.error(f"Request to '{url}' was failed with {e}. "
+                             f"Retrying in {wait:.2f} sec...{attempt}/{self.retry}")
+                self._sleep(wait)
+                continue
+            elapsed = time.perf_counter() - start
+            self.stats.record(elapsed, retried=attempt > 0)
+            if resp.status_code in self.retry_statuses and attempt < self.retry:
+                attempt += 1
+                wait = self.retry_after(resp)
+                if wait is None:
+                    wait = self.backoff_time(attempt)
+                logger.warning(f"{resp.status_code}: '{url}'. "
+                               f"Retrying in {wait:.2f} sec...{attempt}/{self.retry}")
+                self._sleep(wait)
+                continue
+            logger.debug(f"{resp.status_code}: '{url}' ({elapsed:.2f} sec)")
+            return resp
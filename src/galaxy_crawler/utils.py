@@ -52,3 +52,8 @@ def mkdir(path: 'Path'):
         if path.is_file():
             raise NotADirectoryError(f"'{path}' is not a directory.")
     return path
+
+
+def shard_index(path: 'Path') -> int:
+    """Index of the shard named `{name}_{index}.{suffixes}`"""
+    return int(path.name.split('.')[0].split('_')[-1])
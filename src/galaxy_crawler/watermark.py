@@ -0,0 +1,77 @@
+import json
+import os
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from galaxy_crawler.utils import to_datetime
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Tuple
+    from galaxy_crawler.constants import Target
+
+logger = getLogger(__name__)
+
+
+class Watermarks(object):
+    """The newest `modified` of each target obtained by the previous crawls"""
+
+    def __init__(self, path: 'Path'):
+        self.path = path
+        self._marks = dict()  # type: Dict[str, datetime]
+        # The newest `modified` of the target in this crawl
+        self._seen = dict()  # type: Dict[str, datetime]
+        # Targets which were crawled until the previous watermark
+        self._finished = dict()  # type: Dict[str, datetime]
+        self._lock = Lock()
+
+    def load(self) -> 'Watermarks':
+        if not self.path.exists():
+            logger.info(f"{self.path} does not exist. All objects will be crawled.")
+            return self
+        with self.path.open('r') as fp:
+            body = json.load(fp)
+        self._marks = {name: to_datetime(mark) for name, mark in body.items()}
+        return self
+
+    def save(self):
+        with self._lock:
+            marks = dict(self._marks)
+            marks.update(self._finished)
+            if not self.path.parent.exists():
+                self.path.parent.mkdir(parents=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with tmp.open('w') as fp:
+                json.dump({name: mark.isoformat() for name, mark in marks.items()}, fp)
+            os.replace(str(tmp), str(self.path))
+        logger.info(f"Save watermarks to {self.path}")
+
+    def get(self, target: 'Target') -> 'Optional[datetime]':
+        return self._marks.get(target.value)
+
+    def cut(self, target: 'Target', items: 'List[Dict[str, Any]]') -> 'Tuple[List[Dict[str, Any]], bool]':
+        """
+        Drop the items which were obtained by the previous crawls.
+        Items must be sorted by `modified` in descending order.
+        :return: New items and whether the watermark was reached
+        """
+        with self._lock:
+            for item in items:
+                modified = to_datetime(item['modified'])
+                seen = self._seen.get(target.value)
+                if seen is None or seen < modified:
+                    self._seen[target.value] = modified
+        mark = self.get(target)
+        if mark is None:
+            return items, False
+        fresh = [item for item in items if to_datetime(item['modified']) > mark]
+        return fresh, len(fresh) < len(items)
+
+    def finish(self, target: 'Target'):
+        """Advance the watermark of a target which was crawled entirely"""
+        with self._lock:
+            seen = self._seen.get(target.value)
+            if seen is not None:
+                self._finished[target.value] = seen
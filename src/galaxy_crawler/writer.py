@@ -0,0 +1,175 @@
+import time
+from logging import getLogger
+from threading import Condition, Thread
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+    from galaxy_crawler.checkpoint import Checkpoint
+    from galaxy_crawler.constants import Target
+    from galaxy_crawler.repositories import ResponseDataStore
+    from galaxy_crawler.seen import SeenIds
+    from galaxy_crawler.watermark import Watermarks
+
+logger = getLogger(__name__)
+
+
+class CommitPolicy(object):
+    """Commit the saved items when any of the limits is reached"""
+
+    def __init__(self,
+                 records: 'Optional[int]' = None,
+                 size: 'Optional[int]' = None,
+                 seconds: 'Optional[float]' = None):
+        self.records = records
+        self.size = size
+        self.seconds = seconds
+
+    def is_due(self, batch: 'Batch') -> bool:
+        if self.records is not None and batch.records >= self.records:
+            return True
+        if self.size is not None and batch.size >= self.size:
+            return True
+        if self.seconds is not None and batch.age >= self.seconds:
+            return True
+        return False
+
+    def remaining(self, batch: 'Batch') -> 'Optional[float]':
+        """Seconds until the batch is due by its age. None if the age does not make it due."""
+        if self.seconds is None or len(batch) == 0:
+            return None
+        return max(self.seconds - batch.age, 0.0)
+
+    def __str__(self) -> str:
+        return f"records={self.records}, size={self.size}, seconds={self.seconds}"
+
+
+class Batch(object):
+    """Items and positions which are committed together"""
+
+    def __init__(self):
+        self.items = list()  # type: List[Tuple[Target, List[Dict[str, Any]]]]
+        self.positions = dict()  # type: Dict[Target, Dict[str, Any]]
+        self.records = 0
+        self.size = 0
+        self.created_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.items) + len(self.positions)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def add(self, target: 'Target', items: 'List[Dict[str, Any]]', size: int = 0):
+        if len(items) > 0:
+            self.items.append((target, items))
+        self.records += len(items)
+        self.size += size
+
+    def set_position(self, target: 'Target', position: 'Dict[str, Any]'):
+        self.positions[target] = position
+
+
+class CommitWorker(Thread):
+    """
+    Save and commit batches to the stores on its own thread.
+    A batch is filled while the previous one is written, and the filler waits only if both are full.
+    """
+
+    def __init__(self,
+                 data_stores: 'List[ResponseDataStore]',
+                 checkpoint: 'Optional[Checkpoint]' = None,
+                 seen: 'Optional[SeenIds]' = None,
+                 watermarks: 'Optional[Watermarks]' = None):
+        super(CommitWorker, self).__init__(daemon=True)
+        self.data_stores = data_stores
+        self.checkpoint = checkpoint
+        # Advanced only for the targets whose all objects were committed
+        self.watermarks = watermarks
+        # Ids of the committed objects, which are recorded in the checkpoint
+        self.seen = seen
+        self.error = None  # type: Optional[Exception]
+        self.batches = 0
+        self.write_time = 0.0
+        self.wait_time = 0.0
+        self._pending = None  # type: Optional[Batch]
+        self._closed = False
+        self._cond = Condition()
+
+    def submit(self, batch: 'Batch') -> bool:
+        """Hand the batch to the worker. Returns false if the worker failed."""
+        with self._cond:
+            start = time.monotonic()
+            while self._pending is not None and self.error is None:
+                self._cond.wait()
+            self.wait_time += time.monotonic() - start
+            if self.error is not None:
+                return False
+            self._pending = batch
+            self._cond.notify_all()
+        return True
+
+    def flush(self) -> bool:
+        """Wait until the submitted batches are committed"""
+        with self._cond:
+            while self._pending is not None and self.error is None:
+                self._cond.wait()
+            return self.error is None
+
+    def close(self) -> bool:
+        """Commit the remaining batch and close the stores"""
+        succeeded = self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join()
+        return succeeded
+
+    def write(self, batch: 'Batch'):
+        for target, items in batch.items:
+            for store in self.data_stores:
+                store.save(target, items)
+        for store in self.data_stores:
+            store.commit()
+        if self.seen is not None:
+            for target, items in batch.items:
+                self.seen.add(target, items)
+        if self.checkpoint is not None and len(batch.positions) > 0:
+            seen = self.seen.to_dict() if self.seen is not None else None
+            self.checkpoint.commit(batch.positions, self.data_stores, seen)
+        if self.watermarks is not None:
+            for target, position in batch.positions.items():
+                if position.get('finished'):
+                    self.watermarks.finish(target)
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                batch = self._pending
+            if batch is None:
+                break
+            start = time.monotonic()
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.exception(f"Failed to commit {batch.records} items: {e}")
+                with self._cond:
+                    self.error = e
+                    self._pending = None
+                    self._cond.notify_all()
+                break
+            self.write_time += time.monotonic() - start
+            self.batches += 1
+            with self._cond:
+                self._pending = None
+                self._cond.notify_all()
+        for store in self.data_stores:
+            store.close()
+
+    def stats(self) -> str:
+        return f"{self.batches} batches committed in {self.write_time:.2f} sec, " \
+            f"waited {self.wait_time:.2f} sec for the writer"
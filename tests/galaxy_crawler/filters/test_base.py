@@ -1,6 +1,7 @@
 import itertools
 import pytest
-from galaxy_crawler.filters import Filter, DefaultFilter
+from galaxy_crawler.constants import Target
+from galaxy_crawler.filters import Filter, DefaultFilter, CompiledFilter
 
 
 class DenyFilter(Filter):
@@ -43,3 +44,37 @@ class TestFilter(object):
     def test_or(self, expected, filter):
         new_filter = not filter.passed({}, {})
         assert not expected == new_filter
+
+
+class TestCompiledFilter(object):
+
+    @pytest.mark.parametrize(
+        'filters,expected', [
+            ([], 3),
+            ([DefaultFilter()], 3),
+            ([DenyFilter()], 0),
+            ([DefaultFilter(), DenyFilter()], 0),
+            ([(DenyFilter() | DefaultFilter())()], 3),
+            ([(~DenyFilter())()], 3),
+        ]
+    )
+    def test_count_passed(self, filters, expected):
+        compiled = CompiledFilter(filters)
+        assert compiled.count_passed(Target.ROLES, [{}, {}, {}]) == expected
+
+    def test_short_circuit(self):
+        evaluated = []
+
+        class LessThan(Filter):
+            def passed(self, target, role: 'dict') -> bool:
+                evaluated.append(role['id'])
+                return role['id'] < 2
+
+        compiled = CompiledFilter([LessThan()])
+        assert compiled.count_passed(Target.ROLES, [{'id': i} for i in range(5)]) == 2
+        assert evaluated == [0, 1, 2]
+
+    def test_predicate_is_cached(self):
+        compiled = CompiledFilter([DenyFilter()])
+        assert compiled.predicate(Target.ROLES) is compiled.predicate(Target.ROLES)
+        assert compiled.predicate(Target.ROLES) is not compiled.predicate(Target.TAGS)
@@ -0,0 +1,113 @@
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.errors import InvalidExpressionError, NotSupportedFilterError
+from galaxy_crawler.filters import CompiledFilter, v1
+from galaxy_crawler.filters.base import bound
+from galaxy_crawler.filters.v1 import V1FilterEnum
+
+
+def role(download, star, version):
+    return {'download_count': download, 'stargazers_count': star, 'min_ansible_version': version}
+
+
+class TestV1FilterEnum(object):
+
+    @pytest.mark.parametrize(
+        'expr,obj,expected', [
+            ('download>500', role(501, 0, '2.0'), True),
+            ('download>500', role(500, 0, '2.0'), False),
+            ('download<500', role(500, 0, '2.0'), True),
+            ('download<500', role(501, 0, '2.0'), False),
+            ('download>500 & star>10', role(501, 11, '2.0'), True),
+            ('download>500 & star>10', role(501, 10, '2.0'), False),
+            ('download>500 | star>10', role(0, 11, '2.0'), True),
+            ('download>500 | star>10', role(0, 0, '2.0'), False),
+            ('!download>500', role(0, 0, '2.0'), True),
+            ('!!download>500', role(0, 0, '2.0'), False),
+            ('star>10 | download>500 & ansible>2.5', role(501, 0, '2.4'), False),
+            ('star>10 | download>500 & ansible>2.5', role(0, 11, '2.4'), True),
+            ('(star>10 | download>500) & ansible>2.5', role(0, 11, '2.4'), False),
+            ('(star>10 | download>500) & !(ansible>2.5)', role(0, 11, '2.4'), True),
+            ('ansible>2.5', role(0, 0, None), False),
+        ]
+    )
+    def test_parse(self, expr, obj, expected):
+        f = V1FilterEnum.parse(expr)
+        assert f.passed(Target.ROLES, obj) == expected
+        assert CompiledFilter([f]).count_passed(Target.ROLES, [obj]) == int(expected)
+
+    @pytest.mark.parametrize(
+        'expr', ['', 'download', 'download>', 'download>500 &', '(download>500', 'download>500)', '& star>1',
+                 'download>500 star>1 |', 'download>abc']
+    )
+    def test_invalid_expression(self, expr):
+        with pytest.raises(InvalidExpressionError):
+            V1FilterEnum.parse(expr)
+
+    def test_not_supported(self):
+        with pytest.raises(NotSupportedFilterError):
+            V1FilterEnum.parse('download>1 & watch>1')
+
+    @pytest.mark.parametrize('target', [Target.TAGS, Target.PLATFORMS])
+    def test_other_targets_pass(self, target):
+        compiled = CompiledFilter([V1FilterEnum.parse('download>500 & !star>10')])
+        assert compiled.predicate(target) is None
+        assert compiled.count_passed(target, [{}, {}]) == 2
+
+    @pytest.mark.parametrize('expr', ['download>500', '!download<500', 'download>500 & star>0', 'ansible>2.0'])
+    def test_missing_key(self, expr):
+        compiled = CompiledFilter([V1FilterEnum.parse(expr)])
+        objs = [role(501, 1, '2.4'), {}, role(502, 1, '2.4'), role(1, 1, '1.0')]
+        # The object without the value does not pass, but it does not end the order
+        assert compiled.filter(Target.ROLES, objs) == [objs[0], objs[2]]
+        assert compiled.count_passed(Target.ROLES, objs) == 3
+
+    def test_missing_key_reported_once(self, caplog):
+        compiled = CompiledFilter([V1FilterEnum.parse('fork>1')])
+        v1._missing_keys.discard('forks_count')
+        compiled.filter(Target.ROLES, [{}, {}, {}])
+        assert [r.message for r in caplog.records].count(
+            "Objects without the attribute 'forks_count' do not pass the filters.") == 1
+
+    @pytest.mark.parametrize(
+        'expr,target,expected', [
+            ('download>500', Target.ROLES, ({'download_count__gt': 500}, True)),
+            ('download>500.5', Target.REPOSITORIES, ({'download_count__gt': 500}, True)),
+            ('star>10', Target.ROLES, ({'repository__stargazers_count__gt': 10}, True)),
+            ('star>10', Target.REPOSITORIES, ({'stargazers_count__gt': 10}, True)),
+            ('download<500', Target.ROLES, ({'download_count__lte': 500}, True)),
+            ('download>500 & fork>3', Target.ROLES,
+             ({'download_count__gt': 500, 'repository__forks_count__gt': 3}, True)),
+            ('download>500 & ansible>2.5', Target.ROLES, ({'download_count__gt': 500}, False)),
+            ('download>500 & download>100', Target.ROLES, ({'download_count__gt': 500}, False)),
+            ('download>500 | star>10', Target.ROLES, ({}, False)),
+            ('!(download>500 & star>10)', Target.ROLES, ({}, False)),
+            ('!(download>500 & ansible>2.5)', Target.ROLES, ({}, False)),
+            ('download>500 & !star>10', Target.TAGS, ({}, True)),
+            ('ansible>2.5', Target.TAGS, ({}, True)),
+        ]
+    )
+    def test_to_query(self, expr, target, expected):
+        assert V1FilterEnum.parse(expr).to_query(target) == expected
+
+    @pytest.mark.parametrize(
+        'expr,target,ascending,objects,expected', [
+            ('download>5', Target.ROLES, False, [9, 7, 5, 8], 2),
+            ('download>5', Target.ROLES, True, [9, 7, 5, 8], None),
+            ('download<5', Target.ROLES, True, [1, 5, 6, 2], 2),
+            ('download>5 & star>3', Target.ROLES, False, [9, 7, 5, 8], 2),
+            ('download>5 | star>3', Target.ROLES, False, [9, 7, 5, 8], None),
+            ('download>5 | download<2', Target.ROLES, False, [9, 7, 5, 8], None),
+            ('!(download>5 & star>3)', Target.ROLES, True, [9, 7, 5, 8], None),
+            ('download>5', Target.TAGS, False, [9, 7, 5, 8], None),
+            ('star>5', Target.ROLES, False, [9, 7, 5, 8], None),
+        ]
+    )
+    def test_bound(self, expr, target, ascending, objects, expected):
+        compiled = bound([V1FilterEnum.parse(expr)], target, 'download_count', ascending)
+        if expected is None:
+            assert compiled is None
+        else:
+            objs = [{'download_count': c, 'stargazers_count': 0} for c in objects]
+            assert compiled.count_passed(target, objs) == expected
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from galaxy_crawler.models import v1 as models
+from galaxy_crawler.models.bulk import (
+    BulkWriter, MySQLLoadDataWriter, PostgresCopyWriter, encode, serial_columns, upsert_statement
+)
+from galaxy_crawler.models.errors import BulkLoadFailed
+
+
+class FakeCursor(object):
+
+    def __init__(self, copied: list):
+        self.copied = copied
+
+    def copy_expert(self, sql, buf):
+        self.copied.append((sql, buf.read()))
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+    """Connection of psycopg2, which is not required to build the input of COPY"""
+
+    def __init__(self):
+        from sqlalchemy.dialects import postgresql
+        self.dialect = postgresql.dialect()
+        self.copied = []
+        self.connection = self
+
+    def cursor(self):
+        return FakeCursor(self.copied)
+
+
+class FakeMySQLCursor(object):
+    """Cursor of pymysql which loads the given number of rows and reports the warnings"""
+
+    def __init__(self, loaded: int, warnings: list):
+        self.loaded = loaded
+        self.warnings = warnings
+        self.rowcount = -1
+        self.result = []
+        self.files = []
+
+    def execute(self, sql, args=None):
+        if sql.startswith("LOAD DATA"):
+            with open(args[0], encoding='utf-8') as f:
+                self.files.append(f.read())
+            self.rowcount = self.loaded
+        elif sql == "SHOW WARNINGS":
+            self.result = self.warnings
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeMySQLConnection(object):
+
+    def __init__(self, loaded: int, warnings: list):
+        from sqlalchemy.dialects import mysql
+        self.dialect = mysql.dialect()
+        self.cursor_ = FakeMySQLCursor(loaded, warnings)
+        self.connection = self
+
+    def cursor(self):
+        return self.cursor_
+
+
+class TestBulk(object):
+
+    @pytest.mark.parametrize(
+        "value, expected", [
+            (None, "\\N"),
+            (True, "t"),
+            (1, "1"),
+            ("a\tb\nc\\d\re", "a\\tb\\nc\\\\d\\re"),
+            (datetime(2019, 1, 23, 10, 0, tzinfo=timezone(timedelta(hours=9))), "2019-01-23 01:00:00"),
+            (datetime(2019, 1, 23, 10, 0), "2019-01-23 10:00:00"),
+        ]
+    )
+    def test_encode(self, value, expected):
+        assert encode(value) == expected
+
+    def test_serial_columns(self):
+        assert serial_columns(models.Role.__table__) == ["role_id"]
+        assert serial_columns(models.Tag.__table__) == []
+        assert serial_columns(models.TagAssociation.__table__) == []
+
+    def test_copy(self):
+        conn = FakeConnection()
+        writer = PostgresCopyWriter(conn)
+        writer.write(models.Tag.__table__, [{"tag_id": 1, "name": "a b", "active": None},
+                                            {"tag_id": 2, "name": "c\td", "active": False}])
+        writer.write(models.Tag.__table__, [])
+        assert conn.copied == [("COPY tags (tag_id, name, active) FROM STDIN", "1\ta b\t\\N\n2\tc\\td\tf\n")]
+        assert writer.stats() == "tags: 2"
+
+    @pytest.mark.parametrize(
+        "loaded, warnings, failed", [
+            (2, [], False),
+            (1, [("Warning", 1062, "Duplicate entry '1' for key 'PRIMARY'")], True),
+            (2, [("Warning", 1366, "Incorrect integer value: 'a' for column 'tag_id' at row 2")], True),
+        ]
+    )
+    def test_load_data(self, loaded, warnings, failed):
+        conn = FakeMySQLConnection(loaded, warnings)
+        writer = MySQLLoadDataWriter(conn)
+        rows = [{"tag_id": 1, "name": "a b", "active": True}, {"tag_id": 1, "name": "c", "active": None}]
+        if failed:
+            with pytest.raises(BulkLoadFailed) as e:
+                writer.write(models.Tag.__table__, rows)
+            assert warnings[0][2] in str(e.value)
+            assert writer.stats() == ""
+        else:
+            writer.write(models.Tag.__table__, rows)
+            assert writer.stats() == "tags: 2"
+        assert conn.cursor_.files == ["1\ta b\t1\n1\tc\t\\N\n"]
+
+    @pytest.mark.parametrize(
+        "dialect, table, expected", [
+            ("postgresql", models.Tag.__table__,
+             "ON CONFLICT (tag_id) DO UPDATE SET name = excluded.name, active = excluded.active"),
+            ("postgresql", models.TagAssociation.__table__, "ON CONFLICT (tag_id, role_id) DO NOTHING"),
+            ("mysql", models.Tag.__table__, "ON DUPLICATE KEY UPDATE name = VALUES(name), active = VALUES(active)"),
+            ("mysql", models.TagAssociation.__table__, "ON DUPLICATE KEY UPDATE tag_id = VALUES(tag_id)"),
+            ("sqlite", models.Tag.__table__, "INSERT OR REPLACE INTO tags"),
+        ]
+    )
+    def test_upsert_statement(self, dialect, table, expected):
+        from sqlalchemy.dialects import mysql, postgresql, sqlite
+        dialects = {"postgresql": postgresql, "mysql": mysql, "sqlite": sqlite}
+        columns = [c.name for c in table.columns if c.name not in ["created", "modified"]]
+        stmt = upsert_statement(table, dialect, columns)
+        sql = " ".join(str(stmt.compile(dialect=dialects[dialect].dialect())).split())
+        assert expected in sql
+
+    def test_upsert_and_sync(self):
+        from galaxy_crawler.models.engine import get_in_memory_database
+        e = get_in_memory_database()
+        models.BaseModel.metadata.create_all(e)
+        conn = e.connect()
+        writer = BulkWriter(conn)
+        writer.upsert(models.Tag.__table__, [{"tag_id": 1, "name": "a"}, {"tag_id": 2, "name": "b"}])
+        writer.upsert(models.Tag.__table__, [{"tag_id": 2, "name": "c"}])
+        assert conn.execute("SELECT tag_id, name FROM tags ORDER BY tag_id").fetchall() == [(1, "a"), (2, "c")]
+
+        table = models.TagAssociation.__table__
+        writer.write(table, [{"tag_id": 1, "role_id": 1}, {"tag_id": 2, "role_id": 1}, {"tag_id": 1, "role_id": 2}])
+        writer.sync(table, "role_id", [1, 3], [{"tag_id": 2, "role_id": 1}, {"tag_id": 2, "role_id": 3}])
+        rows = conn.execute("SELECT tag_id, role_id FROM tags_association ORDER BY role_id, tag_id").fetchall()
+        assert rows == [(2, 1), (1, 2), (2, 3)]
+        assert writer.stats() == "tags: 3, tags_association: 4 (deleted tags_association: 1)"
+        conn.close()
@@ -77,3 +77,21 @@ class TestRepositoryModel(ModelTestBase):
         assert repo.repository_id == repo_json['id']
         assert repo.provider_namespace.provider_namespace_id == \
             repo_json['summary_fields']['provider_namespace']['id']
+
+    @pytest.mark.parametrize("pn_ids, expected", [([1, 1, 2], [1, 1, None])])
+    def test_insert_many(self, pn_ids, expected):
+        sess = create_session(self.engine)
+        repo_jsons = []
+        for i, pn_id in enumerate(pn_ids):
+            repo_json = dict(
+                id=i + 1, name=f"test{i}", readme=None, readme_html=None, clone_url=None, issue_tracker_url=None,
+                external_url=None, commit=None, commit_url=None, commit_message=None, commit_created=None,
+                travis_build_url=None, travis_status_url=None, stargazers_count=0, watchers_count=0, forks_count=0,
+                open_issues_count=0, community_score=None, community_survey_count=None, quality_score=None,
+                quality_score_date=None, deprecated=False, created="2016-02-29T20:29:58.006066Z",
+                modified="2019-06-19T05:54:28.931393Z", summary_fields={"provider_namespace": {"id": pn_id}})
+            repo_jsons.append(repo_json)
+        repos = models.Repository.from_json_many(repo_jsons, sess)
+        sess.add_all(repos)
+        sess.commit()
+        assert [r.provider_namespace_id for r in repos] == expected
@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import or_
+from sqlalchemy import event, or_
 
 from galaxy_crawler.models import v1 as models
 
@@ -8,6 +8,28 @@ from .base import ModelTestBase, create_session, create_ns, \
     create_tag, create_repository
 
 
+def role_json(id_: int, tags: list, license_: str, versions: list) -> dict:
+    return {
+        "id": id_,
+        "summary_fields": {
+            "dependencies": [],
+            "namespace": {"id": 1, "name": "ns"},
+            "platforms": [{"name": "Ubuntu", "release": "bionic"}],
+            "repository": {"id": 1, "name": "test"},
+            "tags": tags,
+            "versions": [{"id": v, "name": f"1.0.{v}", "release_date": "2018-01-23T00:00:00Z"} for v in versions],
+        },
+        "created": "2014-01-23T00:00:00.000000Z",
+        "modified": "2019-01-23T01:23:45.000000Z",
+        "name": f"role{id_}",
+        "role_type": "ANS",
+        "min_ansible_version": "2.4",
+        "license": license_,
+        "description": "Test",
+        "download_count": 100,
+    }
+
+
 class TestRoleModel(ModelTestBase):
 
     def setup_method(self):
@@ -119,3 +141,86 @@ class TestRoleModel(ModelTestBase):
                {"Ubuntu"}
         assert {v.name for v in role.versions} == \
                {"1.0.0"}
+
+    def count_queries(self, func, *args):
+        statements = []
+
+        def listener(conn, cursor, statement, *a):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            result = func(*args)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+        return result, len(statements)
+
+    def test_lookup_cache(self):
+        sess = create_session(self.engine)
+        # Every lookup queries the database without the cache
+        tag, queries = self.count_queries(models.Tag.find_by_name, "web", sess)
+        assert tag.name == "web" and queries == 1
+        _, queries = self.count_queries(models.Tag.find_by_name, "web", sess)
+        assert queries == 1
+
+        cache = models.LookupCache.preload(sess)
+        assert models.LookupCache.of(sess) is cache
+        # Stored objects are hit in memory
+        cached, queries = self.count_queries(models.Tag.find_by_name, "web", sess)
+        assert cached is tag and queries == 0
+        tags, queries = self.count_queries(models.Tag.find_by_name, ["system", "unknown"], sess)
+        assert [t.name for t in tags] == ["system"] and queries == 0
+        platform, queries = self.count_queries(models.Platform.get_by_name, "Ubuntu", "bionic", sess)
+        assert platform.release == "bionic" and queries == 0
+        # A miss does not fall back to the database
+        missing, queries = self.count_queries(models.Platform.get_by_name, "Ubuntu", "xenial", sess)
+        assert missing is None and queries == 0
+        # A license created by the first lookup is found by the second one
+        created, queries = self.count_queries(models.License.get_or_create, "MIT", "MIT license", sess)
+        assert queries == 0 and created.license_id is None
+        found, queries = self.count_queries(models.License.get_or_create, "MIT", "MIT license", sess)
+        assert found is created and queries == 0
+
+        # The unsaved license is forgotten after the rollback
+        sess.rollback()
+        cache.discard_unsaved()
+        assert "MIT" not in cache.licenses
+        assert "web" in cache.tags
+        models.LookupCache.detach(sess)
+        assert models.LookupCache.of(sess) is None
+
+    def test_from_json_many(self):
+        sess = create_session(self.engine)
+        sess.add(models.License(name="MIT", description="MIT license"))
+        sess.add(models.RepositoryVersion(version_id=1, name="1.0.1", repository_id=1))
+        sess.commit()
+        stored_license = sess.query(models.License).filter_by(name="MIT").one()
+        stored_version = sess.query(models.RepositoryVersion).get(1)
+        page = [
+            role_json(1, ["development", "web"], "MIT", [1]),
+            role_json(2, ["system"], "license (BSD, MIT)", [2]),
+            role_json(3, ["web", "unknown"], "BSD", [2, 3]),
+        ]
+        roles = models.Role.from_json_many(page, sess)  # type: list
+        # The cache of the page is not left on the session
+        assert models.LookupCache.of(sess) is None
+        sess.add_all(roles)
+        sess.commit()
+
+        assert [r.role_id for r in roles] == [1, 2, 3]
+        assert all(r.namespace.name == "ns" and r.repository.name == "test" for r in roles)
+        assert all(r.role_type.name == "ANS" for r in roles)
+        assert all([(p.name, p.release) for p in r.platforms] == [("Ubuntu", "bionic")] for r in roles)
+        assert [sorted(t.name for t in r.tags) for r in roles] == [["development", "web"], ["system"], ["web"]]
+        assert [sorted(l.name for l in r.licenses) for r in roles] == [["MIT"], ["BSD", "MIT"], ["BSD"]]
+        assert [sorted(v.version_id for v in r.versions) for r in roles] == [[1], [2], [2, 3]]
+        # Stored rows are reused, and the new ones are shared among the roles of the page
+        assert roles[0].licenses[0] is stored_license
+        assert stored_license in roles[1].licenses
+        assert roles[0].versions[0] is stored_version
+        assert {t.tag_id for r in roles for t in r.tags} == {0, 1, 2}
+        assert sess.query(models.Tag).count() == 3
+        assert sess.query(models.License).count() == 2
+        assert sess.query(models.RepositoryVersion).count() == 3
+        assert sess.query(models.RoleType).count() == 1
+        assert sess.query(models.Platform).count() == 1
@@ -0,0 +1,56 @@
+import pytest
+
+from galaxy_crawler.queries.pagesize import PageSizeController, aligned_size
+
+
+@pytest.mark.parametrize(
+    "position,size,expected", [
+        (0, 100, 100),
+        (200, 100, 100),
+        (150, 100, 50),
+        (152, 100, 38),
+        (151, 100, 1),
+        (125, 12, 5),
+        (7, 6, 1),
+    ]
+)
+def test_aligned_size(position, size, expected):
+    assert aligned_size(position, size) == expected
+
+
+class TestPageSizeController(object):
+
+    def test_bisect_broken_object(self):
+        controller = PageSizeController(100)
+        # Broken object is the 70th of the failed page
+        position, broken, requested = 0, 70, []
+        while position <= broken:
+            size = controller.size
+            requested.append(size)
+            if position <= broken < position + size:
+                if not controller.failed():
+                    controller.skipped()
+                    position += 1
+                continue
+            controller.succeeded(size)
+            position += size
+        assert requested == [100, 50, 50, 25, 12, 12, 6, 6, 3, 1, 1, 1]
+        # The objects after the skipped one are obtained by full pages again
+        assert controller.size == controller.max_size
+        assert list(controller.history)[-2:] == [(1, "skip"), (100, "recover after skip")]
+
+    def test_transient_error(self):
+        controller = PageSizeController(100)
+        controller.failed()
+        controller.succeeded(50)
+        assert controller.size == 50
+        controller.succeeded(50)
+        assert controller.size == 100
+
+    def test_slow_response(self):
+        controller = PageSizeController(100, target_latency=5.0)
+        controller.succeeded(100, elapsed=8.0)
+        assert controller.size == 50
+        controller.succeeded(50, elapsed=1.0)
+        assert controller.size == 60
+        assert "100 -> 50 -> 60" in controller.summary()
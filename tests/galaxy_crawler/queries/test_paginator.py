@@ -1,6 +1,10 @@
+from urllib import parse
+
 import pytest
 
-from galaxy_crawler.queries.v1 import Paginator
+from galaxy_crawler.constants import Target
+from galaxy_crawler.queries.v1 import AdaptivePaginator, KeysetPaginator, Paginator, \
+    V1QueryBuilder, V1QueryOrder, paginator_from_dict
 
 
 class TestPaginator(object):
@@ -39,3 +43,148 @@ class TestPaginator(object):
                 break
             i += 1
         assert results == expected
+
+    @pytest.mark.parametrize(
+        "failed_at", [[], [1], [2, 3], [2, 4]]
+    )
+    def test_resume(self, failed_at):
+        paginator = Paginator(100)
+        expected = []
+        resumed = None
+        i = 0
+        while True:
+            if i in failed_at:
+                paginator.enter_failed_state()
+            page = paginator.next_page()
+            if i == 5:
+                resumed = Paginator.from_dict(paginator.to_dict())
+            if resumed is not None and i > 5:
+                expected.append(page)
+            if page == (10, 100):
+                break
+            i += 1
+        actual = []
+        while True:
+            page = resumed.next_page()
+            actual.append(page)
+            if page == (10, 100):
+                break
+        assert actual == expected
+
+
+def fake_crawl(paginator, ids: 'list', broken_ids: 'list', inserted: 'list' = None):
+    obtained = []
+    while True:
+        url = paginator.apply(V1QueryBuilder()).build(Target.TAGS)
+        query = {k: int(v[0]) for k, v in parse.parse_qs(parse.urlparse(url).query).items() if k != 'order_by'}
+        candidates = [i for i in sorted(ids) if i > query.get('id__gt', -1)]
+        start = (query['page'] - 1) * query['page_size']
+        page = candidates[start:start + query['page_size']]
+        if any(i in broken_ids for i in page):
+            if query['page_size'] == 1:
+                paginator.skip()
+            else:
+                paginator.enter_failed_state()
+            continue
+        rest = candidates[start + query['page_size']:]
+        data = {"next": "next" if len(rest) > 0 else None, "results": [{"id": i} for i in page]}
+        obtained.extend(page)
+        if inserted:
+            ids.append(inserted.pop())
+        if paginator.feed(data):
+            return obtained
+
+
+class TestKeysetPaginator(object):
+
+    @pytest.mark.parametrize(
+        "ids,broken_ids", [
+            (list(range(1, 251)), []),
+            (list(range(1, 251)), [150]),
+            (list(range(1, 251)), [150, 151, 30]),
+            ([i * 3 for i in range(1, 300)], [90, 93, 450]),
+            (list(range(1, 101)), [100]),
+        ]
+    )
+    def test_normal(self, ids, broken_ids):
+        assert fake_crawl(KeysetPaginator(100), ids, broken_ids) == [i for i in ids if i not in broken_ids]
+
+    def test_recover_after_skip(self):
+        paginator = KeysetPaginator(100)
+        fake_crawl(paginator, list(range(1, 1001)), [40])
+        sizes = [size for size, _ in paginator.controller.history]
+        assert min(sizes) == 1
+        assert sizes[-1] == 100
+
+    def test_inserted_during_crawl(self):
+        ids = list(range(1, 201))
+        obtained = fake_crawl(KeysetPaginator(100), ids, [], inserted=[201])
+        assert obtained == list(range(1, 202))
+
+    def test_resume(self):
+        paginator = KeysetPaginator(100, last_id=30)
+        paginator.enter_failed_state()
+        paginator.feed({"next": "next", "results": [{"id": i} for i in range(31, 81)]})
+        resumed = paginator_from_dict(paginator.to_dict())
+        assert isinstance(resumed, KeysetPaginator)
+        assert resumed.to_dict() == paginator.to_dict()
+        assert resumed.page_size == 50
+
+    @pytest.mark.parametrize(
+        "target,order,ascending_order,expected", [
+            (Target.ROLES, V1QueryOrder.ID, True, True),
+            (Target.TAGS, V1QueryOrder.ID, True, True),
+            (Target.PROVIDERS, V1QueryOrder.ID, True, False),
+            (Target.ROLES, V1QueryOrder.DOWNLOAD, True, False),
+            (Target.ROLES, V1QueryOrder.ID, False, False),
+        ]
+    )
+    def test_supports(self, target, order, ascending_order, expected):
+        assert KeysetPaginator.supports(target, order, ascending_order) is expected
+
+
+class TestAdaptivePaginator(object):
+
+    @pytest.mark.parametrize(
+        "n_items,broken_ids", [
+            (250, []),
+            (250, [150]),
+            (250, [150, 151, 30]),
+            (1000, [3, 555, 999]),
+        ]
+    )
+    def test_normal(self, n_items, broken_ids):
+        ids = list(range(n_items))
+        assert fake_crawl(AdaptivePaginator(100), ids, broken_ids) == [i for i in ids if i not in broken_ids]
+
+    def test_aligned_pages(self):
+        paginator = AdaptivePaginator(100, current=150)
+        url = paginator.apply(V1QueryBuilder()).build(Target.TAGS)
+        query = parse.parse_qs(parse.urlparse(url).query)
+        assert (query['page'], query['page_size']) == (['4'], ['50'])
+
+    def test_recover_after_skip_at_prime_offset(self):
+        paginator = AdaptivePaginator(100)
+        sizes = []
+        apply = paginator.apply
+
+        def record(query_builder):
+            applied = apply(query_builder)
+            sizes.append((paginator.current_position, paginator.page_size))
+            return applied
+
+        paginator.apply = record
+        # The position after the broken object is 131, which no page size but 1 divides
+        assert fake_crawl(paginator, list(range(1000)), [130]) == [i for i in range(1000) if i != 130]
+        resumed = sizes[sizes.index((131, 1)):]
+        # Pages fill the gap up to the next multiple of the size, and full pages follow
+        assert resumed[:4] == [(131, 1), (132, 66), (198, 2), (200, 100)]
+        assert all(size == 100 for _, size in resumed[3:])
+
+    def test_resume(self):
+        paginator = AdaptivePaginator(100)
+        paginator.apply(V1QueryBuilder())
+        paginator.enter_failed_state()
+        resumed = paginator_from_dict(paginator.to_dict())
+        assert isinstance(resumed, AdaptivePaginator)
+        assert resumed.to_dict() == paginator.to_dict()
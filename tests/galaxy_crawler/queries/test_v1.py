@@ -0,0 +1,33 @@
+from urllib import parse
+
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.filters.v1 import V1FilterEnum
+from galaxy_crawler.queries.v1 import V1QueryBuilder, V1QueryOrder
+
+
+def build_query(builder: 'V1QueryBuilder', target: 'Target') -> 'dict':
+    url = builder.order_by(V1QueryOrder.DOWNLOAD, False).set_page((1, 10)).build(target)
+    return {k: v[-1] for k, v in parse.parse_qs(parse.urlparse(url).query).items()}
+
+
+class TestV1QueryBuilder(object):
+
+    @pytest.mark.parametrize(
+        'exprs,target,expected', [
+            ([], Target.ROLES, {}),
+            (['download>500'], Target.ROLES, {'download_count__gt': '500'}),
+            (['download>500', 'star>10'], Target.ROLES,
+             {'download_count__gt': '500', 'repository__stargazers_count__gt': '10'}),
+            (['download>500 | star>10'], Target.ROLES, {}),
+            (['download>500'], Target.TAGS, {}),
+        ]
+    )
+    def test_filter_by(self, exprs, target, expected):
+        builder = V1QueryBuilder().filter_by([V1FilterEnum.parse(e) for e in exprs])
+        query = build_query(builder, target)
+        lookups = {k: v for k, v in query.items() if k not in ['page', 'page_size', 'order_by']}
+        assert lookups == expected
+        # Filters are kept after the query is initialized
+        assert build_query(builder, target) == query
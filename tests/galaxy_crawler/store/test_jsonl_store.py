@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.models.utils import iter_json, JsonStream
+from galaxy_crawler.store import JsonDataStore, JsonLinesDataStore
+
+
+def tags(start: int, stop: int) -> 'list':
+    return [{"id": i, "name": f"tag{i}"} for i in range(start, stop)]
+
+
+class TestJsonLinesDataStore(object):
+
+    @pytest.mark.parametrize(
+        "max_records,max_bytes,expected_shards", [
+            (100, 1024 * 1024, 1),
+            (10, 1024 * 1024, 3),
+            (100, 100, 7),
+        ]
+    )
+    def test_rotate(self, tmp_path, max_records, max_bytes, expected_shards):
+        store = JsonLinesDataStore(tmp_path, max_records=max_records, max_bytes=max_bytes)
+        store.save(Target.TAGS, tags(1, 16))
+        store.save(Target.TAGS, tags(16, 26), commit=True)
+        store.close()
+        assert len(list((tmp_path / "tags").glob("*.jsonl"))) == expected_shards
+        assert [t["id"] for t in iter_json(tmp_path / "tags")] == list(range(1, 26))
+
+    def test_resume(self, tmp_path):
+        store = JsonLinesDataStore(tmp_path)
+        store.save(Target.TAGS, tags(1, 3), commit=True)
+        state = store.get_state()
+        store.save(Target.TAGS, tags(3, 5))
+        store.close()
+        # Killed while writing the last line
+        with (tmp_path / "tags" / "tags_0.jsonl").open('a') as fp:
+            fp.write('{"id": 5, "na')
+
+        resumed = JsonLinesDataStore(tmp_path)
+        resumed.restore_state(json.loads(json.dumps(state)))
+        resumed.save(Target.TAGS, tags(5, 7))
+        resumed.close()
+        assert (tmp_path / "tags" / "tags_1.jsonl").exists()
+        assert [t["id"] for t in iter_json(tmp_path / "tags")] == list(range(1, 7))
+
+
+class TestJsonStream(object):
+
+    def test_json_files(self, tmp_path):
+        store = JsonDataStore(tmp_path)
+        for i in range(12):
+            store.save(Target.TAGS, tags(i * 2, i * 2 + 2), commit=True)
+        stream = JsonStream(tmp_path / "tags")
+        # Sorted by the index of the files, and can be iterated twice
+        assert [t["id"] for t in stream] == list(range(24))
+        assert len(list(stream)) == 24
+
+    def test_not_exists(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            list(JsonStream(tmp_path / "tags"))
@@ -0,0 +1,85 @@
+import pytest
+
+from galaxy_crawler.compression import get_codec
+from galaxy_crawler.constants import Target
+from galaxy_crawler.store import ParquetDataStore
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def role_json(id_: int) -> dict:
+    return {
+        "id": id_,
+        "summary_fields": {
+            "dependencies": [id_ - 1] if id_ > 1 else [],
+            "namespace": {"id": 1, "name": "ns"},
+            "platforms": [{"name": "Ubuntu", "release": "bionic"}],
+            "repository": {"id": id_, "name": "test"},
+            "tags": ["development"],
+            "versions": [],
+        },
+        "created": "2014-01-23T00:00:00.000000Z",
+        "modified": "2019-01-23T01:23:45.000000Z",
+        "name": f"test{id_}",
+        "role_type": "ANS",
+        "min_ansible_version": "2.4",
+        "license": "MIT",
+        "description": "Test",
+        "download_count": 100 * id_,
+        "readme": "Not stored",
+    }
+
+
+class TestParquetDataStore(object):
+
+    def test_schema(self, tmp_path):
+        store = ParquetDataStore(tmp_path)
+        schema = store._schema(Target.ROLES)
+        assert schema.field("role_id").type == pa.int64()
+        assert schema.field("created").type == pa.timestamp('us', tz='UTC')
+        assert schema.field("role_type").type == pa.string()
+        assert schema.field("tags").type == pa.list_(pa.string())
+        assert "readme" not in schema.names
+
+    @pytest.mark.parametrize("codec", ["none", "gzip", "zstd"])
+    def test_save(self, tmp_path, codec):
+        store = ParquetDataStore(tmp_path, codec=get_codec(codec))
+        store.save(Target.ROLES, [role_json(i) for i in range(1, 4)], commit=True)
+        store.save(Target.ROLES, [role_json(i) for i in range(4, 6)])
+        store.commit()
+        store.commit()
+        parts = sorted(f.name for f in (tmp_path / "roles").iterdir())
+        assert parts == ["roles_0.parquet", "roles_1.parquet"]
+
+        table = pq.ParquetDataset([str(tmp_path / "roles" / p) for p in parts]).read(
+            columns=["role_id", "download_count", "namespace_id", "dependencies"])
+        assert table.column("role_id").to_pylist() == [1, 2, 3, 4, 5]
+        assert table.column("download_count").to_pylist() == [100, 200, 300, 400, 500]
+        assert table.column("namespace_id").to_pylist() == [1] * 5
+        assert table.column("dependencies").to_pylist() == [[], [1], [2], [3], [4]]
+
+    def test_missing_fields(self, tmp_path):
+        store = ParquetDataStore(tmp_path)
+        store.save(Target.TAGS, [{"id": 1, "name": "tag1"}], commit=True)
+        table = pq.read_table(str(tmp_path / "tags" / "tags_0.parquet"))
+        assert table.column("created").to_pylist() == [None]
+
+    def test_resume(self, tmp_path):
+        store = ParquetDataStore(tmp_path)
+        store.save(Target.TAGS, [{"id": 1, "name": "tag1"}], commit=True)
+        resumed = ParquetDataStore(tmp_path)
+        resumed.restore_state({})
+        resumed.save(Target.TAGS, [{"id": 2, "name": "tag2"}], commit=True)
+        assert (tmp_path / "tags" / "tags_1.parquet").exists()
+
+    def test_fractional_score(self, tmp_path):
+        store = ParquetDataStore(tmp_path)
+        assert store._schema(Target.REPOSITORIES).field("community_score").type == pa.float64()
+        repo = {"id": 1, "name": "test", "community_score": 3.69565217391304, "quality_score": 5.0,
+                "community_survey_count": 6, "summary_fields": {"provider_namespace": {"id": 1}}}
+        store.save(Target.REPOSITORIES, [repo], commit=True)
+        table = pq.read_table(str(tmp_path / "repositories" / "repositories_0.parquet"))
+        assert table.column("community_score").to_pylist() == [3.69565217391304]
+        assert table.column("quality_score").to_pylist() == [5.0]
+        assert table.column("community_survey_count").to_pylist() == [6]
@@ -0,0 +1,166 @@
+import pytest
+from sqlalchemy import event
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.models import engine
+from galaxy_crawler.models.errors import JSONParseFailed
+from galaxy_crawler.models import v1 as models
+from galaxy_crawler.store import RDBStore
+
+from ..models.v1.base import create_ns, create_platform, create_provider, create_provider_ns, \
+    create_repository, create_tag
+
+
+def tag_json(id_: int) -> dict:
+    return {
+        "id": id_,
+        "name": f"tag{id_}",
+        "active": True,
+        "created": "2018-01-23T10:00:00.000000Z",
+        "modified": "2018-01-23T10:01:23.456789Z",
+    }
+
+
+def role_json(id_: int) -> dict:
+    return {
+        "id": id_,
+        "summary_fields": {
+            "dependencies": [],
+            "namespace": {"id": 1, "name": "ns"},
+            "platforms": [{"name": "Ubuntu", "release": "bionic"}],
+            "repository": {"id": 1, "name": "test"},
+            "tags": ["tag1"],
+            "versions": [],
+        },
+        "created": "2014-01-23T00:00:00.000000Z",
+        "modified": "2019-01-23T01:23:45.000000Z",
+        "name": f"role{id_}",
+        "role_type": "ANS",
+        "min_ansible_version": "2.4",
+        "license": "MIT",
+        "description": "Test",
+        "download_count": 100,
+    }
+
+
+def repository_json(id_: int, provider_ns_id: int) -> dict:
+    return {
+        "id": id_,
+        "summary_fields": {
+            "provider_namespace": {"id": provider_ns_id, "name": "test"},
+        },
+        "created": "2016-02-29T20:29:58.006066Z",
+        "modified": "2019-06-19T05:54:28.931393Z",
+        "name": f"repo{id_}",
+        "original_name": f"ansible-role-repo{id_}",
+        "description": "Test",
+        "format": "role",
+        "import_branch": "master",
+        "is_enabled": True,
+        "commit": "b380413513177006b9641fd7ff960ea7d1051942",
+        "commit_message": "test",
+        "commit_url": "https://example.com/commit_url",
+        "commit_created": "2019-05-16T23:15:02-04:00",
+        "stargazers_count": 10,
+        "watchers_count": 0,
+        "forks_count": 1,
+        "open_issues_count": 14,
+        "download_count": 1,
+        "travis_build_url": "",
+        "travis_status_url": "",
+        "clone_url": "https://github.com/ns/test",
+        "external_url": "https://github.com/ns/test",
+        "issue_tracker_url": "https://github.com/ns/test/issues",
+        "readme": None,
+        "readme_html": None,
+        "download_url": "https://github.com/ns/test/archive/1.0.0.tar.gz",
+        "deprecated": False,
+        "community_score": 3.5,
+        "quality_score": 5.0,
+        "quality_score_date": "2019-06-13T19:29:09.123917-04:00",
+        "community_survey_count": 6,
+    }
+
+
+class TestRDBStore(object):
+
+    def setup_method(self):
+        self.engine = engine.get_in_memory_database()
+        self.store = RDBStore(self.engine)
+
+    def teardown_method(self):
+        self.store.drop_tables()
+
+    def count(self, model_class) -> int:
+        return self.store.session().query(model_class).count()
+
+    @pytest.mark.parametrize("batch", [True, False])
+    def test_save(self, batch):
+        self.store.batch = batch
+        assert self.store.save(Target.TAGS, [tag_json(i) for i in range(1, 11)]) == 10
+        assert self.count(models.Tag) == 10
+        tag = self.store.session().query(models.Tag).get(3)
+        assert tag.name == "tag3"
+
+    def test_fallback(self):
+        self.store.save(Target.TAGS, [tag_json(2)])
+        # The existing tag fails the batch, and the others are saved one by one
+        assert self.store.save(Target.TAGS, [tag_json(i) for i in range(1, 5)]) == 3
+        assert self.count(models.Tag) == 4
+
+    def test_invalid_object(self):
+        broken = tag_json(2)
+        del broken["name"]
+        with pytest.raises(JSONParseFailed):
+            self.store.save(Target.TAGS, [tag_json(1), broken])
+        # Objects before the broken one are saved one by one
+        assert self.count(models.Tag) == 1
+
+    def create_related(self):
+        session = self.store.session()
+        create_provider(session)
+        create_ns(session)
+        create_provider_ns(session)
+        create_repository(session)
+        create_platform(session)
+        create_tag(session, 1, "tag1")
+        session.commit()
+
+    @pytest.mark.parametrize("batch", [True, False])
+    def test_unknown_provider_namespace(self, batch):
+        self.store.batch = batch
+        session = self.store.session()
+        create_provider(session)
+        create_ns(session)
+        create_provider_ns(session)
+        session.commit()
+        repos = [repository_json(1, 1), repository_json(2, 2), repository_json(3, 1)]
+        assert self.store.save(Target.REPOSITORIES, repos) == 3
+        # The provider namespace not stored yet is resolved to None as `from_json` does
+        stored = {r.repository_id: r.provider_namespace_id for r in session.query(models.Repository)}
+        assert stored == {1: 1, 2: None, 3: 1}
+
+    def test_save_related(self):
+        self.create_related()
+        assert self.store.save(Target.ROLES, [role_json(i) for i in range(1, 4)]) == 3
+        roles = self.store.session().query(models.Role).all()
+        assert [r.role_id for r in roles] == [1, 2, 3]
+        assert all([t.name for t in r.tags] == ["tag1"] for r in roles)
+
+    def test_queries_per_page(self):
+        self.create_related()
+        selects = []
+
+        def listener(conn, cursor, statement, *args):
+            if statement.startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", listener)
+        assert self.store.save(Target.ROLES, [role_json(i) for i in range(1, 3)]) == 2
+        small = len(selects)
+        selects.clear()
+        assert self.store.save(Target.ROLES, [role_json(i) for i in range(3, 23)]) == 20
+        event.remove(self.engine, "before_cursor_execute", listener)
+        # The related objects are found by a query for each kind regardless of the size of the page
+        assert len(selects) == small
+        assert self.count(models.License) == 1
@@ -0,0 +1,37 @@
+import sqlite3
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.load import get_object_stream
+from galaxy_crawler.store import SqliteDataStore
+
+
+def tag(id_: int, modified: str = "2019-01-01T00:00:00Z") -> dict:
+    return {"id": id_, "name": f"tag{id_}", "modified": modified}
+
+
+class TestSqliteDataStore(object):
+
+    def test_upsert(self, tmp_path):
+        store = SqliteDataStore(tmp_path)
+        store.save(Target.TAGS, [tag(2), tag(1)], commit=True)
+        store.close()
+        # Crawled again
+        store = SqliteDataStore(tmp_path)
+        store.save(Target.TAGS, [tag(2, "2019-02-01T00:00:00Z"), tag(3)])
+        store.close()
+
+        conn = sqlite3.connect(str(tmp_path / SqliteDataStore.file_name))
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        rows = conn.execute("SELECT id, modified FROM tags ORDER BY id").fetchall()
+        assert rows == [(1, "2019-01-01T00:00:00Z"), (2, "2019-02-01T00:00:00Z"), (3, "2019-01-01T00:00:00Z")]
+        conn.close()
+
+    def test_stream(self, tmp_path):
+        store = SqliteDataStore(tmp_path)
+        store.save(Target.TAGS, [tag(3), tag(1), tag(2)], commit=True)
+        store.close()
+        for source in [tmp_path, tmp_path / SqliteDataStore.file_name]:
+            stream = get_object_stream(source, Target.TAGS.value)
+            assert [t["id"] for t in stream] == [1, 2, 3]
+            assert [t["name"] for t in stream] == ["tag1", "tag2", "tag3"]
+            assert get_object_stream(source, Target.ROLES.value) is None
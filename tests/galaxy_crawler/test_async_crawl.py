@@ -0,0 +1,108 @@
+import threading
+from queue import Queue
+from urllib import parse
+
+import pytest
+
+from galaxy_crawler.async_crawl import AsyncCrawler, TargetPages
+from galaxy_crawler.constants import Target
+from galaxy_crawler.queries.v1 import V1QueryBuilder, V1QueryOrder
+
+
+def fake_api(n_items: int, broken_ids: 'list', forbidden_pages: 'list' = None):
+    def fetch(target, url: str):
+        query = parse.parse_qs(parse.urlparse(url).query)
+        page = int(query['page'][0])
+        page_size = int(query['page_size'][0])
+        if page in (forbidden_pages or []):
+            return 403, None, 0
+        start = (page - 1) * page_size
+        if start >= n_items:
+            return 404, None, 0
+        ids = list(range(start, min(start + page_size, n_items)))
+        if any(i in broken_ids for i in ids):
+            return 500, None, 0
+        next_url = None if ids[-1] == n_items - 1 else "next"
+        return 200, {"next": next_url, "results": [{"id": i} for i in ids]}, 0
+    return fetch
+
+
+class TestTargetPages(object):
+
+    @pytest.mark.parametrize(
+        "page,page_size,expected", [
+            (1, 100, [(i, 10) for i in range(1, 11)]),
+            (3, 100, [(i, 10) for i in range(21, 31)]),
+            (12, 10, [(i, 1) for i in range(111, 121)]),
+        ]
+    )
+    def test_split(self, page, page_size, expected):
+        assert TargetPages().split(page, page_size) == expected
+
+
+class TestAsyncCrawler(object):
+
+    @pytest.mark.parametrize(
+        "n_items,broken_ids,concurrency", [
+            (250, [], 1),
+            (250, [], 4),
+            (300, [], 8),
+            (250, [150], 4),
+            (250, [150, 151, 30], 3),
+        ]
+    )
+    def test_crawl(self, n_items, broken_ids, concurrency):
+        queue = Queue()
+        crawler = AsyncCrawler(
+            [Target.TAGS, Target.PLATFORMS],
+            V1QueryBuilder(),
+            V1QueryOrder.ID,
+            queue,
+            wait_interval=0,
+            concurrency=concurrency,
+        )
+        crawler.fetch = fake_api(n_items, broken_ids)
+        crawler.run()
+        results = {t: [] for t in [Target.TAGS, Target.PLATFORMS]}
+        while not queue.empty():
+            resp = queue.get()
+            results[resp.target].extend(r['id'] for r in resp.response['results'])
+        expected = [i for i in range(n_items) if i not in broken_ids]
+        for ids in results.values():
+            assert sorted(ids) == expected
+
+    def test_stop_at_failed_page(self):
+        queue = Queue()
+        crawler = AsyncCrawler([Target.TAGS, Target.PLATFORMS], V1QueryBuilder(), V1QueryOrder.ID, queue,
+                               wait_interval=0, concurrency=1)
+        crawler.fetch = fake_api(500, [], forbidden_pages=[3])
+        crawler.run()
+        assert crawler.stopped
+        responses = []
+        while not queue.empty():
+            responses.append(queue.get())
+        assert {r.target for r in responses} == {Target.TAGS}
+        # The failed page is not regarded as obtained, and no target is finished
+        assert all(r.state["current"] <= 200 for r in responses)
+        assert all("finished" not in r.state for r in responses)
+
+    def test_emit_off_the_loop(self):
+        queue = Queue()
+        crawler = AsyncCrawler([Target.TAGS], V1QueryBuilder(), V1QueryOrder.ID, queue,
+                               wait_interval=0, concurrency=4)
+        crawler.fetch = fake_api(500, [])
+        threads = []
+        emit = crawler.emit
+
+        def recording_emit(response):
+            threads.append(threading.current_thread())
+            return emit(response)
+
+        crawler.emit = recording_emit
+        crawler.run()
+        # The blocking put on the queue does not stall the event loop on this thread
+        assert len(threads) == 6
+        assert threading.current_thread() not in threads
+        states = [queue.get().state for _ in range(6)]
+        assert [s["current"] for s in states[:-1]] == sorted(s["current"] for s in states[:-1])
+        assert states[-1] == {"finished": True}
@@ -0,0 +1,84 @@
+import pytest
+
+from galaxy_crawler.async_crawl import TargetPages
+from galaxy_crawler.checkpoint import Checkpoint
+from galaxy_crawler.constants import Target
+from galaxy_crawler.queries.v1 import Paginator
+from galaxy_crawler.store import JsonDataStore
+
+
+targets = [Target.PROVIDERS, Target.TAGS, Target.PLATFORMS, Target.ROLES]
+
+
+class TestCheckpoint(object):
+
+    def test_commit_and_load(self, tmp_path):
+        store = JsonDataStore(tmp_path)
+        store.save(Target.TAGS, [{"id": 1}])
+        store.commit()
+        paginator = Paginator(100)
+        paginator.next_page()
+        paginator.enter_failed_state()
+        paginator.next_page()
+        Checkpoint(tmp_path).commit({Target.TAGS: paginator.to_dict()}, [store])
+
+        loaded = Checkpoint(tmp_path).load()
+        assert loaded.get_position(Target.TAGS) == paginator.to_dict()
+        assert loaded.get_position(Target.ROLES) is None
+        resumed_store = JsonDataStore(tmp_path)
+        loaded.restore_stores([resumed_store])
+        resumed_store.save(Target.TAGS, [{"id": 2}])
+        resumed_store.commit()
+        assert sorted(f.name for f in (tmp_path / "tags").iterdir()) == ["tags_0.json", "tags_1.json"]
+
+    def test_never_overwrite_existing_shards(self, tmp_path):
+        store = JsonDataStore(tmp_path)
+        for i in range(3):
+            store.save(Target.ROLES, [{"id": i}])
+            store.commit()
+        # Shards committed after the last checkpoint are also kept
+        resumed_store = JsonDataStore(tmp_path)
+        resumed_store.restore_state({"counter": {"roles": 1}})
+        assert resumed_store.counter.get_count("roles") == 3
+
+    @pytest.mark.parametrize(
+        "positions,expected_targets", [
+            ({}, targets),
+            ({"tags": {}}, targets),
+            ({"providers": {"finished": True}, "tags": {}}, targets[1:]),
+            ({"providers": {"finished": True}, "platforms": {"finished": True}},
+             [Target.TAGS, Target.ROLES]),
+            ({t.value: {"finished": True} for t in targets}, []),
+        ]
+    )
+    def test_resume_point(self, tmp_path, positions, expected_targets):
+        checkpoint = Checkpoint(tmp_path)
+        checkpoint.positions = positions
+        remaining, resumed_positions = checkpoint.resume_point(targets)
+        assert remaining == expected_targets
+        assert {t.value for t in resumed_positions.keys()} <= set(positions.keys())
+
+
+class TestTargetPagesPosition(object):
+
+    def test_out_of_order(self):
+        pages = TargetPages()
+        first, second, third = pages.pop(), pages.pop(), pages.pop()
+        pages.complete(*third)
+        assert pages.position()["current"] == 0
+        splits = pages.split(*first)
+        pages.complete(*second)
+        assert pages.position()["current"] == 0
+        for p in splits:
+            pages.complete(*p)
+        assert pages.position()["current"] == 300
+
+    def test_from_paginator_position(self):
+        paginator = Paginator(100)
+        paginator.next_page()
+        paginator.next_page()
+        paginator.enter_failed_state()
+        paginator.next_page()
+        pages = TargetPages.from_position(paginator.to_dict())
+        # The failed window starts from the 2nd page
+        assert pages.pop() == (2, 100)
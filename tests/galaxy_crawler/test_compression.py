@@ -0,0 +1,87 @@
+import pytest
+
+from galaxy_crawler import compression
+from galaxy_crawler.compression import get_codec, GzipCodec, ZstdCodec
+from galaxy_crawler.constants import Target
+from galaxy_crawler.models.utils import JsonStream
+from galaxy_crawler.store import JsonDataStore, JsonLinesDataStore
+
+
+def tags(start: int, stop: int) -> 'list':
+    return [{"id": i, "name": f"tag{i}", "description": "a tag which appears many times"} for i in range(start, stop)]
+
+
+def codecs() -> 'list':
+    params = ["none", "gzip"]
+    if compression.zstandard is not None:
+        params.append("zstd")
+    return params
+
+
+class TestCodec(object):
+
+    def test_fallback(self, monkeypatch):
+        monkeypatch.setattr(compression, "zstandard", None)
+        assert isinstance(get_codec("zstd", 19), GzipCodec)
+        assert get_codec("zstd").level == GzipCodec.default_level
+
+    @pytest.mark.parametrize(
+        "name,level", [
+            ("gzip", 10),
+            ("gzip", -1),
+            ("lzma", None),
+        ]
+    )
+    def test_invalid(self, name, level):
+        with pytest.raises(ValueError):
+            get_codec(name, level)
+
+    def test_zstd(self):
+        pytest.importorskip("zstandard")
+        assert isinstance(get_codec("zstd"), ZstdCodec)
+
+
+class TestCompressedStore(object):
+
+    @pytest.mark.parametrize("name", codecs())
+    def test_json(self, tmp_path, name):
+        store = JsonDataStore(tmp_path, codec=get_codec(name))
+        for i in range(3):
+            store.save(Target.TAGS, tags(i * 100, i * 100 + 100), commit=True)
+        files = sorted(f.name for f in (tmp_path / "tags").iterdir())
+        assert files == [f"tags_{i}.json{get_codec(name).suffix}" for i in range(3)]
+        if name != "none":
+            assert store.stats.bytes_out < store.stats.bytes_in
+
+        stream = JsonStream(tmp_path / "tags")
+        assert [t["id"] for t in stream] == list(range(300))
+        assert stream.stats.bytes_in == store.stats.bytes_out
+        assert stream.stats.bytes_out == store.stats.bytes_in
+
+    @pytest.mark.parametrize("name", codecs())
+    def test_jsonl(self, tmp_path, name):
+        store = JsonLinesDataStore(tmp_path, max_records=100, codec=get_codec(name))
+        store.save(Target.TAGS, tags(0, 150), commit=True)
+        store.save(Target.TAGS, tags(150, 250))
+        store.close()
+        assert len(list((tmp_path / "tags").glob(f"*.jsonl{get_codec(name).suffix}"))) == 3
+
+        resumed = JsonLinesDataStore(tmp_path, codec=get_codec(name))
+        resumed.restore_state(store.get_state())
+        resumed.save(Target.TAGS, tags(250, 260))
+        resumed.close()
+
+        stream = JsonStream(tmp_path / "tags")
+        assert [t["id"] for t in stream] == list(range(260))
+        assert stream.stats.bytes_out == store.stats.bytes_in + resumed.stats.bytes_in
+
+    def test_truncated(self, tmp_path):
+        store = JsonLinesDataStore(tmp_path, codec=get_codec("gzip"))
+        store.save(Target.TAGS, tags(0, 10), commit=True)
+        store.save(Target.TAGS, tags(10, 20), commit=True)
+        # Killed before the end of the stream is written
+        shard = tmp_path / "tags" / "tags_0.jsonl.gz"
+        store._shards.clear()
+        data = shard.read_bytes()
+        shard.write_bytes(data[:-3])
+        assert [t["id"] for t in JsonStream(tmp_path / "tags")][:10] == list(range(10))
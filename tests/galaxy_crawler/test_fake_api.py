@@ -0,0 +1,119 @@
+import pytest
+
+from galaxy_crawler.cassette import Cassette, RecordingAdapter, ReplayAdapter
+from galaxy_crawler.constants import Target
+from galaxy_crawler.async_crawl import AsyncCrawler
+from galaxy_crawler.crawl import Crawler
+from galaxy_crawler.fake_api import FakeGalaxyAPI
+from galaxy_crawler.filters.v1 import V1FilterEnum
+from galaxy_crawler.parser import ResponseParser
+from galaxy_crawler.queries.v1 import V1QueryBuilder, V1QueryOrder
+from galaxy_crawler.response_queue import ResponseQueue
+from galaxy_crawler.store import JsonDataStore
+from galaxy_crawler.models.utils import concat_json
+from galaxy_crawler.transport import Transport
+
+
+def objects(n_tags: int = 250) -> 'dict':
+    return {
+        Target.TAGS: [{"id": i, "name": f"tag{i}", "modified": f"2019-01-{i % 28 + 1:02d}T00:00:00Z",
+                       "download_count": i}
+                      for i in range(1, n_tags + 1)],
+        Target.PROVIDERS: [{"id": 1, "name": "GitHub"}],
+    }
+
+
+def crawl(api_url: str, output_dir, adapter=None) -> 'dict':
+    queue = ResponseQueue()
+    crawler = Crawler(
+        [Target.PROVIDERS, Target.TAGS],
+        V1QueryBuilder(base_url=api_url),
+        V1QueryOrder.ID,
+        queue,
+        wait_interval=0,
+        transport=Transport(retry=0, adapter=adapter),
+    )
+    parser = ResponseParser(queue, [JsonDataStore(output_dir)], [])
+    parser.start()
+    crawler.run()
+    queue.close()
+    parser.join()
+    return {t: [i["id"] for i in concat_json(output_dir / t.value)] for t in [Target.PROVIDERS, Target.TAGS]}
+
+
+class TestFakeGalaxyAPI(object):
+
+    @pytest.mark.parametrize(
+        "query,expected_status,expected_ids", [
+            ({"page": "1", "page_size": "3"}, 200, [1, 2, 3]),
+            ({"page": "2", "page_size": "100"}, 200, list(range(101, 201))),
+            ({"page": "4", "page_size": "100"}, 404, None),
+            ({"page": "1", "page_size": "3", "id__gt": "247"}, 200, [248, 249, 250]),
+            ({"page": "1", "page_size": "2", "order_by": "-id"}, 200, [250, 249]),
+            ({"page": "1", "page_size": "2", "order_by": "-modified", "modified__gt": "2019-01-27T00:00:00Z"},
+             200, [27, 55]),
+            ({"page": "1", "page_size": "10", "id__gt": "5"}, 500, None),
+            ({"page": "1", "page_size": "10", "download_count__gt": "247"}, 200, [248, 249, 250]),
+            ({"page": "1", "page_size": "3", "download_count__lte": "3", "order_by": "-id"}, 200, [3, 2, 1]),
+        ]
+    )
+    def test_respond(self, query, expected_status, expected_ids):
+        api = FakeGalaxyAPI(objects(), broken_ids={10})
+        status, body = api.respond("/api/v1/tags/", query)
+        assert status == expected_status
+        if expected_ids is not None:
+            assert [i["id"] for i in body["results"]][:len(expected_ids)] == expected_ids
+
+    def test_record_and_replay(self, tmp_path):
+        with FakeGalaxyAPI(objects(), broken_ids={42}, error_rate=0.05) as api:
+            recorded = crawl(api.url, tmp_path / "recorded", RecordingAdapter(Cassette(tmp_path / "cassette")))
+        assert recorded[Target.TAGS] == [i for i in range(1, 251) if i != 42]
+        assert recorded[Target.PROVIDERS] == [1]
+
+        # The server is no longer running
+        replayed = crawl(api.url, tmp_path / "replayed", ReplayAdapter(Cassette(tmp_path / "cassette")))
+        assert replayed == recorded
+
+        served = FakeGalaxyAPI.from_cassette(tmp_path / "cassette")
+        assert sorted(i["id"] for i in served.objects[Target.TAGS]) == recorded[Target.TAGS]
+
+    @pytest.mark.parametrize(
+        "engine,expr,ascending,expected_roles,max_requests", [
+            # A page of roles and 3 pages of tags
+            (Crawler, "download>230", False, list(range(250, 230, -1)), 4),
+            # Pages in flight up to the concurrency are obtained for each target
+            (AsyncCrawler, "download>230", False, list(range(250, 230, -1)), 11),
+            (Crawler, "download<20", True, list(range(1, 21)), 4),
+            (Crawler, "download>230 & ansible>1.0", False, list(range(250, 230, -1)), 4),
+            # Not sorted by the filtered value, so all the pages are obtained
+            (Crawler, "download>230", True, list(range(231, 251)), 6),
+        ]
+    )
+    def test_filter_stops_target(self, tmp_path, engine, expr, ascending, expected_roles, max_requests):
+        roles = [{"id": i, "download_count": i, "min_ansible_version": "2.0",
+                  "summary_fields": {"repository": {"download_count": i}}} for i in range(1, 251)]
+        filters = [V1FilterEnum.parse(expr)]
+        queue = ResponseQueue()
+        served = objects()
+        served[Target.ROLES] = roles
+        with FakeGalaxyAPI(served) as api:
+            crawler = engine(
+                [Target.ROLES, Target.TAGS],
+                V1QueryBuilder(page_size=10, base_url=api.url),
+                V1QueryOrder.DOWNLOAD,
+                queue,
+                wait_interval=0,
+                transport=Transport(retry=0),
+                ascending_order=ascending,
+                filters=filters,
+            )
+            parser = ResponseParser(queue, [JsonDataStore(tmp_path)], filters)
+            parser.start()
+            crawler.run()
+            queue.close()
+            parser.join()
+            requests = api.requests
+        assert [i["id"] for i in concat_json(tmp_path / "roles")] == expected_roles
+        # Other targets are crawled after the filtered one is stopped
+        assert len(list(concat_json(tmp_path / "tags"))) == 250
+        assert requests <= max_requests
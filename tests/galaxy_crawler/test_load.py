@@ -0,0 +1,247 @@
+import copy
+
+import pytest
+
+from galaxy_crawler import load
+from galaxy_crawler.models import v1 as models
+
+from .models.v1.base import ModelTestBase, create_session, create_ns, \
+    create_provider, create_provider_ns, create_platform, \
+    create_tag, create_repository
+
+
+def role_json(id_: int = 1, tags: 'list' = None, modified: str = "2019-01-23T01:23:45.000000Z") -> dict:
+    return {
+        "id": id_,
+        "summary_fields": {
+            "dependencies": [],
+            "namespace": {"id": 1, "name": "ns"},
+            "platforms": [{"name": "Ubuntu", "release": "bionic"}],
+            "repository": {"id": 1, "name": "test"},
+            "tags": tags if tags is not None else ["development"],
+            "versions": [{"id": 1, "name": "1.0.0", "release_date": "2018-01-23T00:00:00Z"}],
+        },
+        "created": "2014-01-23T00:00:00.000000Z",
+        "modified": modified,
+        "name": f"test{id_}",
+        "role_type": "ANS",
+        "min_ansible_version": "2.4",
+        "license": "MIT",
+        "description": "Test",
+        "download_count": 100,
+    }
+
+
+class TestApplyDelta(ModelTestBase):
+
+    def setup_method(self):
+        super(TestApplyDelta, self).setup_method()
+        sess = create_session(self.engine)
+        create_provider(sess)
+        ns = create_ns(sess)
+        provider_ns = create_provider_ns(sess, namespace_id=ns.namespace_id)
+        create_repository(sess, provider_ns_id=provider_ns.provider_namespace_id)
+        create_platform(sess)
+        for i, name in enumerate(["development", "system", "web"]):
+            create_tag(sess, i + 1, name)
+        sess.add(models.Role.from_json(role_json(), sess))
+        sess.commit()
+        sess.close()
+
+    def test_overwrite_modified(self):
+        sess = create_session(self.engine)
+        new_json = role_json(tags=["system", "web"], modified="2019-02-01T00:00:00.000000Z")
+        new_json["download_count"] = 200
+        obj = load.apply_delta(new_json, models.Role, sess)
+        sess.add(obj)
+        sess.commit()
+        sess.close()
+
+        sess = create_session(self.engine)
+        role = sess.query(models.Role).one()
+        assert role.download_count == 200
+        assert {t.name for t in role.tags} == {"system", "web"}
+        assert {l.name for l in role.licenses} == {"MIT"}
+        assert sess.query(models.License).count() == 1
+        assert sess.query(models.RepositoryVersion).count() == 1
+
+    def test_skip_unmodified(self):
+        sess = create_session(self.engine)
+        unchanged = copy.deepcopy(role_json())
+        unchanged["download_count"] = 200
+        assert load.apply_delta(unchanged, models.Role, sess) is None
+
+    def test_insert_new(self):
+        sess = create_session(self.engine)
+        obj = load.apply_delta(role_json(id_=2), models.Role, sess)
+        sess.add(obj)
+        sess.commit()
+        assert sess.query(models.Role).count() == 2
+
+
+CREATED = "2014-01-23T00:00:00.000000Z"
+MODIFIED = "2019-01-23T01:23:45.000000Z"
+
+
+def corpus() -> 'dict':
+    """Objects of all the targets, which refer to each other"""
+    base = {"created": CREATED, "modified": MODIFIED, "active": True}
+    roles = []
+    for i in range(1, 31):
+        role = role_json(i, tags=[["development"], ["system", "web"], [], ["unknown", "web"]][i % 4])
+        role["name"] = f"role{i}"
+        role["license"] = ["MIT", "Apache 2.0, BSD", "Proprietary", "GPLv3"][i % 4]
+        role["role_type"] = [None, "ANS", "CON", "APP"][i % 4]
+        role["summary_fields"]["platforms"] = [
+            {"name": "Ubuntu", "release": "bionic"}, {"name": "EL", "release": "7"}][:i % 3]
+        role["summary_fields"]["versions"] = [
+            {"id": i // 2 + v, "name": f"{i // 2 + v}.0", "release_date": "2018-01-23T00:00:00Z"} for v in range(i % 3)]
+        role["summary_fields"]["dependencies"] = [f"ns.role{d}" for d in range(1, i % 5)]
+        roles.append(role)
+    return {
+        "providers": [dict(base, id=1, name="GitHub", description="GitHub")],
+        "platforms": [dict(base, id=1, name="Ubuntu", release="bionic"), dict(base, id=2, name="EL", release="7"),
+                      dict(base, id=3, name="EL", release="7")],
+        "tags": [dict(base, id=i + 1, name=name) for i, name in enumerate(["development", "system", "web"])],
+        "namespaces": [dict(base, id=1, name="ns", company=None, email=None, location="Tokyo\tJapan",
+                            avatar_url=None, html_url=None, is_vendor=False)],
+        "provider_namespaces": [dict(base, id=1, name="ns", email=None, display_name="NS\\1", company=None,
+                                     location=None, avatar_url=None, html_url=None, followers=3,
+                                     summary_fields={"provider": {"id": 1}, "namespace": {"id": 1}})],
+        "repositories": [dict(base, id=1, name="test", readme="# Test\nline", readme_html=None, clone_url=None,
+                              issue_tracker_url=None, external_url=None, commit="abc", commit_url=None,
+                              commit_message="Fix\r\nbug", commit_created="2019-01-01T00:00:00Z",
+                              travis_build_url=None, travis_status_url=None, stargazers_count=1,
+                              watchers_count=2, forks_count=3, open_issues_count=4, community_score=None,
+                              community_survey_count=None, quality_score=5, quality_score_date=None,
+                              deprecated=False, summary_fields={"provider_namespace": {"id": 1}})],
+        "roles": roles,
+    }
+
+
+def write_corpus(json_dir, objs: 'dict'):
+    from galaxy_crawler.constants import Target
+    from galaxy_crawler.store import JsonLinesDataStore
+    store = JsonLinesDataStore(json_dir)
+    for name, items in objs.items():
+        store.save(Target(name), items)
+    store.commit()
+    store.close()
+
+
+def dump_tables(engine) -> 'dict':
+    """Rows of all the tables, in which generated keys are replaced by the names"""
+    conn = engine.connect()
+    licenses = dict(conn.execute("SELECT license_id, name FROM licenses").fetchall())
+    role_types = dict(conn.execute("SELECT role_type_id, name FROM role_types").fetchall())
+    tables = {}
+    for table in models.BaseModel.metadata.sorted_tables:
+        rows = []
+        for row in conn.execute(table.select()).fetchall():
+            row = dict(row)
+            if "license_id" in row:
+                row["license_id"] = licenses[row["license_id"]]
+            if "role_type_id" in row:
+                row["role_type_id"] = role_types[row["role_type_id"]]
+            rows.append(tuple(sorted(row.items(), key=lambda kv: kv[0])))
+        tables[table.name] = sorted(rows, key=str)
+    conn.close()
+    return tables
+
+
+class TestBulkLoad(object):
+
+    def load(self, json_dir, bulk: bool, e=None, delta: bool = False):
+        from galaxy_crawler.models import engine
+        from galaxy_crawler.models.dependeny_resolver import DependencyResolver
+        from galaxy_crawler.queries.v1 import V1QueryBuilder
+        from galaxy_crawler.store import RDBStore
+        if e is None:
+            e = engine.get_in_memory_database()
+        loader = load.JsonLoader(json_dir, e, RDBStore(e), DependencyResolver(V1QueryBuilder(), 0), bulk=bulk)
+        assert loader.to_rdb_store(delta=delta)
+        return e
+
+    def test_same_as_orm(self, tmp_path):
+        write_corpus(tmp_path, corpus())
+        bulk = dump_tables(self.load(tmp_path, bulk=True))
+        orm = dump_tables(self.load(tmp_path, bulk=False))
+        assert len(bulk["roles"]) == 30
+        assert len(bulk["role_dependencies"]) > 0
+        assert len(bulk["tags_association"]) > 0
+        assert bulk == orm
+
+    def test_skip_broken_and_duplicated(self, tmp_path):
+        objs = corpus()
+        objs["roles"][0]["license"] = None
+        objs["roles"].append(objs["roles"][1])
+        objs["tags"].append(objs["tags"][0])
+        write_corpus(tmp_path, objs)
+        tables = dump_tables(self.load(tmp_path, bulk=True))
+        assert sorted(dict(r)["tag_id"] for r in tables["tags"]) == [1, 2, 3]
+        assert sorted(dict(r)["role_id"] for r in tables["roles"]) == list(range(2, 31))
+
+    def test_skip_broken_in_page(self, tmp_path):
+        objs = corpus()
+        # Fails after the tags, platforms and licenses of the role are found
+        objs["roles"][5]["summary_fields"]["versions"] = [{"id": 99, "name": "99.0"}]
+        write_corpus(tmp_path, objs)
+        orm = dump_tables(self.load(tmp_path, bulk=False))
+        assert sorted(dict(r)["role_id"] for r in orm["roles"]) == [i for i in range(1, 31) if i != 6]
+        assert orm == dump_tables(self.load(tmp_path, bulk=True))
+
+    def test_missing_target(self, tmp_path):
+        objs = corpus()
+        del objs["tags"]
+        write_corpus(tmp_path, objs)
+        from galaxy_crawler.models import engine
+        from galaxy_crawler.store import RDBStore
+        e = engine.get_in_memory_database()
+        assert not load.JsonLoader(tmp_path, e, RDBStore(e), None).to_rdb_store()
+
+    def delta(self) -> 'dict':
+        """Objects obtained again, some of which were modified"""
+        objs = corpus()
+        role1 = objs["roles"][0]
+        role1["modified"] = "2019-02-01T00:00:00.000000Z"
+        role1["license"] = "GPLv3"
+        role1["role_type"] = "CON"
+        role1["summary_fields"]["tags"] = ["web", "new"]
+        role1["summary_fields"]["platforms"] = [{"name": "EL", "release": "7"}]
+        role1["summary_fields"]["versions"].append({"id": 2, "name": "2.0", "release_date": "2018-01-23T00:00:00Z"})
+        role1["summary_fields"]["dependencies"] = ["ns.role31"]
+        # Not overwritten since it was not modified
+        objs["roles"][1]["download_count"] = 999
+        role31 = role_json(31, tags=["new"])
+        role31["name"] = "role31"
+        role31["summary_fields"]["versions"] = []
+        objs["roles"].append(role31)
+        objs["tags"].append({"id": 4, "name": "new", "created": CREATED, "modified": MODIFIED, "active": True})
+        return objs
+
+    @pytest.mark.parametrize("bulk", [True, False])
+    def test_same_as_reload(self, tmp_path, bulk):
+        write_corpus(tmp_path / "full", corpus())
+        e = self.load(tmp_path / "full", bulk=True)
+        delta = self.delta()
+        write_corpus(tmp_path / "delta", {"tags": delta["tags"], "roles": delta["roles"]})
+        tables = dump_tables(self.load(tmp_path / "delta", bulk=bulk, e=e, delta=True))
+
+        expected = self.delta()
+        expected["roles"][1]["download_count"] = 100
+        write_corpus(tmp_path / "expected", expected)
+        assert tables == dump_tables(self.load(tmp_path / "expected", bulk=True))
+        role1 = {dict(r)["role_id"]: dict(r) for r in tables["roles"]}[1]
+        assert role1["role_type_id"] == "CON"
+        assert ((("from_id", 1), ("to_id", 31))) in tables["role_dependencies"]
+
+    def test_keep_unmodified(self, tmp_path):
+        write_corpus(tmp_path / "full", corpus())
+        e = self.load(tmp_path / "full", bulk=True)
+        before = dump_tables(e)
+        objs = corpus()
+        for role in objs["roles"]:
+            role["download_count"] = 999
+            role["summary_fields"]["tags"] = []
+        write_corpus(tmp_path / "delta", objs)
+        assert dump_tables(self.load(tmp_path / "delta", bulk=True, e=e, delta=True)) == before
@@ -0,0 +1,82 @@
+from queue import Queue
+
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.crawl import Crawler, Response
+from galaxy_crawler.filters.base import fields
+from galaxy_crawler.filters.v1 import V1FilterEnum
+from galaxy_crawler.projection import Projection
+from galaxy_crawler.queries.v1 import V1QueryBuilder, V1QueryOrder
+
+
+def repository() -> dict:
+    return {
+        "id": 1,
+        "name": "repo",
+        "readme": "# README",
+        "readme_html": "<h1>README</h1>",
+        "modified": "2019-01-23T01:23:45Z",
+        "summary_fields": {
+            "provider_namespace": {"id": 2, "name": "ns"},
+            "versions": [{"id": 3, "name": "1.0.0", "download_url": "https://example.com"}],
+        },
+    }
+
+
+class TestProjection(object):
+
+    @pytest.mark.parametrize(
+        "expressions,expected", [
+            (["repositories=-readme,-readme_html"],
+             dict(repository(), readme=None, readme_html=None)),
+            (["repositories=-summary_fields.versions.download_url"],
+             dict(repository(), summary_fields={"provider_namespace": {"id": 2, "name": "ns"},
+                                                "versions": [{"id": 3, "name": "1.0.0", "download_url": None}]})),
+            (["repositories=name,summary_fields.provider_namespace.id"],
+             {"id": 1, "name": "repo", "modified": "2019-01-23T01:23:45Z",
+              "summary_fields": {"provider_namespace": {"id": 2}}}),
+            (["repositories=name", "repositories=summary_fields,summary_fields.versions"],
+             {"id": 1, "name": "repo", "modified": "2019-01-23T01:23:45Z",
+              "summary_fields": repository()["summary_fields"]}),
+            (["roles=-readme"], repository()),
+        ]
+    )
+    def test_apply(self, expressions, expected):
+        projection = Projection.parse(expressions)
+        assert projection.apply(Target.REPOSITORIES, [repository()]) == [expected]
+
+    @pytest.mark.parametrize(
+        "expressions", [
+            ["repository=-readme"],
+            ["repositories"],
+            ["repositories="],
+            ["repositories=name,-readme"],
+            ["repositories=name", "repositories=-readme"],
+            ["repositories=-id"],
+        ]
+    )
+    def test_invalid(self, expressions):
+        with pytest.raises(ValueError):
+            Projection.parse(expressions)
+
+    def test_filter_fields(self):
+        filters = [V1FilterEnum.parse("star>10 & !download<5"), V1FilterEnum.parse("download>1")]
+        required = {t: fields(filters, t) for t in Target}
+        assert required[Target.REPOSITORIES] == ["stargazers_count", "download_count"]
+        assert required[Target.TAGS] == []
+        # Fields read by the filters are kept
+        projection = Projection.parse(["repositories=name"], required)
+        obj = dict(repository(), stargazers_count=20, download_count=3)
+        assert projection.apply(Target.REPOSITORIES, [obj]) == [
+            {"id": 1, "name": "repo", "modified": "2019-01-23T01:23:45Z", "stargazers_count": 20, "download_count": 3}]
+        with pytest.raises(ValueError):
+            Projection.parse(["repositories=-stargazers_count"], required)
+        assert Projection.parse(["tags=-active"], required)
+
+    def test_emit(self):
+        queue = Queue()
+        crawler = Crawler([Target.REPOSITORIES], V1QueryBuilder(), V1QueryOrder.ID, queue,
+                          projection=Projection.parse(["repositories=-readme_html"]))
+        crawler.emit(Response(Target.REPOSITORIES, {"results": [repository()]}))
+        assert queue.get().response["results"][0]["readme_html"] is None
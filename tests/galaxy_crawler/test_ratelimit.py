@@ -0,0 +1,67 @@
+import pytest
+
+from galaxy_crawler.ratelimit import TokenBucket, RateLimiter
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, sec: float):
+        self.now += sec
+
+
+class TestTokenBucket(object):
+
+    @pytest.mark.parametrize(
+        "rate,burst,expected", [
+            (1, 1, [0, 1, 2, 3]),
+            (2, 1, [0, 0.5, 1.0, 1.5]),
+            (1, 2, [0, 0, 1, 2]),
+            (0.5, 3, [0, 0, 0, 2]),
+        ]
+    )
+    def test_reserve(self, rate, burst, expected):
+        clock = FakeClock()
+        bucket = TokenBucket(rate, burst, clock)
+        actual = [bucket.reserve() for _ in expected]
+        assert actual == pytest.approx(expected)
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, 2, clock)
+        bucket.reserve()
+        bucket.reserve()
+        assert bucket.wait_time == pytest.approx(1)
+        clock.sleep(10)
+        # Tokens never exceed the burst size
+        assert [bucket.reserve() for _ in range(3)] == pytest.approx([0, 0, 1])
+
+
+class TestRateLimiter(object):
+
+    def test_acquire_spends_allowance_exactly(self):
+        clock = FakeClock()
+        limiter = RateLimiter(2, 1, clock=clock, sleep=clock.sleep)
+        for _ in range(5):
+            # Time spent by the request itself is not added to the wait
+            clock.sleep(0.3)
+            limiter.acquire()
+        assert clock.now == pytest.approx(2.3)
+        assert limiter.current_rate() == pytest.approx(2)
+
+    def test_endpoint_budget(self):
+        clock = FakeClock()
+        limiter = RateLimiter(10, 1, {"roles": 1}, clock=clock, sleep=clock.sleep)
+        assert [limiter.reserve("roles") for _ in range(3)] == pytest.approx([0, 1, 2])
+        assert limiter.wait_time("tags") == pytest.approx(0.3)
+
+    def test_unlimited(self):
+        clock = FakeClock()
+        limiter = RateLimiter(None, clock=clock, sleep=clock.sleep)
+        assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+        assert limiter.wait_time() == 0
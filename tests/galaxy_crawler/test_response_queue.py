@@ -0,0 +1,60 @@
+import time
+from threading import Thread
+
+import pytest
+
+from galaxy_crawler.response_queue import QueueClosed, ResponseQueue
+
+
+class TestResponseQueue(object):
+
+    def test_backpressure(self):
+        queue = ResponseQueue(2)
+        consumed = []
+
+        def consume():
+            while True:
+                try:
+                    item = queue.get()
+                except QueueClosed:
+                    break
+                time.sleep(0.01)
+                consumed.append(item)
+
+        consumer = Thread(target=consume)
+        consumer.start()
+        for i in range(10):
+            queue.put(i)
+            assert queue.qsize() <= 2
+        queue.close()
+        consumer.join(1)
+        assert not consumer.is_alive()
+        # Items put before closing are still consumed
+        assert consumed == list(range(10))
+        assert queue.max_depth == 2
+        assert queue.blocked > 0
+
+    @pytest.mark.parametrize("blocked_on", ["put", "get"])
+    def test_close_wakes_up(self, blocked_on):
+        queue = ResponseQueue(1)
+        if blocked_on == "put":
+            queue.put(0)
+            func = lambda: queue.put(1)
+        else:
+            func = queue.get
+        errors = []
+
+        def wait():
+            try:
+                func()
+            except QueueClosed as e:
+                errors.append(e)
+
+        waiter = Thread(target=wait)
+        waiter.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        queue.close()
+        waiter.join(1)
+        assert time.monotonic() - start < 0.1
+        assert len(errors) == 1
@@ -0,0 +1,92 @@
+import time
+from threading import Thread
+
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.scheduler import CrawlScheduler
+
+
+class FakeCrawler(Thread):
+
+    def __init__(self, targets, log: 'list', duration: float = 0.2, fail: bool = False):
+        super(FakeCrawler, self).__init__()
+        self.targets = targets
+        self.log = log
+        self.duration = duration
+        self.fail = fail
+        self.positions = None
+        self.stopped = False
+
+    def run(self):
+        self.log.append(("start", self.targets[0]))
+        deadline = time.monotonic() + self.duration
+        while not self.stopped and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if self.fail:
+            self.stopped = True
+        self.log.append(("end", self.targets[0]))
+
+    def send_stop_signal(self):
+        self.stopped = True
+
+    def resume(self, targets, positions):
+        self.positions = positions
+
+
+targets = [Target.PROVIDERS, Target.TAGS, Target.PLATFORMS, Target.ROLES]
+
+
+class TestCrawlScheduler(object):
+
+    def test_parallel(self):
+        log = []
+        scheduler = CrawlScheduler(targets, lambda t: FakeCrawler(t, log), poll_interval=0.01)
+        start = time.monotonic()
+        scheduler.run()
+        assert time.monotonic() - start < 0.2 * len(targets)
+        assert [e[1] for e in log[:len(targets)]] == targets
+        assert all(e[0] == "start" for e in log[:len(targets)])
+
+    @pytest.mark.parametrize(
+        "dependencies,crawled", [
+            ({Target.ROLES: [Target.TAGS, Target.PLATFORMS]}, targets),
+            # Dependencies which are not crawled are ignored
+            ({Target.ROLES: [Target.NAMESPACES]}, targets),
+        ]
+    )
+    def test_dependencies(self, dependencies, crawled):
+        log = []
+        scheduler = CrawlScheduler(crawled, lambda t: FakeCrawler(t, log), dependencies, poll_interval=0.01)
+        scheduler.run()
+        for target, depends in dependencies.items():
+            for d in depends:
+                if d in crawled:
+                    assert log.index(("end", d)) < log.index(("start", target))
+        assert {e[1] for e in log} == set(crawled)
+
+    def test_stop_all_on_failure(self):
+        log = []
+        scheduler = CrawlScheduler(
+            targets,
+            lambda t: FakeCrawler(t, log, duration=0.05 if t[0] == Target.TAGS else 5, fail=t[0] == Target.TAGS),
+            {Target.ROLES: [Target.TAGS]},
+            poll_interval=0.01)
+        start = time.monotonic()
+        scheduler.run()
+        assert time.monotonic() - start < 1
+        assert ("start", Target.ROLES) not in log
+
+    def test_resume(self):
+        crawlers = dict()
+
+        def factory(t):
+            crawlers[t[0]] = FakeCrawler(t, [], duration=0)
+            return crawlers[t[0]]
+
+        scheduler = CrawlScheduler(targets, factory)
+        scheduler.resume(targets[2:], {Target.ROLES: {"current": 200}})
+        scheduler.run()
+        assert not crawlers[Target.PROVIDERS].is_alive() and crawlers[Target.PROVIDERS].ident is None
+        assert crawlers[Target.ROLES].positions == {Target.ROLES: {"current": 200}}
+        assert crawlers[Target.PLATFORMS].positions == {}
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from galaxy_crawler.checkpoint import Checkpoint
+from galaxy_crawler.constants import Target
+from galaxy_crawler.crawl import Response
+from galaxy_crawler.parser import ResponseParser
+from galaxy_crawler.response_queue import ResponseQueue
+from galaxy_crawler.seen import IdSet, SeenIds
+
+from .test_writer import FakeStore
+
+
+def items(ids: 'list') -> 'list':
+    return [{"id": i} for i in ids]
+
+
+class TestIdSet(object):
+
+    @pytest.mark.parametrize(
+        "ids,expected_len,expected_gaps", [
+            ([], 0, []),
+            ([5], 1, []),
+            ([1, 2, 3, 3, 2], 3, []),
+            ([1, 3, 4, 9], 4, [(2, 2), (5, 8)]),
+            ([100000, 7], 2, [(8, 99999)]),
+        ]
+    )
+    def test_add(self, ids, expected_len, expected_gaps):
+        id_set = IdSet()
+        for i in ids:
+            id_set.add(i)
+        assert len(id_set) == expected_len
+        assert id_set.gaps() == expected_gaps
+        assert all(i in id_set for i in ids)
+        assert 0 not in id_set
+
+        restored = IdSet.from_str(id_set.to_str())
+        assert restored.ids() == sorted(set(ids))
+        assert len(restored) == expected_len
+
+    def test_add_returns_new(self):
+        id_set = IdSet()
+        assert id_set.add(10)
+        assert not id_set.add(10)
+        with pytest.raises(ValueError):
+            id_set.add(-1)
+
+
+class TestSeenIds(object):
+
+    def test_filter(self):
+        seen = SeenIds()
+        assert seen.filter(Target.TAGS, items([1, 2, 3])) == items([1, 2, 3])
+        # The items shifted to the next page
+        assert seen.filter(Target.TAGS, items([3, 4, 4, 6])) == items([4, 6])
+        assert seen.filter(Target.ROLES, items([3])) == items([3])
+        report = seen.gap_report()
+        assert report["tags"] == {"count": 5, "min": 1, "max": 6, "missing": 1, "gaps": [[5, 5]]}
+
+    def test_parser(self, tmp_path):
+        def parse(responses, checkpoint):
+            queue = ResponseQueue(0)
+            for ids, state in responses:
+                queue.put(Response(Target.TAGS, {"results": items(ids)}, state))
+            queue.close()
+            store = FakeStore()
+            parser = ResponseParser(queue, [store], [], checkpoint, gap_report=tmp_path / "gaps.json")
+            parser.run()
+            return store.saved, parser.duplicates
+
+        saved, duplicates = parse([([1, 2, 3], {"page": 2}), ([3, 4, 6], {"page": 3})], Checkpoint(tmp_path))
+        assert saved == [1, 2, 3, 4, 6]
+        assert duplicates == 1
+        with (tmp_path / "gaps.json").open() as fp:
+            assert json.load(fp)["tags"]["gaps"] == [[5, 5]]
+
+        # Ids of the committed objects are kept on resume
+        saved, duplicates = parse([([4, 5, 6, 7], {"page": 4})], Checkpoint(tmp_path).load())
+        assert saved == [5, 7]
+        assert duplicates == 2
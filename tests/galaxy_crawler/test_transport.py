@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from galaxy_crawler.transport import Transport
+
+
+def response(status: int, headers: 'dict' = None) -> 'requests.Response':
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    return resp
+
+
+class TestTransport(object):
+
+    def setup_method(self):
+        self.waits = []
+        self.transport = Transport(retry=3, sleep=self.waits.append)
+
+    @pytest.mark.parametrize(
+        "statuses,expected_status,n_waits", [
+            ([200], 200, 0),
+            ([404], 404, 0),
+            ([500], 500, 0),
+            ([503, 200], 200, 1),
+            ([429, 502, 504, 200], 200, 3),
+            ([503, 503, 503, 503], 503, 3),
+        ]
+    )
+    def test_retry_status(self, statuses, expected_status, n_waits):
+        with patch.object(self.transport.session, 'get', side_effect=[response(s) for s in statuses]) as patched:
+            resp = self.transport.get("https://example.com")
+        assert resp.status_code == expected_status
+        assert len(self.waits) == n_waits
+        assert patched.call_count == n_waits + 1
+
+    def test_retry_after(self):
+        responses = [response(429, {"Retry-After": "7"}), response(200)]
+        with patch.object(self.transport.session, 'get', side_effect=responses):
+            self.transport.get("https://example.com")
+        assert self.waits == [7.0]
+
+    def test_connection_error(self):
+        errors = [requests.ConnectionError("failed")] * 4
+        with patch.object(self.transport.session, 'get', side_effect=errors):
+            with pytest.raises(requests.ConnectionError):
+                self.transport.get("https://example.com")
+        assert len(self.waits) == 3
+
+    @pytest.mark.parametrize("attempt", [1, 2, 3, 10])
+    def test_backoff_time(self, attempt):
+        upper = min(self.transport.max_backoff, self.transport.backoff * 2 ** (attempt - 1))
+        for _ in range(20):
+            assert 0 <= self.transport.backoff_time(attempt) <= upper
+
+    def test_keep_alive_session(self):
+        assert self.transport.session.headers["accept-encoding"] == "gzip, deflate"
+        assert self.transport.session.get_adapter("https://galaxy.ansible.com") \
+            is self.transport.session.get_adapter("https://example.com")
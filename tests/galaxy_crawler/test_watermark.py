@@ -0,0 +1,38 @@
+import pytest
+
+from galaxy_crawler.constants import Target
+from galaxy_crawler.utils import to_datetime
+from galaxy_crawler.watermark import Watermarks
+
+
+def items(*days: int) -> 'list':
+    return [{"id": d, "modified": f"2019-01-{d:02d}T00:00:00.000000Z"} for d in days]
+
+
+class TestWatermarks(object):
+
+    @pytest.mark.parametrize(
+        "days,expected_ids,reached", [
+            ([20, 15], [20, 15], False),
+            ([12, 10, 8], [12], True),
+            ([10, 8], [], True),
+        ]
+    )
+    def test_cut(self, tmp_path, days, expected_ids, reached):
+        marks = Watermarks(tmp_path / "marks.json")
+        marks._marks = {Target.ROLES.value: to_datetime("2019-01-10T00:00:00Z")}
+        fresh, actual_reached = marks.cut(Target.ROLES, items(*days))
+        assert [i["id"] for i in fresh] == expected_ids
+        assert actual_reached is reached
+
+    def test_advance_finished_only(self, tmp_path):
+        path = tmp_path / "marks.json"
+        marks = Watermarks(path).load()
+        marks.cut(Target.TAGS, items(5, 3))
+        marks.cut(Target.ROLES, items(9))
+        marks.finish(Target.TAGS)
+        marks.save()
+
+        loaded = Watermarks(path).load()
+        assert loaded.get(Target.TAGS) == to_datetime("2019-01-05T00:00:00Z")
+        assert loaded.get(Target.ROLES) is None
@@ -0,0 +1,159 @@
+import time
+
+import pytest
+
+from galaxy_crawler.checkpoint import Checkpoint
+from galaxy_crawler.constants import Target
+from galaxy_crawler.crawl import Response
+from galaxy_crawler.parser import ResponseParser
+from galaxy_crawler.repositories import ResponseDataStore
+from galaxy_crawler.response_queue import ResponseQueue
+from galaxy_crawler.utils import to_datetime
+from galaxy_crawler.watermark import Watermarks
+from galaxy_crawler.writer import Batch, CommitPolicy, CommitWorker
+
+
+class FakeStore(ResponseDataStore):
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.saved = []
+        self.committed = []
+        self.closed = False
+
+    def save(self, target, obj, commit=False):
+        self.saved.extend(i["id"] for i in obj)
+
+    def commit(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise IOError("Disk full")
+        self.committed.append(list(self.saved))
+
+    def close(self):
+        self.closed = True
+
+
+def batch(ids: 'list', size: int = 0) -> 'Batch':
+    b = Batch()
+    b.add(Target.TAGS, [{"id": i} for i in ids], size)
+    return b
+
+
+class TestCommitPolicy(object):
+
+    @pytest.mark.parametrize(
+        "policy,records,size,expected", [
+            (CommitPolicy(records=10), 9, 0, False),
+            (CommitPolicy(records=10), 10, 0, True),
+            (CommitPolicy(size=1024), 1, 1023, False),
+            (CommitPolicy(size=1024), 1, 1024, True),
+            (CommitPolicy(records=10, size=1024), 1, 2048, True),
+            (CommitPolicy(), 1000, 1024 * 1024, False),
+        ]
+    )
+    def test_is_due(self, policy, records, size, expected):
+        assert policy.is_due(batch(list(range(records)), size)) == expected
+
+    def test_seconds(self):
+        b = batch([1])
+        assert not CommitPolicy(seconds=0.05).is_due(b)
+        time.sleep(0.05)
+        assert CommitPolicy(seconds=0.05).is_due(b)
+
+    def test_remaining(self):
+        assert CommitPolicy(records=1).remaining(batch([1])) is None
+        assert CommitPolicy(seconds=1).remaining(Batch()) is None
+        assert 0.9 < CommitPolicy(seconds=1).remaining(batch([1])) <= 1
+        assert CommitPolicy(seconds=0).remaining(batch([1])) == 0
+
+
+class TestCommitWorker(object):
+
+    def test_write_behind(self):
+        store = FakeStore(delay=0.1)
+        worker = CommitWorker([store])
+        worker.start()
+        start = time.monotonic()
+        assert worker.submit(batch([1, 2]))
+        # Does not wait for the first batch
+        assert time.monotonic() - start < 0.05
+        # Waits until the first batch is written
+        assert worker.submit(batch([3]))
+        assert 0.05 < time.monotonic() - start
+        assert worker.close()
+        assert store.committed == [[1, 2], [1, 2, 3]]
+        assert store.closed
+        assert worker.batches == 2
+
+    def test_failure(self):
+        store = FakeStore(fail=True)
+        worker = CommitWorker([store])
+        worker.start()
+        assert worker.submit(batch([1]))
+        assert not worker.flush()
+        assert not worker.submit(batch([2]))
+        assert not worker.close()
+        assert store.closed
+
+    def test_checkpoint(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path)
+        worker = CommitWorker([FakeStore()], checkpoint)
+        worker.start()
+        b = batch([1])
+        b.set_position(Target.TAGS, {"page": 2})
+        worker.submit(b)
+        worker.close()
+        assert Checkpoint(tmp_path).load().get_position(Target.TAGS) == {"page": 2}
+
+    @pytest.mark.parametrize("fail, expected", [(False, "2019-01-05T00:00:00Z"), (True, None)])
+    def test_advance_watermark_after_commit(self, tmp_path, fail, expected):
+        marks = Watermarks(tmp_path / "marks.json")
+        marks.cut(Target.TAGS, [{"id": 1, "modified": "2019-01-05T00:00:00.000000Z"}])
+        queue = ResponseQueue(0)
+        queue.put(Response(Target.TAGS, {"results": [{"id": 1}]}, {"current": 1}))
+        queue.put(Response(Target.TAGS, {"results": []}, {"finished": True}))
+        queue.close()
+        parser = ResponseParser(queue, [FakeStore(fail=fail)], [], watermarks=marks)
+        parser.run()
+        assert parser.failed is fail
+        marks.save()
+        mark = Watermarks(tmp_path / "marks.json").load().get(Target.TAGS)
+        assert mark == (to_datetime(expected) if expected is not None else None)
+
+
+class TestResponseParser(object):
+
+    @pytest.mark.parametrize(
+        "policy,expected", [
+            (CommitPolicy(records=4), [[0, 1, 2, 3], [0, 1, 2, 3, 4, 5, 6, 7], list(range(10))]),
+            (CommitPolicy(size=300), [[0, 1, 2, 3], [0, 1, 2, 3, 4, 5, 6, 7], list(range(10))]),
+            (CommitPolicy(), [list(range(10))]),
+        ]
+    )
+    def test_policy(self, policy, expected):
+        queue = ResponseQueue(0)
+        for i in range(5):
+            queue.put(Response(Target.TAGS, {"results": [{"id": i * 2}, {"id": i * 2 + 1}]}, size=150))
+        queue.close()
+        store = FakeStore()
+        parser = ResponseParser(queue, [store], [], policy=policy)
+        parser.run()
+        assert store.committed == expected
+        assert store.closed
+
+    def test_commit_while_stalled(self):
+        queue = ResponseQueue(0)
+        store = FakeStore()
+        parser = ResponseParser(queue, [store], [], policy=CommitPolicy(records=100, seconds=0.1))
+        parser.start()
+        queue.put(Response(Target.TAGS, {"results": [{"id": 1}, {"id": 2}]}))
+        # No more response arrives, but the batch is committed after the seconds
+        time.sleep(0.5)
+        assert store.committed == [[1, 2]]
+        queue.close()
+        parser.join(5)
+        assert not parser.is_alive()
+        assert store.committed == [[1, 2]]
+        assert not parser.failed